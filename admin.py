@@ -0,0 +1,16 @@
+# admin.py
+import os
+from typing import Dict, Optional
+
+# Comma-separated user ids allowed on admin pages. If none are configured,
+# everyone is an admin in mock mode (so the demo shows those pages) and
+# nobody is against a real database.
+ADMIN_USER_IDS = {uid.strip() for uid in os.environ.get('ADMIN_USER_IDS', '').split(',') if uid.strip()}
+
+
+def is_admin(user: Optional[Dict], mock_mode: bool = False) -> bool:
+    if not user:
+        return False
+    if ADMIN_USER_IDS:
+        return user.get('id') in ADMIN_USER_IDS
+    return mock_mode
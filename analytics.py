@@ -0,0 +1,176 @@
+# analytics.py
+"""Resolution-time analytics over a columnar snapshot of the request history.
+
+Requests are loaded once into NumPy columns (`RequestFrame`): text fields as
+integer codes into a category list, timestamps as datetime64 with NaT when
+unset. Percentiles and backlog trends are then computed with whole-array
+operations, and the frame converts to Arrow for a Parquet export.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from rollups import naive
+
+CATEGORY_FIELDS = ('status', 'urgency', 'skill_needed', 'requester_location')
+TIME_FIELDS = ('created_at', 'assigned_at', 'resolved_at', 'expired_at')
+# Fields the Firestore scan projects
+ANALYTICS_FIELDS = CATEGORY_FIELDS + TIME_FIELDS
+
+# Dimensions percentiles can be broken down by
+GROUP_FIELDS = {'skill': 'skill_needed', 'urgency': 'urgency', 'location': 'requester_location'}
+# Durations, as (start, end) timestamp columns
+METRICS = {'assign': ('created_at', 'assigned_at'), 'resolve': ('created_at', 'resolved_at')}
+PERCENTILES = (50, 90, 95)
+
+HOUR = np.timedelta64(1, 'h')
+DAY = np.timedelta64(1, 'D')
+
+
+def _timestamp(ts) -> Optional[datetime]:
+    return naive(ts) if isinstance(ts, datetime) else None
+
+
+class RequestFrame:
+    """Request history as columns: category codes for text, datetime64[us] for times"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], categories: Dict[str, List[str]]):
+        self.columns = columns
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.columns['created_at'])
+
+    @classmethod
+    def from_requests(cls, requests: Iterable[Dict]) -> 'RequestFrame':
+        requests = requests if isinstance(requests, list) else list(requests)
+        columns, categories = {}, {}
+        for field in CATEGORY_FIELDS:
+            table = {}
+            columns[field] = np.fromiter(
+                (table.setdefault(req.get(field) or '', len(table)) for req in requests),
+                dtype=np.int32, count=len(requests))
+            categories[field] = list(table)
+        for field in TIME_FIELDS:
+            # Arrow converts datetime objects several times faster than NumPy
+            stamps = pa.array([_timestamp(req.get(field)) for req in requests], pa.timestamp('us'))
+            columns[field] = stamps.to_numpy(zero_copy_only=False)
+        return cls(columns, categories)
+
+    def to_arrow(self) -> pa.Table:
+        arrays = {field: pa.DictionaryArray.from_arrays(self.columns[field],
+                                                        pa.array(self.categories[field], pa.string()))
+                  for field in CATEGORY_FIELDS}
+        arrays.update({field: pa.array(self.columns[field]) for field in TIME_FIELDS})
+        return pa.table(arrays)
+
+    @classmethod
+    def from_arrow(cls, table: pa.Table) -> 'RequestFrame':
+        columns, categories = {}, {}
+        for field in CATEGORY_FIELDS:
+            column = table.column(field).combine_chunks()
+            if not pa.types.is_dictionary(column.type):
+                column = column.dictionary_encode()
+            columns[field] = column.indices.to_numpy(zero_copy_only=False).astype(np.int32)
+            categories[field] = column.dictionary.to_pylist()
+        for field in TIME_FIELDS:
+            if field not in table.column_names:
+                # Exported before the field was collected
+                columns[field] = np.full(table.num_rows, np.datetime64('NaT', 'us'))
+                continue
+            columns[field] = table.column(field).to_numpy().astype('datetime64[us]')
+        return cls(columns, categories)
+
+    def write_parquet(self, where):
+        """`where` is a path or a writable binary file object"""
+        pq.write_table(self.to_arrow(), where)
+
+    @classmethod
+    def read_parquet(cls, path) -> 'RequestFrame':
+        return cls.from_arrow(pq.read_table(path))
+
+    def hours(self, metric: str) -> np.ndarray:
+        """Duration per request in hours; NaN where it hasn't happened (or wasn't recorded)"""
+        start, end = METRICS[metric]
+        return (self.columns[end] - self.columns[start]) / HOUR
+
+
+def duration_percentiles(frame: RequestFrame, by: str, metric: str = 'resolve',
+                         percentiles=PERCENTILES) -> List[Dict]:
+    """Per-group count and percentiles (hours) of a duration, busiest group first.
+
+    One sort by (group, duration) puts every group's values in a contiguous
+    sorted run, so all percentiles of all groups are read off with fancy
+    indexing instead of a loop over groups.
+    """
+    field = GROUP_FIELDS[by]
+    hours = frame.hours(metric)
+    done = ~np.isnan(hours)
+    codes, hours = frame.columns[field][done], hours[done]
+    if not len(hours):
+        return []
+    order = np.lexsort((hours, codes))
+    codes, hours = codes[order], hours[order]
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    counts = np.diff(np.r_[starts, len(codes)])
+    rows = {'group': [frame.categories[field][code] or 'Unspecified' for code in codes[starts]],
+            'count': counts}
+    for p in percentiles:
+        # Linear interpolation between closest ranks, as np.percentile does
+        position = starts + (counts - 1) * (p / 100)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        rows[f'p{p}'] = hours[lower] + (hours[upper] - hours[lower]) * (position - lower)
+
+    result = [{by: rows['group'][idx], 'count': int(counts[idx]),
+               **{f'p{p}_hours': round(float(rows[f'p{p}'][idx]), 1) for p in percentiles}}
+              for idx in range(len(starts))]
+    result.sort(key=lambda row: -row['count'])
+    return result
+
+
+def backlog_trend(frame: RequestFrame, days: int = 90, now: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+    """Per day over the last `days`: requests created, claimed, resolved and
+    expired, and the open (unclaimed) and unresolved backlog at the end of
+    each day. An expired request leaves both backlogs when it expires.
+
+    Requests claimed or resolved before `assigned_at` was recorded count as
+    claimed at the earliest time known for them. Open and expired requests
+    (released ones included) were never claimed for good, so they don't.
+    """
+    status = frame.columns['status']
+    created = frame.columns['created_at']
+    resolved = frame.columns['resolved_at']
+    expired = frame.columns['expired_at']
+    was_claimed = np.isin(status, [_code(frame, 'status', 'assigned'), _code(frame, 'status', 'resolved')])
+    claimed = np.where(np.isnat(frame.columns['assigned_at']), resolved, frame.columns['assigned_at'])
+    claimed = np.where(np.isnat(claimed) & was_claimed, created, claimed)
+    resolved = np.where(np.isnat(resolved) & (status == _code(frame, 'status', 'resolved')),
+                        created, resolved)
+
+    end = np.datetime64((now or datetime.now()).date() + timedelta(days=1), 'D')
+    start = end - days * DAY
+    trend = {'day': np.arange(start, end, DAY)}
+    totals = {}
+    for name, stamps in (('created', created), ('claimed', claimed), ('resolved', resolved),
+                         ('expired', expired)):
+        day = (stamps[~np.isnat(stamps)] - start) // DAY
+        trend[name] = np.bincount(day[(day >= 0) & (day < days)], minlength=days)
+        # Running total, including everything from before the window
+        totals[name] = np.count_nonzero(day < 0) + np.cumsum(trend[name])
+    # Only open requests expire, so an expired one was never claimed or resolved
+    trend['open_backlog'] = totals['created'] - totals['claimed'] - totals['expired']
+    trend['unresolved_backlog'] = totals['created'] - totals['resolved'] - totals['expired']
+    return trend
+
+
+def _code(frame: RequestFrame, field: str, value: str) -> int:
+    """Category code of `value`, or -1 (matching nothing) if it never occurs"""
+    try:
+        return frame.categories[field].index(value)
+    except ValueError:
+        return -1
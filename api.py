@@ -0,0 +1,387 @@
+# api.py
+"""JSON API over FirebaseService, for the mobile client and kiosks.
+
+An ASGI app (Starlette): run it with `python scripts/serve_api.py` or
+`uvicorn api:app`. It uses whatever backend FirebaseService picks, so
+USE_MOCK_DB / USE_FAKE_FIRESTORE work as they do for the Streamlit app.
+
+Handlers are async and run the blocking service calls on a worker thread,
+each one as its own "rerun" (deadline budget and read memo). List
+endpoints page with opaque cursors. GETs carry an ETag and answer
+`If-None-Match` with 304. Their bodies are cached for API_CACHE_TTL seconds,
+and any write through the API clears the cache. With
+MAINTENANCE_IN_PROCESS=true the server also runs the maintenance scheduler.
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from firebase_service import FirebaseService
+from maintenance import MaintenanceScheduler
+from rollups import naive
+
+MAINTENANCE_IN_PROCESS = os.environ.get('MAINTENANCE_IN_PROCESS', 'false').lower() == 'true'
+
+# Seconds a GET response is served from the cache (and may be by clients)
+API_CACHE_TTL = float(os.environ.get('API_CACHE_TTL', '5'))
+API_CACHE_SIZE = int(os.environ.get('API_CACHE_SIZE', '1024'))
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Fields a client may set when creating a request or a user
+REQUEST_FIELDS = ('item', 'description', 'urgency', 'location_notes', 'skill_needed', 'notes',
+                  'requester_id', 'requester_name', 'requester_location')
+USER_FIELDS = ('name', 'location', 'skills')
+
+
+class ApiError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class ResponseCache:
+    """Thread-safe LRU of values that expire `ttl` seconds after being stored"""
+
+    def __init__(self, ttl: float = API_CACHE_TTL, max_entries: int = API_CACHE_SIZE,
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[1]
+
+    def put(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode(payload) -> bytes:
+    return json.dumps(payload, default=_json_default, separators=(',', ':')).encode('utf-8')
+
+
+def etag(body: bytes) -> str:
+    return '"%s"' % hashlib.sha1(body).hexdigest()[:20]
+
+
+def _sort_key(record: Dict) -> tuple:
+    created_at = record.get('created_at')
+    return (naive(created_at).isoformat() if isinstance(created_at, datetime) else '', record.get('id', ''))
+
+
+def encode_cursor(record: Dict) -> str:
+    return base64.urlsafe_b64encode(encode(list(_sort_key(record)))).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return (str(created_at), str(record_id))
+    except (ValueError, TypeError):
+        raise ApiError(400, "Invalid cursor")
+
+
+class Listing:
+    """Records newest first, paged by keyset cursors on (created_at, id).
+
+    A cursor names the last record of the previous page, so a page never
+    repeats or skips records when newer ones arrive in between.
+    """
+
+    def __init__(self, records: List[Dict]):
+        self.records = sorted(records, key=_sort_key, reverse=True)
+        self._keys_ascending = [_sort_key(r) for r in reversed(self.records)]
+
+    def page(self, limit: int, cursor: Optional[str] = None) -> Dict:
+        start = 0
+        if cursor:
+            # Everything older than the cursor sits at the end of the list
+            start = len(self.records) - bisect_left(self._keys_ascending, decode_cursor(cursor))
+        items = self.records[start:start + limit]
+        more = start + limit < len(self.records)
+        return {'items': items, 'next_cursor': encode_cursor(items[-1]) if more and items else None}
+
+
+class ExchangeApi:
+    """Routes and handlers; holds the service and the response cache"""
+
+    def __init__(self, firebase: Optional[FirebaseService] = None, cache: Optional[ResponseCache] = None):
+        self._firebase = firebase
+        self.cache = cache or ResponseCache()
+        self.routes = [
+            Route('/requests', self.list_requests, methods=['GET']),
+            Route('/requests', self.create_request, methods=['POST']),
+            Route('/requests/{request_id}', self.get_request, methods=['GET']),
+            Route('/requests/{request_id}/assign', self.assign_request, methods=['POST']),
+            Route('/requests/{request_id}/resolve', self.resolve_request, methods=['POST']),
+            Route('/users', self.list_users, methods=['GET']),
+            Route('/users', self.create_user, methods=['POST']),
+            Route('/users/{user_id}', self.get_user, methods=['GET']),
+            Route('/stats', self.get_stats, methods=['GET']),
+            Route('/communities', self.list_communities, methods=['GET']),
+        ]
+
+    @property
+    def firebase(self) -> FirebaseService:
+        if self._firebase is None:
+            self._firebase = FirebaseService.get_instance()
+        return self._firebase
+
+    async def call(self, community: Optional[str], method, *args, **kwargs):
+        """Run a blocking service call on a worker thread as its own rerun"""
+        def run():
+            self.firebase.begin_rerun()
+            self.firebase.set_community(community)
+            return method(*args, **kwargs)
+        return await run_in_threadpool(run)
+
+    # Responses
+    def _json(self, payload, status_code: int = 200) -> Response:
+        return Response(encode(payload), status_code=status_code, media_type='application/json')
+
+    def _error(self, error: ApiError) -> Response:
+        return self._json({'error': error.message}, error.status_code)
+
+    async def _cached_get(self, request: Request, load) -> Response:
+        """Serve a GET from the cache or `load()`, with ETag / If-None-Match"""
+        try:
+            key = (request.url.path, str(request.query_params))
+            cached = self.cache.get(key)
+            if cached is None:
+                body = encode(await load())
+                cached = (body, etag(body))
+                self.cache.put(key, cached)
+        except ApiError as error:
+            return self._error(error)
+        body, tag = cached
+        headers = {'ETag': tag, 'Cache-Control': f'private, max-age={int(API_CACHE_TTL)}'}
+        match = request.headers.get('if-none-match', '')
+        if match == '*' or tag in (t.strip() for t in match.split(',')):
+            self.cache.stats['not_modified'] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type='application/json', headers=headers)
+
+    async def _body(self, request: Request) -> Dict:
+        try:
+            data = await request.json()
+        except ValueError:
+            raise ApiError(400, "Body must be JSON")
+        if not isinstance(data, dict):
+            raise ApiError(400, "Body must be a JSON object")
+        return data
+
+    def _page_args(self, request: Request) -> tuple:
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise ApiError(400, "limit must be an integer")
+        return max(1, min(limit, MAX_PAGE_SIZE)), request.query_params.get('cursor')
+
+    async def _listing(self, key: tuple, community: Optional[str], method, *args) -> Listing:
+        """Sorted result of a list read, kept in the cache while paging through it"""
+        listing = self.cache.get(key)
+        if listing is None:
+            listing = Listing(await self.call(community, method, *args))
+            self.cache.put(key, listing)
+        return listing
+
+    # Requests
+    async def list_requests(self, request: Request) -> Response:
+        """GET /requests?status=&community=&summary=1&limit=&cursor="""
+        params = request.query_params
+        status, community = params.get('status'), params.get('community')
+        summary = params.get('summary', '1') != '0'
+
+        async def load():
+            limit, cursor = self._page_args(request)
+            listing = await self._listing(('listing', 'requests', status, summary, community), community,
+                                          self.firebase.get_all_requests, status, summary)
+            return listing.page(limit, cursor)
+        return await self._cached_get(request, load)
+
+    async def get_request(self, request: Request) -> Response:
+        request_id = request.path_params['request_id']
+
+        async def load():
+            record = await self.call(None, self.firebase.get_repair_request, request_id)
+            if record is None:
+                raise ApiError(404, "Request not found")
+            return {**record, 'id': request_id}
+        return await self._cached_get(request, load)
+
+    async def create_request(self, request: Request) -> Response:
+        """POST /requests; send an Idempotency-Key header to make retries safe"""
+        try:
+            data = await self._body(request)
+            missing = [field for field in ('item', 'description', 'requester_id') if not data.get(field)]
+            if missing:
+                raise ApiError(400, f"Missing fields: {', '.join(missing)}")
+            request_data = {field: data[field] for field in REQUEST_FIELDS if field in data}
+            request_data.setdefault('urgency', 'Medium')
+            if 'requester_name' not in request_data or 'requester_location' not in request_data:
+                requester = await self.call(None, self.firebase.get_user, request_data['requester_id'])
+                if requester is None:
+                    raise ApiError(400, "Unknown requester; send requester_name and requester_location")
+                request_data.setdefault('requester_name', requester.get('name'))
+                request_data.setdefault('requester_location', requester.get('location'))
+            request_id = await self.call(None, self.firebase.create_repair_request, request_data,
+                                         idempotency_key=request.headers.get('idempotency-key'))
+        except ApiError as error:
+            return self._error(error)
+        return self._created(request_id, 'request')
+
+    async def assign_request(self, request: Request) -> Response:
+        """POST /requests/{id}/assign {"user_id"}: 409 if already claimed"""
+        try:
+            data = await self._body(request)
+            if not data.get('user_id'):
+                raise ApiError(400, "Missing fields: user_id")
+            await self._require_request(request.path_params['request_id'])
+            ok = await self.call(None, self.firebase.assign_repairer,
+                                 request.path_params['request_id'], data['user_id'])
+        except ApiError as error:
+            return self._error(error)
+        return self._transitioned(ok, 'assigned', "Request is no longer open")
+
+    async def resolve_request(self, request: Request) -> Response:
+        """POST /requests/{id}/resolve {"gratitude_note", "repairer_id"}: 409 unless assigned (to them)"""
+        try:
+            data = await self._body(request)
+            await self._require_request(request.path_params['request_id'])
+            ok = await self.call(None, self.firebase.resolve_request, request.path_params['request_id'],
+                                 data.get('gratitude_note', ''), data.get('repairer_id'))
+        except ApiError as error:
+            return self._error(error)
+        return self._transitioned(ok, 'resolved', "Request is not assigned to this repairer")
+
+    async def _require_request(self, request_id: str):
+        if await self.call(None, self.firebase.get_repair_request, request_id) is None:
+            raise ApiError(404, "Request not found")
+
+    def _created(self, doc_id: Optional[str], kind: str) -> Response:
+        if not doc_id:
+            return self._error(ApiError(503, f"Could not create the {kind}; try again shortly"))
+        self.cache.clear()
+        pending = self.firebase.get_write_status(doc_id) == 'pending'
+        return self._json({'id': doc_id, 'status': 'pending' if pending else 'committed'},
+                          202 if pending else 201)
+
+    def _transitioned(self, ok: bool, status: str, conflict: str) -> Response:
+        if not ok:
+            return self._error(ApiError(409, conflict))
+        self.cache.clear()
+        return self._json({'status': status})
+
+    # Users
+    async def list_users(self, request: Request) -> Response:
+        """GET /users?community=&limit=&cursor="""
+        community = request.query_params.get('community')
+
+        async def load():
+            limit, cursor = self._page_args(request)
+            listing = await self._listing(('listing', 'users', community), community,
+                                          self.firebase.get_all_users)
+            return listing.page(limit, cursor)
+        return await self._cached_get(request, load)
+
+    async def get_user(self, request: Request) -> Response:
+        user_id = request.path_params['user_id']
+
+        async def load():
+            user = await self.call(None, self.firebase.get_user, user_id)
+            if user is None:
+                raise ApiError(404, "User not found")
+            return {**user, 'id': user_id}
+        return await self._cached_get(request, load)
+
+    async def create_user(self, request: Request) -> Response:
+        try:
+            data = await self._body(request)
+            missing = [field for field in ('name', 'location') if not data.get(field)]
+            if missing:
+                raise ApiError(400, f"Missing fields: {', '.join(missing)}")
+            user_data = {field: data[field] for field in USER_FIELDS if field in data}
+            if not isinstance(user_data.get('skills', []), list):
+                raise ApiError(400, "skills must be a list")
+            user_id = await self.call(None, self.firebase.create_user, user_data,
+                                      idempotency_key=request.headers.get('idempotency-key'))
+        except ApiError as error:
+            return self._error(error)
+        return self._created(user_id, 'user')
+
+    # Stats
+    async def get_stats(self, request: Request) -> Response:
+        """GET /stats?community="""
+        community = request.query_params.get('community')
+
+        async def load():
+            return await self.call(community, self.firebase.get_stats)
+        return await self._cached_get(request, load)
+
+    async def list_communities(self, request: Request) -> Response:
+        async def load():
+            return {'items': await self.call(None, self.firebase.list_communities)}
+        return await self._cached_get(request, load)
+
+
+def create_app(firebase: Optional[FirebaseService] = None, cache: Optional[ResponseCache] = None) -> Starlette:
+    api = ExchangeApi(firebase, cache)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # Connect before the first request rather than during it
+        await run_in_threadpool(lambda: api.firebase)
+        if MAINTENANCE_IN_PROCESS:
+            app.state.maintenance = MaintenanceScheduler(api.firebase)
+            app.state.maintenance.start()
+        yield
+        if MAINTENANCE_IN_PROCESS:
+            app.state.maintenance.stop(timeout=5)
+
+    app = Starlette(routes=api.routes, lifespan=lifespan)
+    app.state.api = api
+    return app
+
+
+app = create_app()
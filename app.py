@@ -1,6 +1,13 @@
 # app.py
+import html
+
 import streamlit as st
 from firebase_service import FirebaseService
+from communities import community_id, community_of
+from idempotency import idempotency_key, new_form_key
+from leaderboard import OVERALL, board_markdown, month_board, skill_board
+from profiler import finish_rerun_profile, mark_section, start_rerun_profile
+from request_cards import cards_markdown
 from datetime import datetime
 
 # Page configuration
@@ -250,13 +257,15 @@ def show_landing_page(firebase):
     # Community Stats Preview
     st.divider()
     stats = firebase.get_stats() if firebase else {}
+    impact = firebase.get_impact_summary() if firebase else {}
     st.markdown("### 📊 Community Impact So Far")
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.metric("Total Repairs", stats.get('total', 0))
     with col2:
-        st.metric("Items Saved", "0", "+0 this month", delta_color="off")
+        st.metric("Items Saved", impact.get('items_saved', 0),
+                  f"+{impact.get('items_saved_this_month', 0)} this month", delta_color="off")
     with col3:
         try:
             user_count = len(firebase.get_all_users()) if firebase else 0
@@ -264,7 +273,10 @@ def show_landing_page(firebase):
         except:
             st.metric("Community Members", 0)
     with col4:
-        st.metric("Skills Shared", "15+", "and counting")
+        # Resolved repairs per skill live on the overall leaderboard document
+        overall = firebase.get_leaderboards([OVERALL]).get(OVERALL, {}) if firebase else {}
+        st.metric("Skills Shared", len(overall.get('skills', {})),
+                  f"across {overall.get('resolved', 0)} repairs", delta_color="off")
 
 def show_dashboard(firebase, user):
     """Show dashboard for logged in users"""
@@ -329,44 +341,39 @@ def show_dashboard(firebase, user):
     
     st.divider()
     
-    # Recent Activity
-    st.markdown("### 🔥 Recent Community Activity")
-    recent_requests = firebase.get_all_requests()[:4] if firebase else []
-    
-    if recent_requests:
+    # Personalized feed: open requests matching this user's skills, one read
+    feed = firebase.get_feed(user['id'], limit=4) if firebase and user.get('skills') else []
+    if feed:
+        st.markdown("### 🛠️ Requests You Can Fix")
         cols = st.columns(2)
-        for idx, req in enumerate(recent_requests):
+        for idx, req in enumerate(feed):
             with cols[idx % 2]:
-                status_color = {
-                    'open': '#FF9800',
-                    'assigned': '#2196F3',
-                    'resolved': '#4CAF50'
-                }.get(req.get('status', 'open'), '#666')
-                
+                # Every field comes from another member, so escape it
                 st.markdown(f"""
                 <div class="request-card">
-                    <div style="display: flex; justify-content: space-between; align-items: start;">
-                        <h4 style="margin: 0;">{req.get('item', 'Unknown Item')}</h4>
-                        <span style="background: {status_color}; color: white; padding: 0.25rem 0.75rem; 
-                                border-radius: 12px; font-size: 0.8rem; font-weight: bold;">
-                            {req.get('status', 'open').upper()}
-                        </span>
-                    </div>
+                    <h4 style="margin: 0;">{html.escape(req.get('item') or 'Unknown Item')}</h4>
                     <p style="color: #666; margin: 0.75rem 0; font-size: 0.9rem;">
-                        {req.get('description', 'No description')[:80]}...
+                        {html.escape((req.get('description_preview') or 'No description')[:80])}...
                     </p>
-                    <div style="display: flex; justify-content: space-between; align-items: center;">
-                        <span style="color: #1E88E5; font-size: 0.85rem;">
-                            📍 {req.get('requester_location', 'Unknown')}
-                        </span>
-                        <button onclick="window.location.href='/pages/3_👷_Assign_Repairer.py?request={req['id']}'" 
-                                style="background: #1E88E5; color: white; border: none; padding: 0.5rem 1rem; 
-                                       border-radius: 5px; cursor: pointer; font-size: 0.85rem;">
-                            View Details
-                        </button>
-                    </div>
+                    <span style="color: #1E88E5; font-size: 0.85rem;">
+                        🛠️ {html.escape(req.get('skill_needed') or 'General')} •
+                        ⚡ {html.escape(req.get('urgency') or 'Medium')} •
+                        📍 {html.escape(req.get('requester_location') or 'Unknown')}
+                    </span>
                 </div>
                 """, unsafe_allow_html=True)
+                if st.button("Offer to Fix", key=f"feed_offer_{req['id']}", use_container_width=True):
+                    st.session_state.selected_request = req['id']
+                    st.switch_page("pages/3_👷_Assign_Repairer.py")
+        st.divider()
+    
+    # Recent Activity
+    st.markdown("### 🔥 Recent Community Activity")
+    recent_requests = firebase.get_all_requests(summary=True)[:4] if firebase else []
+    
+    if recent_requests:
+        # All four cards in one element; open them from Browse
+        st.markdown(cards_markdown(recent_requests, columns=2), unsafe_allow_html=True)
     else:
         st.info("No repair requests yet. Be the first to log one and inspire your community!")
     
@@ -374,15 +381,41 @@ def show_dashboard(firebase, user):
     
     # Community Impact
     st.markdown("### 🌍 Your Community Impact")
+    impact = firebase.get_impact_summary() if firebase else {}
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Items Saved", "0", "Start repairing!", delta_color="off")
+        if impact.get('items_saved'):
+            st.metric("Items Saved", impact['items_saved'],
+                      f"+{impact.get('items_saved_this_month', 0)} this month", delta_color="off")
+        else:
+            st.metric("Items Saved", "0", "Start repairing!", delta_color="off")
     with col2:
         user_count = len(firebase.get_all_users()) if firebase else 0
         st.metric("Community Helpers", str(user_count), "neighbors")
     with col3:
-        st.metric("Waste Reduced", "0 kg", "Start your first repair!")
+        if impact.get('kg_saved'):
+            st.metric("Waste Reduced", f"{impact['kg_saved']:g} kg",
+                      f"+{impact.get('kg_saved_this_month', 0):g} kg this month")
+        else:
+            st.metric("Waste Reduced", "0 kg", "Start your first repair!")
+    if impact.get('median_hours_to_resolve') is not None:
+        st.caption(f"⏱️ Typical repair is completed in about {impact['median_hours_to_resolve']:g} hours")
+    
+    # Top repairers: every board shown comes from one batched read
+    boards = {"All time": OVERALL, "This month": month_board(datetime.now())}
+    for skill in user.get('skills', [])[:3]:
+        boards[skill] = skill_board(skill)
+    leaderboards = firebase.get_leaderboards(list(boards.values())) if firebase else {}
+    if leaderboards.get(OVERALL, {}).get('top'):
+        st.markdown("### 🏆 Top Repairers")
+        for tab, board in zip(st.tabs(list(boards)), boards.values()):
+            with tab:
+                top = leaderboards.get(board, {}).get('top', [])
+                if top:
+                    st.markdown(board_markdown(top, user_id=user['id']))
+                else:
+                    st.caption("No repairs completed here yet. Yours could be the first!")
     
     # Mission statement
     st.markdown("---")
@@ -426,6 +459,20 @@ def show_user_sidebar(firebase, user):
             if len(user['skills']) > 3:
                 st.caption(f"+ {len(user['skills']) - 3} more skills")
         st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Counters are maintained on the user document, so this is one read
+        counters = firebase.get_user_counters(user['id']) if firebase else {}
+        st.caption(f"🔧 {counters.get('resolved_as_repairer', 0)} fixed • "
+                   f"🛠️ {counters.get('assigned_in_progress', 0)} in progress • "
+                   f"📝 {counters.get('requested', 0)} requested • "
+                   f"💝 {counters.get('gratitude_received', 0)} thanks")
+    
+    # Writes still queued for the database (write-behind mode)
+    pending_writes = firebase.get_pending_writes() if firebase else []
+    if pending_writes:
+        st.caption(f"⏳ {len(pending_writes)} change(s) syncing...")
+    if firebase and firebase.get_resilience_metrics()['breaker']['state'] != 'closed':
+        st.caption("🩺 Database is recovering — showing recently cached data")
     
     # Logout button
     if st.button("🚪 Logout", use_container_width=True):
@@ -524,8 +571,8 @@ def show_login_form(firebase):
                     'skills': [s.strip() for s in skills.split(',')] if skills else []
                 }
 
-                # Check if user exists
-                all_users = firebase.get_all_users() if firebase else []
+                # Check if user exists (only their community can have them)
+                all_users = firebase.get_all_users(community_id(location)) if firebase else []
                 if existing_user := next(
                     (
                         u
@@ -541,8 +588,14 @@ def show_login_form(firebase):
                     st.session_state.current_user = existing_user
                     st.success(f"Welcome back, {name}!")
                 else:
-                    user_id = firebase.create_user(user_data) if firebase else None
+                    # Same key for the same details in this session, so a
+                    # double click can't register two accounts
+                    form_key = st.session_state.setdefault('user_setup_form_key', new_form_key())
+                    key = idempotency_key(form_key, {'name': name.lower(), 'location': location.lower()})
+                    user_id = firebase.create_user(user_data, idempotency_key=key) if firebase else None
                     if user_id:
+                        # Created: a later sign-up starts a new form session
+                        st.session_state.pop('user_setup_form_key', None)
                         user_data['id'] = user_id
                         st.session_state.current_user = user_data
                         st.success(f"Welcome to the community, {name}!")
@@ -580,8 +633,13 @@ def main():
     
     # Get Firebase instance
     firebase = st.session_state.get('firebase')
+    if firebase:
+        firebase.begin_rerun()
+        firebase.set_community(community_of(st.session_state.current_user))
+        start_rerun_profile("Home", st.session_state.current_user, firebase.mock_mode)
     
     # User Registration/Selection in Sidebar
+    mark_section("Sidebar")
     with st.sidebar:
         if st.session_state.current_user is None:
             show_login_form(firebase)
@@ -593,10 +651,13 @@ def main():
     st.markdown("<h1 class='main-header'>🛠️ Welcome to Micro-Repair Exchange</h1>", unsafe_allow_html=True)
     st.markdown("<h3 style='text-align: center; color: #666; margin-bottom: 2rem;'>Restoring dignity through repair • Building community through skills</h3>", unsafe_allow_html=True)
     
+    mark_section("Main content")
     if st.session_state.current_user:
         show_dashboard(firebase, st.session_state.current_user)
     else:
         show_landing_page(firebase)
+    
+    finish_rerun_profile()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,52 @@
+# archive.py
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+ARCHIVE_COLLECTION = 'repair_requests_archive'
+
+# Resolved requests older than this move out of the live collection
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '90'))
+
+
+class ArchiveCheckpoint:
+    """Progress of an archival run, saved to a small JSON file after each batch.
+
+    If a run is interrupted, the next run with the same cutoff resumes after
+    the last archived (`resolved_at`, id) instead of rescanning from the
+    start. The file is removed when a run completes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self, cutoff: datetime) -> Dict:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    state = json.load(f)
+                if state.get('cutoff') == cutoff.isoformat():
+                    return state
+            except (OSError, json.JSONDecodeError):
+                pass
+        return {'cutoff': cutoff.isoformat(), 'cursor': None, 'cursor_id': None,
+                'archived': 0, 'batches': 0}
+
+    def save(self, state: Dict):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def cursor_value(state: Dict) -> Optional[Tuple[datetime, Optional[str]]]:
+    """The (resolved_at, id) to resume after; the id is None in checkpoints
+    saved before ties were broken by id"""
+    if not state.get('cursor'):
+        return None
+    return datetime.fromisoformat(state['cursor']), state.get('cursor_id')
@@ -0,0 +1,79 @@
+# benchmarks/analytics_frame.py
+"""Time building, analysing and exporting a columnar request history.
+
+Generates synthetic historical requests (as dicts, the way the history scan
+returns them) and times RequestFrame.from_requests, the vectorized
+percentile and backlog computations, and the Parquet round trip.
+
+    python benchmarks/analytics_frame.py --requests 1000000
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analytics import GROUP_FIELDS, RequestFrame, backlog_trend, duration_percentiles  # noqa: E402
+from rollups import ESTIMATED_KG_BY_SKILL  # noqa: E402
+
+PLACES = [f'Area {idx}, Springfield' for idx in range(200)]
+
+
+def make_requests(count, days, seed):
+    rng = random.Random(seed)
+    now = datetime.now()
+    skills = list(ESTIMATED_KG_BY_SKILL)
+    requests = []
+    for _ in range(count):
+        created_at = now - timedelta(days=rng.random() * days)
+        req = {'status': 'open', 'urgency': rng.choice(['Low', 'Medium', 'High']),
+               'skill_needed': rng.choice(skills), 'requester_location': rng.choice(PLACES),
+               'created_at': created_at, 'assigned_at': None, 'resolved_at': None}
+        roll = rng.random()
+        if roll >= 0.1:
+            req['status'] = 'assigned'
+            req['assigned_at'] = created_at + timedelta(hours=rng.expovariate(1 / 12))
+        if roll >= 0.25:
+            req['status'] = 'resolved'
+            req['resolved_at'] = req['assigned_at'] + timedelta(hours=rng.expovariate(1 / 36))
+        requests.append(req)
+    return requests
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<34} {(time.perf_counter() - start) * 1000:9.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000000)
+    parser.add_argument('--days', type=int, default=3 * 365)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    requests = make_requests(args.requests, args.days, args.seed)
+    print(f"{args.requests} requests over {args.days} days")
+
+    frame = timed('RequestFrame.from_requests', lambda: RequestFrame.from_requests(requests))
+    for by in GROUP_FIELDS:
+        for metric in ('assign', 'resolve'):
+            timed(f'duration_percentiles({by}, {metric})',
+                  lambda: duration_percentiles(frame, by, metric))
+    timed('backlog_trend(365 days)', lambda: backlog_trend(frame, 365))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'requests.parquet'
+        timed('write_parquet', lambda: frame.write_parquet(path))
+        print(f"{'parquet size':<34} {path.stat().st_size / 1024 / 1024:9.1f} MiB")
+        timed('read_parquet', lambda: RequestFrame.read_parquet(path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+# benchmarks/api_load.py
+"""Load test for the JSON API: requests/sec and latency per endpoint.
+
+Serves api.py with uvicorn on a local port, on a generated mock database
+(or the fake Firestore client with --fake-firestore), and drives it with
+concurrent httpx clients. List reads are measured with the response cache
+on, off, and as conditional GETs that come back 304.
+
+    python benchmarks/api_load.py --requests 5000 --concurrency 32 --seconds 5
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def serve(args, port: int, ready):
+    """Server process: seed a backend, then run the API on `port`"""
+    if args.fake_firestore:
+        os.environ['USE_FAKE_FIRESTORE'] = 'true'
+    else:
+        os.environ['USE_MOCK_DB'] = 'true'
+    from api import create_app
+    from firebase_service import FirebaseService
+    from scripts.generate_mock_snapshot import build_demo_db
+
+    firebase = FirebaseService()
+    if args.fake_firestore:
+        user_id = firebase.create_user({'name': 'Bench', 'location': 'Riverside, Springfield'})
+        for idx in range(args.requests):
+            firebase.create_repair_request({'item': f'Kettle {idx}', 'description': 'Bench',
+                                            'requester_id': user_id, 'requester_name': 'Bench',
+                                            'requester_location': 'Riverside, Springfield'})
+    else:
+        firebase.db = build_demo_db(args.requests, args.users)
+    app = create_app(firebase)
+    app.state.api.cache.ttl = 0 if args.no_cache else 3600
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    ready.set()
+    threading.Event().wait()
+
+
+async def hammer(base_url: str, make_request, concurrency: int, seconds: float):
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + seconds
+
+    async def worker(client, idx):
+        n = 0
+        while time.perf_counter() < deadline:
+            method, path, kwargs = make_request(idx, n)
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            n += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client, idx) for idx in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': latencies[len(latencies) // 2] * 1000 if latencies else 0,
+        'p95': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0,
+        'statuses': statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--fake-firestore', action='store_true',
+                        help="serve the fake Firestore client instead of the mock database")
+    args = parser.parse_args()
+
+    # The server runs in its own process so the load generator doesn't
+    # compete with it for the GIL
+    servers = {}
+    for no_cache in (False, True):
+        port, ready = free_port(), multiprocessing.Event()
+        server_args = argparse.Namespace(**{**vars(args), 'no_cache': no_cache})
+        servers[no_cache] = (multiprocessing.Process(target=serve, args=(server_args, port, ready), daemon=True),
+                             f'http://127.0.0.1:{port}')
+        servers[no_cache][0].start()
+        ready.wait()
+
+    base_url = servers[False][1]
+    first_page = httpx.get(f'{base_url}/requests?limit=50')
+    tag = first_page.headers['etag']
+    request_ids = [item['id'] for item in first_page.json()['items']]
+    user_id = first_page.json()['items'][0]['requester_id']
+
+    scenarios = [
+        ('GET /stats', lambda i, n: ('GET', '/stats', {})),
+        ('GET /requests (cached)', lambda i, n: ('GET', '/requests?limit=50', {})),
+        ('GET /requests (304)', lambda i, n: ('GET', '/requests?limit=50', {'headers': {'If-None-Match': tag}})),
+        ('GET /requests (no cache)', lambda i, n: ('GET', '/requests?limit=50', {})),
+        ('GET /requests/{id}', lambda i, n: ('GET', f'/requests/{request_ids[(i + n) % len(request_ids)]}', {})),
+        ('POST /requests', lambda i, n: ('POST', '/requests', {'json': {
+            'item': f'Lamp {i}-{n}', 'description': 'Load test', 'requester_id': user_id,
+            'requester_name': 'Bench', 'requester_location': 'Riverside, Springfield'}})),
+    ]
+    print(f"{args.requests} requests, {args.concurrency} concurrent clients, "
+          f"{args.seconds:g}s per endpoint ({'fake Firestore' if args.fake_firestore else 'mock database'})")
+    print(f"{'endpoint':<28} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8}  statuses")
+    for name, make_request in scenarios:
+        base_url = servers[name.endswith('(no cache)')][1]
+        result = asyncio.run(hammer(base_url, make_request, args.concurrency, args.seconds))
+        statuses = ' '.join(f'{code}×{count}' for code, count in sorted(result['statuses'].items()))
+        print(f"{name:<28} {result['rps']:>9,.0f} {result['p50']:>8.1f} {result['p95']:>8.1f}  {statuses}")
+
+    for process, _ in servers.values():
+        process.terminate()
+
+
+if __name__ == '__main__':
+    main()
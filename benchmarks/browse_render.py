@@ -0,0 +1,61 @@
+# benchmarks/browse_render.py
+"""Frontend deltas, widgets and render time for one Browse page rerun.
+
+Runs the Browse page with Streamlit's AppTest against generated mock
+databases of increasing size, signed in as a repairer, with every status
+shown. Deltas counts every element and layout block the rerun sends;
+widgets counts the ones that register a widget key.
+
+    python benchmarks/browse_render.py --sizes 100 500 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ['USE_MOCK_DB'] = 'true'
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1.element_tree import Widget  # noqa: E402
+
+from communities import community_of  # noqa: E402
+from firebase_service import FirebaseService  # noqa: E402
+from scripts.generate_mock_snapshot import build_demo_db  # noqa: E402
+
+PAGE = ROOT / 'pages' / '2_🔍_Browse_Requests.py'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500, 2000])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--reruns', type=int, default=5)
+    args = parser.parse_args()
+
+    firebase = FirebaseService.get_instance()
+    print(f"{'requests':>9} {'cards':>6} {'deltas':>7} {'widgets':>8} {'median ms':>10}")
+    for size in args.sizes:
+        firebase.db = build_demo_db(size, args.users)
+        user = next(u for u in firebase.db.users if u.get('skills'))
+        app = AppTest.from_file(str(PAGE), default_timeout=120)
+        app.session_state.current_user = user
+        app.session_state.firebase = firebase
+        app.run()
+        app.sidebar.multiselect[0].set_value(['open', 'assigned', 'resolved'])
+        timings = []
+        for _ in range(args.reruns):
+            start = time.perf_counter()
+            app.run()
+            timings.append((time.perf_counter() - start) * 1000)
+        nodes = list(app._tree)
+        cards = len(app.session_state[f'request_sync_{community_of(user)}'].requests)
+        widgets = sum(isinstance(node, Widget) for node in nodes)
+        print(f"{size:>9} {cards:>6} {len(nodes):>7} {widgets:>8} {statistics.median(timings):>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
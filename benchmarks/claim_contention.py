@@ -0,0 +1,208 @@
+# benchmarks/claim_contention.py
+"""Contention benchmark for claiming repair requests.
+
+Many threads race to claim a small set of hot open requests through
+`assign_repairer`. Reports claim throughput, conflict rate and checks that
+every request ended up with exactly one repairer.
+
+By default this runs against MockFirestore, whose claims are serialized by
+a lock. With --fake it runs the production `@firestore.transactional` path
+against the fake client instead: the hot requests are created concurrently
+in one community, then claimed concurrently by repairers with user
+documents. It also reports transaction aborts and transactions that ran out
+of retries, for both phases.
+
+    python benchmarks/claim_contention.py --claimers 64 --hot 10 --rounds 20
+    python benchmarks/claim_contention.py --fake --claimers 16 --hot 5 --rounds 5 --latency-ms 5
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+LOCATION = 'Riverside, Springfield'
+
+
+def race(workers, work):
+    """Run work(idx) on `workers` threads released together; returns the elapsed time"""
+    barrier = threading.Barrier(workers)
+
+    def run(idx):
+        barrier.wait()
+        work(idx)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(workers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+class Backend:
+    """MockFirestore, claimed through its own compare-and-set"""
+
+    def __init__(self, args):
+        from firebase_service import MockFirestore
+        self.db = MockFirestore()
+        self.aborts = 0
+
+    def create(self, idx):
+        return self.db.create_repair_request({'item': f'Kettle {idx}', 'requester_id': 'bench_requester'})
+
+    def claim(self, request_id, user_id):
+        return self.db.assign_repairer(request_id, user_id)
+
+    def repairer(self, idx):
+        return f'repairer_{idx}'
+
+
+class FakeBackend:
+    """FirebaseService's Firestore path against the fake client.
+
+    Calls the transactional write methods directly, without
+    `_guarded_write`, so a transaction that runs out of retries is seen as
+    the ValueError `firestore.transactional` raises instead of a False.
+    """
+
+    def __init__(self, args):
+        from firebase_service import FirebaseService
+        self.service = FirebaseService()
+        self.db = self.service.db
+        self.requester = self.service.create_user({'name': 'Requester', 'location': LOCATION})
+        self._repairers = [self.service.create_user({'name': f'Repairer {i}', 'location': LOCATION,
+                                                     'skills': ['Electrical']})
+                           for i in range(args.claimers)]
+        self.db.latency = args.latency_ms / 1000
+
+    @property
+    def aborts(self):
+        return self.db.aborts
+
+    def create(self, idx):
+        return self.service._write_repair_request({
+            'item': f'Kettle {idx}', 'description': 'Won\'t heat', 'urgency': 'High',
+            'skill_needed': 'Electrical', 'requester_id': self.requester,
+            'requester_name': 'Requester', 'requester_location': LOCATION})
+
+    def claim(self, request_id, user_id):
+        return self.service._assign_repairer(request_id, user_id)
+
+    def repairer(self, idx):
+        return self._repairers[idx]
+
+
+def run_round(backend, hot, claimers, totals):
+    lock = threading.Lock()
+    # Create the hot requests concurrently
+    request_ids = [None] * hot
+    aborts = backend.aborts
+
+    def creator(idx):
+        try:
+            request_ids[idx] = backend.create(idx)
+        except ValueError:
+            with lock:
+                totals['create_exhausted'] += 1
+
+    race(hot, creator)
+    totals['create_aborts'] += backend.aborts - aborts
+    request_ids = [request_id for request_id in request_ids if request_id]
+    totals['created'] += len(request_ids)
+
+    wins = {request_id: [] for request_id in request_ids}
+    aborts = backend.aborts
+
+    def claimer(idx):
+        user_id = backend.repairer(idx)
+        counts = {'claims': 0, 'conflicts': 0, 'claim_exhausted': 0}
+        # Every claimer tries every hot request, starting at a different offset
+        for offset in range(len(request_ids)):
+            request_id = request_ids[(idx + offset) % len(request_ids)]
+            try:
+                won = backend.claim(request_id, user_id)
+            except ValueError:
+                counts['claim_exhausted'] += 1
+                continue
+            if won:
+                counts['claims'] += 1
+                with lock:
+                    wins[request_id].append(user_id)
+            else:
+                counts['conflicts'] += 1
+        with lock:
+            for key, value in counts.items():
+                totals[key] += value
+
+    totals['elapsed'] += race(claimers, claimer)
+    totals['claim_aborts'] += backend.aborts - aborts
+    totals['double_claims'] += sum(1 for winners in wins.values() if len(winners) > 1)
+    totals['unclaimed'] += sum(1 for winners in wins.values() if not winners)
+    return wins
+
+
+def check_store(service, wins):
+    """Requests whose stored assignee isn't the one claimer told it won"""
+    wrong = 0
+    for request_id, winners in wins.items():
+        stored = service.db.collection('repair_requests').document(request_id).get().to_dict()
+        if stored['status'] != 'assigned' or [stored['assigned_to_id']] != winners:
+            wrong += 1
+    return wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--claimers', type=int, default=32, help='concurrent claimer threads')
+    parser.add_argument('--hot', type=int, default=8, help='hot requests per round')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--fake', action='store_true',
+                        help='run the transactional Firestore path against the fake client')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='fake client RPC latency')
+    args = parser.parse_args()
+
+    if args.fake:
+        os.environ['USE_FAKE_FIRESTORE'] = 'true'
+    else:
+        os.environ.setdefault('USE_MOCK_DB', 'true')
+    backend = FakeBackend(args) if args.fake else Backend(args)
+
+    totals = dict.fromkeys(['created', 'create_aborts', 'create_exhausted', 'claims', 'conflicts',
+                            'claim_aborts', 'claim_exhausted', 'double_claims', 'unclaimed',
+                            'wrong_in_store'], 0)
+    totals['elapsed'] = 0.0
+    for _ in range(args.rounds):
+        wins = run_round(backend, args.hot, args.claimers, totals)
+        if args.fake:
+            totals['wrong_in_store'] += check_store(backend.service, wins)
+
+    attempts = totals['claims'] + totals['conflicts'] + totals['claim_exhausted']
+    creates = args.hot * args.rounds
+    print(f"{'fake Firestore' if args.fake else 'mock'} claimers={args.claimers} hot={args.hot} "
+          f"rounds={args.rounds}" + (f" latency={args.latency_ms:g}ms" if args.fake else ""))
+    if args.fake:
+        print(f"creates:         {totals['created']}/{creates}, "
+              f"{totals['create_aborts'] / creates:.2f} aborts per create, "
+              f"{totals['create_exhausted']} out of retries")
+    print(f"attempts:        {attempts}")
+    print(f"successful:      {totals['claims']}")
+    print(f"conflict rate:   {totals['conflicts'] / attempts:.1%}")
+    if args.fake:
+        print(f"aborts:          {totals['claim_aborts'] / attempts:.2f} per claim attempt")
+        print(f"out of retries:  {totals['claim_exhausted']} ({totals['claim_exhausted'] / attempts:.1%})")
+    print(f"throughput:      {attempts / totals['elapsed']:,.0f} claim attempts/sec")
+    print(f"double claims:   {totals['double_claims']}")
+    print(f"unclaimed:       {totals['unclaimed']}")
+    if args.fake:
+        print(f"store mismatch:  {totals['wrong_in_store']}")
+    bad = totals['double_claims'] + totals['wrong_in_store'] + totals['create_exhausted']
+    return 1 if bad else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# benchmarks/degraded_backend.py
+"""Page-load latency against a slow and failing backend.
+
+Simulates reruns of a page that makes six reads (like the dashboard) while
+the mock backend goes healthy -> slow and failing -> healthy again, and shows
+how deadlines, the rerun budget and the circuit breaker bound each rerun.
+
+    python benchmarks/degraded_backend.py --latency-ms 2500 --reruns 10
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ['USE_MOCK_DB'] = 'true'
+os.environ.setdefault('MOCK_LATENCY_MS', '1')
+
+from firebase_service import FirebaseService  # noqa: E402
+
+
+def page_rerun(firebase, user_id):
+    firebase.begin_rerun()
+    start = time.perf_counter()
+    firebase.get_stats()
+    firebase.get_all_users()
+    firebase.get_all_requests()
+    firebase.get_user_requests(user_id, role='assignee')
+    firebase.get_user_requests(user_id, role='requester')
+    firebase.get_user(user_id)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency-ms', type=float, default=2500, help='latency while degraded')
+    parser.add_argument('--failure-rate', type=float, default=0.5, help='failure rate while degraded')
+    parser.add_argument('--reruns', type=int, default=10, help='reruns per phase')
+    args = parser.parse_args()
+
+    firebase = FirebaseService()
+    firebase.breaker.reset_timeout = 1.0
+    user_id = firebase.create_user({'name': 'Bench', 'location': 'Lab', 'skills': []})
+    for i in range(50):
+        firebase.create_repair_request({'item': f'Lamp {i}', 'requester_id': user_id})
+
+    phases = [
+        ('healthy', 0.0, 0.001),
+        ('degraded', args.failure_rate, args.latency_ms / 1000),
+        ('recovered', 0.0, 0.001),
+    ]
+    print(f"deadline={firebase.call_deadline}s budget={firebase.rerun_budget}s "
+          f"breaker threshold={firebase.breaker.failure_threshold}")
+    for name, failure_rate, latency in phases:
+        firebase.db.set_faults(failure_rate=failure_rate, latency=latency)
+        if name == 'recovered':
+            time.sleep(firebase.breaker.reset_timeout)  # let the half-open probe through
+        timings = [page_rerun(firebase, user_id) for _ in range(args.reruns)]
+        metrics = firebase.get_resilience_metrics()
+        print(f"{name:>10}: mean {sum(timings) / len(timings) * 1000:7.1f} ms  "
+              f"max {max(timings) * 1000:7.1f} ms  breaker={metrics['breaker']['state']}")
+
+    print()
+    for key, value in firebase.get_resilience_metrics().items():
+        print(f"{key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+# benchmarks/event_log_contention.py
+"""Contention benchmark for appending to one community's event log.
+
+Writer threads create requests concurrently in a single community through
+the production `@firestore.transactional` path against the fake client,
+each under a caller-chosen id as the write-behind queue and form keys do.
+Reader threads tail the log at the same time with EventSubscription, which
+numbers the pending events as it reads. Appending an event reads nothing,
+so creates only conflict over their own request, and the stream's head is
+written by the readers' sequencer transactions alone.
+
+Reports create throughput, transaction aborts while writing (with
+--readers 0 these are the creates' own) and transactions that ran out of
+retries, then checks that every event was numbered exactly once, with no
+gaps, and that each reader saw every event in order.
+
+    python benchmarks/event_log_contention.py --writers 32 --creates 20 --readers 0
+    python benchmarks/event_log_contention.py --writers 32 --creates 20 --readers 2 --latency-ms 5
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+LOCATION = 'Riverside, Springfield'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=32, help='concurrent writer threads')
+    parser.add_argument('--creates', type=int, default=20, help='requests created per writer')
+    parser.add_argument('--readers', type=int, default=2, help='concurrent tailing subscribers')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='fake client RPC latency')
+    args = parser.parse_args()
+
+    os.environ['USE_FAKE_FIRESTORE'] = 'true'
+    from event_log import EventSubscription
+    from firebase_service import FirebaseService
+
+    service = FirebaseService()
+    requester = service.create_user({'name': 'Requester', 'location': LOCATION})
+    service.db.latency = args.latency_ms / 1000
+
+    lock = threading.Lock()
+    totals = {'created': 0, 'create_exhausted': 0, 'read_errors': 0}
+    done = threading.Event()
+    barrier = threading.Barrier(args.writers + args.readers)
+    subscriptions = [EventSubscription(service, f'bench_{i}') for i in range(args.readers)]
+    seen = [[] for _ in subscriptions]
+
+    def writer(idx):
+        barrier.wait()
+        for i in range(args.creates):
+            try:
+                service._write_repair_request({
+                    'item': f'Kettle {idx}.{i}', 'description': 'Won\'t heat', 'urgency': 'High',
+                    'skill_needed': 'Electrical', 'requester_id': requester,
+                    'requester_name': 'Requester', 'requester_location': LOCATION}, uuid.uuid4().hex)
+                created, exhausted = 1, 0
+            except ValueError:
+                created, exhausted = 0, 1
+            with lock:
+                totals['created'] += created
+                totals['create_exhausted'] += exhausted
+
+    def reader(idx):
+        subscription = subscriptions[idx]
+        barrier.wait()
+        while True:
+            finished = done.is_set()
+            try:
+                while subscription.run_once(seen[idx].extend):
+                    pass
+            except ValueError:
+                with lock:
+                    totals['read_errors'] += 1
+                continue
+            if finished:
+                return
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    readers = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    start = time.perf_counter()
+    for t in threads + readers:
+        t.start()
+    for t in threads:
+        t.join()
+    write_elapsed = time.perf_counter() - start
+    write_aborts = service.db.aborts
+    done.set()
+    for t in readers:
+        t.join()
+    if not readers:
+        EventSubscription(service, 'bench_check').run_once(lambda events: None)
+    read_aborts = service.db.aborts - write_aborts
+
+    stored = sorted(doc.to_dict()['seq'] or 0 for doc in service.db.collection('events').stream())
+    expected = list(range(1, len(stored) + 1))
+    unnumbered = stored.count(0)
+    gaps = 0 if stored == expected else len(set(expected) - set(stored))
+    duplicates = len(stored) - len(set(stored))
+    short_reads = sum(1 for events in seen if [e['seq'] for e in events] != expected)
+
+    creates = args.writers * args.creates
+    print(f"fake Firestore writers={args.writers} creates={args.creates} readers={args.readers} "
+          f"latency={args.latency_ms:g}ms")
+    print(f"creates:         {totals['created']}/{creates}, {totals['create_exhausted']} out of retries")
+    print(f"throughput:      {totals['created'] / write_elapsed:,.0f} creates/sec")
+    print(f"aborts:          {write_aborts} while writing ({write_aborts / creates:.2f} per create)")
+    print(f"sequencer:       {read_aborts} aborts after writers finished, "
+          f"{totals['read_errors']} out of retries")
+    print(f"events:          {len(stored)}, {unnumbered} unnumbered, {gaps} gaps, "
+          f"{duplicates} duplicate seqs")
+    print(f"readers:         {args.readers - short_reads}/{args.readers} saw every event in order")
+    bad = totals['create_exhausted'] + unnumbered + gaps + duplicates + short_reads
+    return 1 if bad else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+# benchmarks/event_replay.py
+"""Replay throughput of the event log, and a check that replaying it
+reproduces the stats counters.
+
+Generates a mock database whose log is rebuilt from its history, then has
+an EventSubscription read the whole log from the start at several batch
+sizes, folding the events into per-community status counts. Each run
+restarts halfway through (a fresh subscription with the same name) to show
+it resumes from the saved checkpoint without gaps or repeats. With --fake
+the log is written through the Firestore code path instead, one service
+call per event, against the fake client.
+
+    python benchmarks/event_replay.py --requests 50000
+    python benchmarks/event_replay.py --fake --requests 300
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Status a request moves to with each event, and the one it leaves
+STATUS_CHANGES = {
+    'RequestCreated': (None, 'open'),
+    'RepairerAssigned': ('open', 'assigned'),
+    'RequestResolved': ('assigned', 'resolved'),
+    'AssignmentReleased': ('assigned', 'open'),
+    'RequestExpired': ('open', 'expired'),
+}
+
+
+class StatusFold:
+    """Per-community status counts built from events, like get_stats()"""
+
+    def __init__(self):
+        self.counts = defaultdict(lambda: defaultdict(int))
+        self.seen = set()
+        self.repeats = 0
+
+    def __call__(self, events):
+        for event in events:
+            key = (event['community'], event['seq'])
+            if key in self.seen:
+                self.repeats += 1
+                continue
+            self.seen.add(key)
+            change = STATUS_CHANGES.get(event['type'])
+            if change is None:
+                continue
+            counts = self.counts[event['community']]
+            left, entered = change
+            if left:
+                counts[left] -= 1
+            else:
+                counts['total'] += 1
+            counts[entered] += 1
+
+
+def seed_fake(firebase, requests: int, seed: int = 7):
+    rng = random.Random(seed)
+    people = [firebase.create_user({'name': f'Neighbor {i}', 'location': f'Riverside, {city}'})
+              for i, city in enumerate(['Springfield', 'Shelbyville'] * 5)]
+    for n in range(requests):
+        requester = rng.choice(people)
+        request_id = firebase.create_repair_request({
+            'item': f'Lamp {n}', 'description': 'Flickers', 'urgency': 'Medium',
+            'requester_id': requester, 'requester_name': 'Neighbor',
+            'requester_location': firebase.get_user(requester)['location']})
+        roll = rng.random()
+        if roll < 0.7:
+            repairer = rng.choice(people)
+            firebase.assign_repairer(request_id, repairer)
+            if roll < 0.5:
+                firebase.resolve_request(request_id, 'Thanks!', repairer_id=repairer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=50000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[100, 500, 2000])
+    parser.add_argument('--fake', action='store_true', help="use the fake Firestore client")
+    args = parser.parse_args()
+
+    if args.fake:
+        os.environ['USE_FAKE_FIRESTORE'] = 'true'
+    else:
+        os.environ['USE_MOCK_DB'] = 'true'
+        # Keep the whole rebuilt log
+        os.environ.setdefault('MOCK_EVENT_LOG_SIZE', '0')
+    from event_log import EventSubscription
+    from firebase_service import FirebaseService
+
+    firebase = FirebaseService()
+    start = time.perf_counter()
+    if args.fake:
+        seed_fake(firebase, args.requests)
+    else:
+        from scripts.generate_mock_snapshot import build_demo_db
+        firebase.db = build_demo_db(args.requests, args.users)
+    heads = firebase.get_event_heads()
+    total = sum(heads.values())
+    print(f"{total} events in {len(heads)} streams, written in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'batch':>6} {'events/s':>10} {'polls':>6} {'missed':>7} {'repeats':>8} {'stats match':>12}")
+    for batch_size in args.batch_sizes:
+        name = f'replay-{batch_size}-{time.time_ns()}'
+        fold = StatusFold()
+        subscription = EventSubscription(firebase, name, batch_size=batch_size)
+        start = time.perf_counter()
+        polls = 0
+        while subscription.stats['events'] < total // 2 and subscription.run_once(fold):
+            polls += 1
+        # Restart: a new subscriber under the same name picks up the checkpoint
+        missed = subscription.stats['missed']
+        subscription = EventSubscription(firebase, name, batch_size=batch_size)
+        while subscription.run_once(fold):
+            polls += 1
+        elapsed = time.perf_counter() - start
+        missed += subscription.stats['missed']
+        match = all(
+            {field: fold.counts[community].get(field, 0) for field in ('total', 'open', 'assigned', 'resolved')}
+            == {field: firebase.get_stats(community).get(field, 0)
+                for field in ('total', 'open', 'assigned', 'resolved')}
+            for community in heads)
+        print(f"{batch_size:>6} {len(fold.seen) / elapsed:>10,.0f} {polls:>6} {missed:>7} "
+              f"{fold.repeats:>8} {'yes' if match else 'NO':>12}")
+
+
+if __name__ == '__main__':
+    main()
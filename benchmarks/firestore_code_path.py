@@ -0,0 +1,79 @@
+# benchmarks/firestore_code_path.py
+"""Time the real Firestore code path of FirebaseService against the fake client.
+
+Runs FirebaseService with USE_FAKE_FIRESTORE, so every call goes through the
+Firestore branch (queries, transactions, batches) against an in-process
+client that sleeps a simulated RPC latency. Reports wall time and RPCs per
+operation.
+
+    python benchmarks/firestore_code_path.py --requests 500 --latency-ms 20
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ['USE_FAKE_FIRESTORE'] = 'true'
+
+from firebase_service import FirebaseService  # noqa: E402
+
+
+def timed(firebase, label, fn, repeat=1):
+    rpcs = firebase.db.rpc_count
+    start = time.perf_counter()
+    for _ in range(repeat):
+        firebase.begin_rerun()
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<34} {elapsed * 1000:9.1f} ms  {(firebase.db.rpc_count - rpcs) / repeat:6.1f} rpcs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    firebase = FirebaseService()
+    # Seed without latency, then switch it on for the measured calls
+    firebase.db.latency = 0.0
+    requester = firebase.create_user({'name': 'Bench', 'location': 'Lab', 'skills': []})
+    repairer = firebase.create_user({'name': 'Fixer', 'location': 'Lab', 'skills': []})
+    ids = [firebase.create_repair_request({'item': f'Lamp {i}', 'description': 'Flickers ' * 40,
+                                           'skill_needed': 'Electrical', 'requester_id': requester})
+           for i in range(args.requests)]
+    firebase.db.latency = args.latency_ms / 1000
+    # Keep deadlines out of the way; this measures the code path, not the breaker
+    firebase.call_deadline = max(firebase.call_deadline, args.latency_ms / 1000 * 10)
+    firebase.rerun_budget = max(firebase.rerun_budget, 60.0)
+
+    print(f"{args.requests} requests, {args.latency_ms:g} ms per RPC")
+    timed(firebase, 'get_all_requests', firebase.get_all_requests, args.repeat)
+    timed(firebase, 'get_all_requests(summary=True)',
+          lambda: firebase.get_all_requests(summary=True), args.repeat)
+    timed(firebase, 'get_requests_changed_since',
+          lambda: firebase.get_requests_changed_since(None, limit=100), args.repeat)
+    timed(firebase, 'get_priority_queue',
+          lambda: firebase.get_priority_queue(limit=100), args.repeat)
+    timed(firebase, 'get_user_requests',
+          lambda: firebase.get_user_requests(requester, summary=True), args.repeat)
+    timed(firebase, 'get_stats', firebase.get_stats, args.repeat)
+    timed(firebase, 'get_impact_summary', firebase.get_impact_summary, args.repeat)
+    timed(firebase, 'get_repair_request', lambda: firebase.get_repair_request(ids[0]), args.repeat)
+    timed(firebase, 'create_repair_request',
+          lambda: firebase.create_repair_request({'item': 'Kettle', 'requester_id': requester}),
+          args.repeat)
+    claims = iter(ids)
+    timed(firebase, 'assign_repairer', lambda: firebase.assign_repairer(next(claims), repairer),
+          args.repeat)
+    resolves = iter(ids)
+    timed(firebase, 'resolve_request',
+          lambda: firebase.resolve_request(next(resolves), 'Thanks!', repairer_id=repairer),
+          args.repeat)
+
+
+if __name__ == '__main__':
+    main()
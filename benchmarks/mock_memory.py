@@ -0,0 +1,84 @@
+# benchmarks/mock_memory.py
+"""Memory held by the mock database's archive under different budgets.
+
+Generates a mock database, archives resolved requests older than
+--archive-days, then shrinks the archive's memory budget step by step and
+reports the memory traced after each step, how long looking up archived
+requests and a user's history take, and what a full get_all_requests costs
+now that it returns a view instead of a copy.
+
+    python benchmarks/mock_memory.py --requests 20000
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ['USE_MOCK_DB'] = 'true'
+
+from scripts.generate_mock_snapshot import build_demo_db  # noqa: E402
+
+
+def traced_mb() -> float:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--archive-days', type=int, default=60)
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    db = build_demo_db(args.requests, args.users)
+    cutoff = datetime.now() - timedelta(days=args.archive_days)
+    while db.archive_resolved(cutoff, 1000)[0]:
+        pass
+    archived = list(db.archive)
+    rng = random.Random(7)
+    lookups = [rng.choice(archived) for _ in range(args.lookups)]
+    users = [u['id'] for u in db.users[:100]]
+    full_mb = db.archive.memory_stats()['resident_bytes'] / 2 ** 20
+    print(f"{len(db.requests)} live requests, {len(archived)} archived (~{full_mb:.1f} MB estimated)")
+
+    print(f"{'budget':>10} {'traced MB':>10} {'resident':>9} {'on disk MB':>11} "
+          f"{'lookup µs':>10} {'history ms':>11}")
+    for share in (None, 0.5, 0.25, 0.1):
+        budget = full_mb * share * 2 ** 20 if share else 0
+        db.archive.resize(budget)
+        memory = traced_mb()
+        start = time.perf_counter()
+        for request_id in lookups:
+            db.get_repair_request(request_id)
+        lookup_us = (time.perf_counter() - start) / len(lookups) * 1e6
+        start = time.perf_counter()
+        for user_id in users:
+            db.get_user_requests(user_id, role='assignee')
+        history_ms = (time.perf_counter() - start) / len(users) * 1000
+        db.archive.resize(budget)
+        stats = db.archive.memory_stats()
+        label = f"{share:.0%}" if share else "unbounded"
+        print(f"{label:>10} {memory:>10.1f} {stats['resident']:>9} "
+              f"{stats['spill_file_bytes'] / 2 ** 20:>11.1f} {lookup_us:>10.1f} {history_ms:>11.2f}")
+
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    listing = db.get_all_requests()
+    elapsed = (time.perf_counter() - start) * 1e6
+    copied = (tracemalloc.get_traced_memory()[0] - before) / 1024
+    print(f"get_all_requests(): {type(listing).__name__} of {len(listing)}, "
+          f"{elapsed:.0f} µs, {copied:.1f} KiB allocated (a list copy would be "
+          f"~{sys.getsizeof(list(db.requests)) / 1024:.0f} KiB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/projection_payload.py
+"""Payload size and decode time of full vs summary-shaped request lists.
+
+Generates requests with realistic free-text lengths and compares the JSON
+size and decode time of the full records against the SUMMARY_FIELDS
+projection that list views now request.
+
+    python benchmarks/projection_payload.py --requests 2000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from request_shapes import description_preview, to_summary  # noqa: E402
+
+WORDS = "kettle hinge wobbly stitch fuse solder thread motor crack glue zip seam leak".split()
+
+
+def text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def make_request(rng, idx):
+    description = text(rng, rng.randint(40, 160))
+    return {
+        'id': f'req_{idx}',
+        'item': text(rng, 2),
+        'description': description,
+        'description_preview': description_preview(description),
+        'urgency': rng.choice(['Low', 'Medium', 'High']),
+        'location_notes': text(rng, rng.randint(5, 30)),
+        'skill_needed': rng.choice(['Electrical', 'Sewing/Textiles', 'Plumbing']),
+        'notes': text(rng, rng.randint(10, 80)),
+        'requester_id': f'user_{rng.randint(1, 500)}',
+        'requester_name': 'Sam Neighbor',
+        'requester_location': 'Riverside, Springfield',
+        'status': rng.choice(['open', 'assigned', 'resolved']),
+        'created_at': (datetime.now() - timedelta(hours=idx)).isoformat(),
+        'resolved_at': None,
+        'assigned_to_id': None,
+        'gratitude_note': text(rng, rng.randint(0, 60)),
+    }
+
+
+def measure(records, rounds=5):
+    payload = json.dumps(records)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        json.loads(payload)
+    return len(payload.encode()), (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    full = [make_request(rng, i) for i in range(args.requests)]
+    summary = [to_summary(r) for r in full]
+
+    full_bytes, full_time = measure(full)
+    summary_bytes, summary_time = measure(summary)
+    print(f"{args.requests} requests")
+    print(f"full:    {full_bytes / 1024:8.1f} KiB  decode {full_time * 1000:6.2f} ms")
+    print(f"summary: {summary_bytes / 1024:8.1f} KiB  decode {summary_time * 1000:6.2f} ms")
+    print(f"saved:   {1 - summary_bytes / full_bytes:.0%} of bytes, "
+          f"{1 - summary_time / full_time:.0%} of decode time")
+
+
+if __name__ == '__main__':
+    main()
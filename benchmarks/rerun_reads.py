@@ -0,0 +1,70 @@
+# benchmarks/rerun_reads.py
+"""Backend reads per page rerun, and how many the rerun memo saved.
+
+Runs each page once with Streamlit's AppTest against a generated mock
+database, signed in as a repairer with a claimed request. Then opens the
+detail page for the top Browse card in the same session, after Browse's
+prefetch, to show the round trip the entity store saves.
+
+    python benchmarks/rerun_reads.py --requests 2000
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ['USE_MOCK_DB'] = 'true'
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from firebase_service import FirebaseService  # noqa: E402
+from scripts.generate_mock_snapshot import build_demo_db  # noqa: E402
+
+PAGES = ['app.py', 'pages/2_🔍_Browse_Requests.py', 'pages/3_👷_Assign_Repairer.py',
+         'pages/4_✅_Resolve_&_Gratitude.py']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=50)
+    args = parser.parse_args()
+
+    firebase = FirebaseService.get_instance()
+    firebase.db = build_demo_db(args.requests, args.users)
+    assigned = next(r for r in firebase.db.requests if r.get('status') == 'assigned')
+    user = firebase.db.get_user(assigned['assigned_to_id'])
+
+    print(f"{'page':<36} {'reads':>6} {'saved':>6}")
+    for page in PAGES:
+        app = AppTest.from_file(str(ROOT / page), default_timeout=60)
+        app.session_state.current_user = user
+        app.session_state.firebase = firebase
+        app.session_state.selected_request = assigned['id']
+        app.run()
+        report = firebase.get_rerun_read_report()[-1]
+        print(f"{page:<36} {report['calls']:>6} {report['saved']:>6}")
+
+    browse = AppTest.from_file(str(ROOT / PAGES[1]), default_timeout=60)
+    browse.session_state.current_user = user
+    browse.session_state.firebase = firebase
+    browse.run()
+    store = browse.session_state.entity_store
+    store.wait()
+    top_card = next(iter(store._records))
+    for label, handed_off in (('details, cold', False), ('details after Browse', True)):
+        app = AppTest.from_file(str(ROOT / PAGES[2]), default_timeout=60)
+        app.session_state.current_user = user
+        app.session_state.firebase = firebase
+        app.session_state.selected_request = top_card
+        if handed_off:
+            app.session_state.entity_store = store
+        app.run()
+        report = firebase.get_rerun_read_report()[-1]
+        print(f"{label:<36} {report['calls']:>6} {report['saved']:>6}")
+
+
+if __name__ == '__main__':
+    main()
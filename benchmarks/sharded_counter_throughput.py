@@ -0,0 +1,63 @@
+# benchmarks/sharded_counter_throughput.py
+"""Write throughput of the stats counter for different shard counts.
+
+Each increment holds its shard for --write-ms to model Firestore's limit of
+roughly one sustained write per second per document (scaled down so the run
+is quick). Throughput should grow close to linearly with the shard count
+until the writer threads become the bottleneck.
+
+    python benchmarks/sharded_counter_throughput.py --shards 1 2 5 10 20
+"""
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sharded_counters import MockShardedCounter, status_deltas  # noqa: E402
+
+
+def run(num_shards, writers, duration, write_latency):
+    counter = MockShardedCounter(num_shards, write_latency=write_latency)
+    deltas = status_deltas('created', {}, {})
+    stop = time.perf_counter() + duration
+    done = [0] * writers
+
+    def writer(idx):
+        while time.perf_counter() < stop:
+            counter.increment(deltas)
+            done[idx] += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(done)
+    assert counter.read()['total'] == total, "lost increments"
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 5, 10, 20])
+    parser.add_argument('--writers', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=2.0, help='seconds per shard count')
+    parser.add_argument('--write-ms', type=float, default=5.0, help='simulated per-document write time')
+    args = parser.parse_args()
+
+    print(f"writers={args.writers} per-document write time={args.write_ms} ms")
+    baseline = None
+    for num_shards in args.shards:
+        rate = run(num_shards, args.writers, args.duration, args.write_ms / 1000)
+        baseline = baseline or rate
+        print(f"shards={num_shards:>3}: {rate:8,.0f} increments/sec  ({rate / baseline:4.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
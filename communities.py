@@ -0,0 +1,47 @@
+# communities.py
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+# One document per community, {'name': display name}, for admin fan-out
+COMMUNITIES_COLLECTION = 'communities'
+
+# Community of records whose location is blank
+UNASSIGNED = 'unassigned'
+
+
+def community_id(location: Optional[str]) -> str:
+    """Community slug for a "Neighborhood, City" location: the city part.
+
+    'Riverside, Springfield' and 'Old Town, springfield ' both give
+    'springfield'; a location without a comma is its own community.
+    """
+    city = (location or '').rsplit(',', 1)[-1]
+    return re.sub(r'[^a-z0-9]+', '-', city.lower()).strip('-') or UNASSIGNED
+
+
+def community_name(location: Optional[str]) -> str:
+    """Display name for the community of `location`"""
+    return (location or '').rsplit(',', 1)[-1].strip() or 'Unassigned'
+
+
+def community_of(record: Optional[Dict]) -> Optional[str]:
+    """Community of a user or request: its stored `community`, else derived
+    from its location (records written before partitioning, demo users)"""
+    if not record:
+        return None
+    if record.get('community'):
+        return record['community']
+    return community_id(record.get('requester_location') or record.get('location'))
+
+
+def status_counter_name(community: str) -> str:
+    """Name of a community's sharded stats counter"""
+    return f"request_status_{community}"
+
+
+def group_by_community(records: Iterable[Dict]) -> Dict[str, List[Dict]]:
+    groups = defaultdict(list)
+    for record in records:
+        groups[community_of(record)].append(record)
+    return groups
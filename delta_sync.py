@@ -0,0 +1,84 @@
+# delta_sync.py
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# Re-read this much history on every sync so a write committed with a
+# slightly older timestamp than one we've already seen is never missed
+SYNC_OVERLAP = timedelta(seconds=2)
+
+
+class RequestSyncCache:
+    """Client-side copy of the live requests, kept current from deltas.
+
+    The first `sync` loads every live request; after that only requests with
+    `updated_at` past the high-water mark are fetched and merged in by id,
+    and requests archived since then are dropped.
+    Keep one per session (e.g. in st.session_state) and call `sync` on each
+    rerun instead of `get_all_requests`.
+    """
+
+    def __init__(self, summary: bool = True, page_size: int = 500):
+        self.summary = summary
+        self.page_size = page_size
+        self.requests: Dict[str, Dict] = {}
+        self.loaded = False
+        self.high_water: Optional[datetime] = None
+        self.stats = {'full_loads': 0, 'delta_syncs': 0, 'rows_fetched': 0, 'rows_merged': 0,
+                      'rows_dropped': 0}
+
+    def sync(self, firebase) -> List[Dict]:
+        """Bring the cache up to date and return requests newest first"""
+        if not self.loaded:
+            rows = firebase.get_all_requests(summary=self.summary)
+            self.requests = {row['id']: row for row in rows}
+            self.loaded = True
+            self.stats['full_loads'] += 1
+            self.stats['rows_fetched'] += len(rows)
+            self._advance(rows)
+        else:
+            since = self.high_water - SYNC_OVERLAP if self.high_water else None
+            synced_since, after_id = since, None
+            while True:
+                rows = firebase.get_requests_changed_since(since, limit=self.page_size,
+                                                           summary=self.summary, after_id=after_id)
+                self.stats['rows_fetched'] += len(rows)
+                for row in rows:
+                    if self.requests.get(row['id']) != row:
+                        self.stats['rows_merged'] += 1
+                    self.requests[row['id']] = row
+                self._advance(rows)
+                if len(rows) < self.page_size:
+                    break
+                # Resume after the last row: (updated_at, id) is unique, so rows
+                # sharing a timestamp (one batch commit) split across pages
+                # without being skipped or fetched twice
+                since, after_id = rows[-1]['updated_at'], rows[-1]['id']
+            self._drop_archived(firebase, synced_since)
+            self.stats['delta_syncs'] += 1
+        return sorted(self.requests.values(),
+                      key=lambda r: r.get('created_at') or datetime.min, reverse=True)
+
+    def invalidate(self):
+        """Force a full reload on the next sync"""
+        self.loaded = False
+        self.high_water = None
+
+    def _drop_archived(self, firebase, since: Optional[datetime]):
+        """Forget requests archived since `since`; they've left the live
+        collection, so no delta will ever mention them again"""
+        if since is None:
+            return  # nothing cached has a timestamp yet
+        archived = firebase.get_archived_request_ids_since(since)
+        if archived is None:
+            # Couldn't tell what was archived: reload rather than keep phantoms
+            self.invalidate()
+            return
+        for request_id in archived:
+            if self.requests.pop(request_id, None) is not None:
+                self.stats['rows_dropped'] += 1
+    
+    def _advance(self, rows: List[Dict]):
+        stamps = [row['updated_at'] for row in rows if isinstance(row.get('updated_at'), datetime)]
+        if stamps:
+            newest = max(stamps)
+            self.high_water = newest if self.high_water is None else max(self.high_water, newest)
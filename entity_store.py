@@ -0,0 +1,147 @@
+# entity_store.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional
+
+# Seconds a stored full record may be served without a list view having
+# confirmed its version since
+ENTITY_STORE_MAX_AGE = float(os.environ.get('ENTITY_STORE_MAX_AGE', '60'))
+ENTITY_STORE_SIZE = int(os.environ.get('ENTITY_STORE_SIZE', '200'))
+# Visible Browse cards whose detail is fetched ahead of a click
+PREFETCH_DETAILS = int(os.environ.get('PREFETCH_DETAILS', '5'))
+
+_prefetcher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='detail-prefetch')
+
+
+class EntityStore:
+    """Full request records a session already has, keyed by id.
+
+    Keep one per session (st.session_state.entity_store). List views report
+    the `updated_at` of every summary they show (`observe`). A stored full
+    record is served only while its `updated_at` is at least the newest one
+    observed, and for at most `max_age` seconds, so a detail page can skip
+    its round trip without showing a request older than the list it came
+    from.
+    """
+
+    def __init__(self, max_age: float = ENTITY_STORE_MAX_AGE, max_entries: int = ENTITY_STORE_SIZE,
+                 clock=time.monotonic):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.clock = clock
+        self._records = OrderedDict()  # id -> (record, updated_at, stored_at)
+        self._versions = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'prefetched': 0}
+
+    def observe(self, summaries: Iterable[Dict]):
+        """Note the current version of requests a list view just fetched"""
+        with self._lock:
+            for summary in summaries:
+                version = summary.get('updated_at')
+                if version is None or not summary.get('id'):
+                    continue
+                known = self._versions.get(summary['id'])
+                if known is None or _newer(version, known):
+                    self._versions[summary['id']] = version
+            while len(self._versions) > 20 * self.max_entries:
+                self._versions.pop(next(iter(self._versions)))
+
+    def put(self, records: Iterable[Dict]):
+        """Store full records (with every field, not summaries)"""
+        now = self.clock()
+        with self._lock:
+            for record in records:
+                if not record or not record.get('id'):
+                    continue
+                self._records[record['id']] = (dict(record), record.get('updated_at'), now)
+                self._records.move_to_end(record['id'])
+                known = self._versions.get(record['id'])
+                if record.get('updated_at') is not None and (known is None or _newer(record['updated_at'], known)):
+                    self._versions[record['id']] = record['updated_at']
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+
+    def get(self, request_id: str) -> Optional[Dict]:
+        """A copy of the stored record if it is still current, else None"""
+        with self._lock:
+            entry = self._records.get(request_id)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            record, version, stored_at = entry
+            known = self._versions.get(request_id)
+            if (self.clock() - stored_at > self.max_age
+                    or (known is not None and (version is None or _newer(known, version)))):
+                del self._records[request_id]
+                self.stats['stale'] += 1
+                return None
+            self.stats['hits'] += 1
+            return dict(record)
+
+    def invalidate(self, request_id: str):
+        """Forget a record this session just changed"""
+        with self._lock:
+            self._records.pop(request_id, None)
+
+    def load_request(self, firebase, request_id: str) -> Optional[Dict]:
+        """The stored record, or get_repair_request (and store the result)"""
+        record = self.get(request_id)
+        if record is None:
+            record = firebase.get_repair_request(request_id)
+            if record:
+                self.put([{**record, 'id': request_id}])
+        return record
+
+    def prefetch(self, firebase, request_ids: List[str]):
+        """Fetch detail for requests not already stored, in the background"""
+        with self._lock:
+            wanted = [rid for rid in request_ids if rid not in self._inflight and not self._is_current(rid)]
+            if not wanted:
+                return
+            future = _prefetcher.submit(self._prefetch, firebase, wanted)
+            for rid in wanted:
+                self._inflight[rid] = future
+
+    def _prefetch(self, firebase, request_ids: List[str]):
+        try:
+            records = firebase.get_repair_requests(request_ids)
+            self.put(records)
+            with self._lock:
+                self.stats['prefetched'] += len(records)
+        finally:
+            with self._lock:
+                for rid in request_ids:
+                    self._inflight.pop(rid, None)
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until in-flight prefetches finish (for tests and benchmarks)"""
+        with self._lock:
+            futures = set(self._inflight.values())
+        wait(futures, timeout=timeout)
+
+    def _is_current(self, request_id: str) -> bool:
+        entry = self._records.get(request_id)
+        if entry is None or self.clock() - entry[2] > self.max_age:
+            return False
+        known = self._versions.get(request_id)
+        return known is None or (entry[1] is not None and not _newer(known, entry[1]))
+
+
+def _newer(a, b) -> bool:
+    try:
+        return a > b
+    except TypeError:
+        # A naive and an aware timestamp (mock vs Firestore); treat as changed
+        return True
+
+
+def entity_store(session_state) -> EntityStore:
+    """The session's store, created on first use"""
+    if 'entity_store' not in session_state:
+        session_state.entity_store = EntityStore()
+    return session_state.entity_store
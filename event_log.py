@@ -0,0 +1,182 @@
+# event_log.py
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from communities import community_of
+
+EVENTS_COLLECTION = 'events'
+# One document per community stream, {'last': sequence number of its newest event}
+EVENT_SEQUENCES_COLLECTION = 'event_sequences'
+# Pending events numbered per sequencer transaction, plus one head write
+EVENT_SEQUENCE_BATCH = 400
+# Fields that order pending Firestore events until they're numbered
+SEQUENCING_FIELDS = ('recorded_at', 'ordinal')
+# One document per subscriber, {'positions': {community: last processed sequence number}}
+EVENT_CHECKPOINTS_COLLECTION = 'event_checkpoints'
+
+# Events the mock database keeps per community; older ones are dropped
+MOCK_EVENT_LOG_SIZE = int(os.environ.get('MOCK_EVENT_LOG_SIZE', '50000'))
+# How long a tailing subscriber sleeps when it has caught up
+EVENT_POLL_SECONDS = float(os.environ.get('EVENT_POLL_SECONDS', '1.0'))
+
+# Event type of each request transition
+EVENT_TYPES = {
+    'created': 'RequestCreated',
+    'assigned': 'RepairerAssigned',
+    'resolved': 'RequestResolved',
+    'gratitude': 'GratitudeAdded',
+    'released': 'AssignmentReleased',
+    'expired': 'RequestExpired',
+}
+USER_CREATED = 'UserCreated'
+
+# What a RequestCreated event carries; the rest is a get_repair_request away
+CREATED_FIELDS = ('item', 'skill_needed', 'urgency', 'requester_id', 'status', 'priority_score')
+USER_FIELDS = ('name', 'location', 'skills')
+# Bookkeeping fields that never go into an event
+SKIPPED_FIELDS = {'id', 'updated_at', 'feed_user_ids', 'description_preview', 'priority_score'}
+
+
+def request_event(transition: str, before: Dict, after: Dict,
+                  at: Optional[datetime] = None) -> Dict:
+    """The event for one request transition; `seq` is filled in when it's numbered.
+
+    RequestCreated carries CREATED_FIELDS. Other events carry the fields the
+    transition changed.
+    """
+    if transition == 'created':
+        data = {field: after.get(field) for field in CREATED_FIELDS}
+    else:
+        data = {field: value for field, value in after.items()
+                if field not in SKIPPED_FIELDS and before.get(field) != value}
+    return {'type': EVENT_TYPES[transition], 'entity_id': after['id'], 'community': community_of(after),
+            'at': at or datetime.now(), 'data': data}
+
+
+def user_event(user: Dict, at: Optional[datetime] = None) -> Dict:
+    return {'type': USER_CREATED, 'entity_id': user['id'], 'community': community_of(user),
+            'at': at or datetime.now(), 'data': {field: user.get(field) for field in USER_FIELDS}}
+
+
+def history_events(requests: Iterable[Dict], users: Iterable[Dict]) -> List[Dict]:
+    """Events reconstructed from current records, oldest first.
+
+    Each request yields RequestCreated, then RepairerAssigned and
+    RequestResolved (or RequestExpired) as far as it got, stamped with the
+    record's own timestamps. Releases and gratitude added later aren't
+    recoverable and are left out.
+    """
+    events = []
+    for user in users:
+        if isinstance(user.get('created_at'), datetime):
+            events.append(user_event(user, user['created_at']))
+    for req in requests:
+        if not isinstance(req.get('created_at'), datetime):
+            continue
+        created = {**req, 'status': 'open', 'assigned_to_id': None}
+        events.append(request_event('created', {}, created, req['created_at']))
+        if req.get('assigned_to_id') and isinstance(req.get('assigned_at'), datetime):
+            assigned = {**created, 'status': 'assigned', 'assigned_to_id': req['assigned_to_id'],
+                        'assigned_at': req['assigned_at']}
+            events.append(request_event('assigned', created, assigned, req['assigned_at']))
+            if req.get('status') == 'resolved' and isinstance(req.get('resolved_at'), datetime):
+                resolved = {**assigned, 'status': 'resolved', 'resolved_at': req['resolved_at'],
+                            'gratitude_note': req.get('gratitude_note', '')}
+                events.append(request_event('resolved', assigned, resolved, req['resolved_at']))
+        elif req.get('status') == 'expired':
+            expired = {**created, 'status': 'expired'}
+            events.append(request_event('expired', created, expired, req.get('updated_at') or req['created_at']))
+    events.sort(key=lambda event: event['at'])
+    return events
+
+
+class EventSubscription:
+    """A named reader of the event log that resumes where it left off.
+
+    Each community is its own stream with its own sequence numbers, and the
+    subscription keeps its position in each. `poll()` returns the next
+    events (up to `batch_size` per stream) without moving; `commit(events)`
+    moves past them and saves the positions under `name` in the
+    `event_checkpoints` collection, so a restarted consumer continues after
+    the last committed event. `run_once` and `tail` call the handler before
+    committing, so delivery is at-least-once.
+
+    A new subscriber starts at the beginning of the log, or with
+    `start='latest'` only sees events appended after it first polls.
+    """
+
+    def __init__(self, firebase, name: str, communities: Optional[List[str]] = None,
+                 batch_size: int = 500, start: str = 'earliest'):
+        self.firebase = firebase
+        self.name = name
+        self.communities = communities
+        self.batch_size = batch_size
+        self.start = start
+        self.positions: Optional[Dict[str, int]] = None
+        # 'missed' counts events dropped from a stream (mock retention) before
+        # this subscriber read them
+        self.stats = {'events': 0, 'batches': 0, 'missed': 0, 'errors': 0}
+
+    def _load(self, heads: Dict[str, int]):
+        saved = self.firebase.get_event_checkpoint(self.name)
+        if saved is not None:
+            self.positions = dict(saved)
+        elif self.start == 'latest':
+            self.positions = dict(heads)
+        else:
+            self.positions = {}
+
+    def lag(self) -> Dict[str, int]:
+        """Events appended but not yet committed, per stream"""
+        heads = self.firebase.get_event_heads()
+        if self.positions is None:
+            self._load(heads)
+        return {community: head - self.positions.get(community, 0) for community, head in heads.items()
+                if self.communities is None or community in self.communities}
+
+    def poll(self) -> List[Dict]:
+        heads = self.firebase.get_event_heads()
+        if self.positions is None:
+            self._load(heads)
+        events = []
+        for community, head in sorted(heads.items()):
+            if self.communities is not None and community not in self.communities:
+                continue
+            position = self.positions.get(community, 0)
+            if head > position:
+                events.extend(self.firebase.read_events(community, position, self.batch_size))
+        return events
+
+    def commit(self, events: List[Dict]):
+        """Move past `events` and save the positions"""
+        for event in events:
+            position = self.positions.get(event['community'], 0)
+            if event['seq'] > position + 1:
+                self.stats['missed'] += event['seq'] - position - 1
+            self.positions[event['community']] = max(position, event['seq'])
+        self.stats['events'] += len(events)
+        self.stats['batches'] += 1
+        self.firebase.save_event_checkpoint(self.name, self.positions)
+
+    def run_once(self, handler: Callable[[List[Dict]], None]) -> int:
+        """Hand the next events to `handler`, then commit them; returns how many"""
+        events = self.poll()
+        if events:
+            handler(events)
+            self.commit(events)
+        return len(events)
+
+    def tail(self, handler: Callable[[List[Dict]], None], poll_interval: float = EVENT_POLL_SECONDS,
+             stop: Optional[threading.Event] = None):
+        """Keep calling `run_once`, sleeping `poll_interval` whenever caught up
+        or after an error, until `stop` is set. Uncommitted events are retried."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                if self.run_once(handler):
+                    continue
+            except Exception:
+                self.stats['errors'] += 1
+            stop.wait(poll_interval)
@@ -0,0 +1,614 @@
+# fake_firestore.py
+import random
+import string
+import threading
+import time
+from datetime import datetime, timezone
+from functools import cmp_to_key
+from typing import Dict, List, Optional
+
+from google.api_core.exceptions import Aborted, AlreadyExists, DeadlineExceeded, InvalidArgument, NotFound
+from google.cloud.firestore_v1.base_query import FieldFilter
+from google.cloud.firestore_v1.transforms import (ArrayRemove, ArrayUnion, DELETE_FIELD, Increment,
+                                                  Maximum, Minimum, SERVER_TIMESTAMP)
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+
+# Firestore's limit on writes in one batch or transaction
+MAX_WRITES_PER_COMMIT = 500
+MAX_ATTEMPTS = 5
+
+INEQUALITY_OPS = ('<', '<=', '>', '>=', '!=', 'not-in')
+# Field path that orders and cursors by document id
+DOCUMENT_ID = '__name__'
+
+_MISSING = object()
+
+
+# Values -------------------------------------------------------------------
+
+def _store_value(value):
+    """Copy a written value the way Firestore stores it (naive datetimes are UTC)"""
+    if isinstance(value, dict):
+        return {k: _store_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_store_value(v) for v in value]
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _copy(value):
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+
+def _rank(value) -> int:
+    """Position of a value's type in Firestore's cross-type ordering"""
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, list):
+        return 8
+    return 9
+
+
+def _sort_key(value):
+    rank = _rank(value)
+    if rank == 3 and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    elif rank == 8:
+        value = tuple(_sort_key(v) for v in value)
+    elif rank == 9:
+        value = tuple(sorted((k, _sort_key(v)) for k, v in value.items()))
+    return rank, value
+
+
+def _compare(a, b) -> int:
+    ka, kb = _sort_key(a), _sort_key(b)
+    return (ka > kb) - (ka < kb)
+
+
+def _get_path(data: Dict, path: str):
+    value = data
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _order_value(doc_id: str, data: Dict, field: str):
+    """A document's value for an order_by field ('__name__' is its id)"""
+    return doc_id if field == DOCUMENT_ID else _get_path(data, field)
+
+
+def _set_path(data: Dict, path: str, value):
+    parts = path.split('.')
+    target = data
+    for part in parts[:-1]:
+        if not isinstance(target.get(part), dict):
+            target[part] = {}
+        target = target[part]
+    if value is DELETE_FIELD:
+        target.pop(parts[-1], None)
+    else:
+        target[parts[-1]] = value
+
+
+def _resolve(value, existing, now: datetime):
+    """Apply a write value, sentinel or transform on top of what's stored"""
+    if value is SERVER_TIMESTAMP:
+        return now
+    numeric = isinstance(existing, (int, float)) and not isinstance(existing, bool)
+    if isinstance(value, Increment):
+        return existing + value.value if numeric else value.value
+    if isinstance(value, Maximum):
+        return max(existing, value.value) if numeric else value.value
+    if isinstance(value, Minimum):
+        return min(existing, value.value) if numeric else value.value
+    if isinstance(value, ArrayUnion):
+        current = list(existing) if isinstance(existing, list) else []
+        return current + [_store_value(v) for v in value.values if _store_value(v) not in current]
+    if isinstance(value, ArrayRemove):
+        removed = [_store_value(v) for v in value.values]
+        return [v for v in existing if v not in removed] if isinstance(existing, list) else []
+    if isinstance(value, dict):
+        return {k: _resolve(v, _MISSING, now) for k, v in value.items() if v is not DELETE_FIELD}
+    return _store_value(value)
+
+
+def _merge(existing: Dict, data: Dict, now: datetime) -> Dict:
+    merged = dict(existing)
+    for key, value in data.items():
+        current = merged.get(key, _MISSING)
+        if value is DELETE_FIELD:
+            merged.pop(key, None)
+        elif isinstance(value, dict):
+            merged[key] = _merge(current if isinstance(current, dict) else {}, value, now)
+        else:
+            merged[key] = _resolve(value, current, now)
+    return merged
+
+
+def _matches(data: Dict, field: str, op: str, value) -> bool:
+    actual = _get_path(data, field)
+    if actual is _MISSING:
+        return False
+    if op == '==':
+        return _compare(actual, value) == 0
+    if op == 'in':
+        return any(_compare(actual, v) == 0 for v in value)
+    if op == 'array_contains':
+        return isinstance(actual, list) and any(_compare(a, value) == 0 for a in actual)
+    if op == 'array_contains_any':
+        return isinstance(actual, list) and any(_compare(a, v) == 0 for a in actual for v in value)
+    if op == '!=':
+        return actual is not None and _compare(actual, value) != 0
+    if op == 'not-in':
+        return actual is not None and all(_compare(actual, v) != 0 for v in value)
+    # Range filters only match values of the same type
+    if _rank(actual) != _rank(value):
+        return False
+    cmp = _compare(actual, value)
+    return {'<': cmp < 0, '<=': cmp <= 0, '>': cmp > 0, '>=': cmp >= 0}[op]
+
+
+def _auto_id() -> str:
+    return ''.join(random.choices(string.ascii_letters + string.digits, k=20))
+
+
+# Stored documents and snapshots ---------------------------------------------
+
+class _Stored:
+    """One stored document. Never mutated: a write replaces it, so snapshots
+    can keep a reference instead of copying."""
+
+    __slots__ = ('data', 'version', 'create_time', 'update_time')
+
+    def __init__(self, data, version, create_time, update_time):
+        self.data = data
+        self.version = version
+        self.create_time = create_time
+        self.update_time = update_time
+
+
+class DocumentSnapshot:
+    def __init__(self, reference, stored: Optional[_Stored], fields=None, read_time=None):
+        self.reference = reference
+        self.exists = stored is not None
+        self.create_time = stored.create_time if stored else None
+        self.update_time = stored.update_time if stored else None
+        self.read_time = read_time
+        data = stored.data if stored else None
+        if data is not None and fields is not None:
+            projected = {}
+            for path in fields:
+                value = _get_path(data, path)
+                if value is not _MISSING:
+                    _set_path(projected, path, value)
+            data = projected
+        self._data = data
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    def to_dict(self) -> Optional[Dict]:
+        return _copy(self._data) if self.exists else None
+
+    def get(self, field_path: str):
+        value = _get_path(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return _copy(value)
+
+
+# References and queries -----------------------------------------------------
+
+class Query:
+    def __init__(self, client, path: str, filters=(), orders=(), limit=None,
+                 cursor=None, projection=None):
+        self._client = client
+        self._path = path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._cursor = cursor
+        self._projection = projection
+
+    def _copy_with(self, **changes):
+        args = {'filters': self._filters, 'orders': self._orders, 'limit': self._limit,
+                'cursor': self._cursor, 'projection': self._projection}
+        args.update(changes)
+        return Query(self._client, self._path, **args)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if isinstance(filter, FieldFilter):
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        if op_string not in ('==', 'in', 'array_contains', 'array_contains_any') + INEQUALITY_OPS:
+            raise ValueError(f"Unsupported operator {op_string!r}")
+        return self._copy_with(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING):
+        return self._copy_with(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int):
+        return self._copy_with(limit=count)
+
+    def start_after(self, document_fields):
+        return self._copy_with(cursor=document_fields)
+
+    def select(self, field_paths):
+        return self._copy_with(projection=list(field_paths))
+
+    def _effective_orders(self):
+        orders = list(self._orders)
+        # Firestore orders by the inequality field first when not told otherwise
+        inequality = [f for f, op, _ in self._filters if op in INEQUALITY_OPS]
+        if inequality and not orders:
+            orders.append((inequality[0], ASCENDING))
+        return orders
+
+    def _run(self, transaction=None, timeout=None) -> List[DocumentSnapshot]:
+        client = self._client
+        if transaction is not None and transaction._writes:
+            raise ValueError("Attempted read after write in a transaction.")
+        client._rpc(timeout)
+        orders = self._effective_orders()
+        with client._lock:
+            collection = client._collections.get(self._path, {})
+            rows = []
+            for doc_id, stored in collection.items():
+                if all(_matches(stored.data, f, op, v) for f, op, v in self._filters) and \
+                        all(_order_value(doc_id, stored.data, f) is not _MISSING for f, _ in orders):
+                    rows.append((doc_id, stored))
+
+        def compare(a, b):
+            for field, direction in orders:
+                cmp = _compare(_order_value(a[0], a[1].data, field), _order_value(b[0], b[1].data, field))
+                if cmp:
+                    return -cmp if direction == DESCENDING else cmp
+            cmp = (a[0] > b[0]) - (a[0] < b[0])
+            return -cmp if orders and orders[-1][1] == DESCENDING else cmp
+
+        rows.sort(key=cmp_to_key(compare))
+        if self._cursor is not None:
+            rows = [row for row in rows if self._after_cursor(row, orders)]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        read_time = datetime.now(timezone.utc)
+        snapshots = [DocumentSnapshot(DocumentReference(client, self._path, doc_id), stored,
+                                      self._projection, read_time)
+                     for doc_id, stored in rows]
+        if transaction is not None:
+            transaction._record_reads((snapshot.reference.path, stored.version)
+                                      for snapshot, (_, stored) in zip(snapshots, rows))
+        return snapshots
+
+    def _after_cursor(self, row, orders) -> bool:
+        cursor = self._cursor
+        if isinstance(cursor, DocumentSnapshot):
+            values, cursor_id = cursor._data or {}, cursor.id
+        else:
+            values, cursor_id = cursor, None
+        for field, direction in orders:
+            cursor_value = values.get(field, _MISSING) if field == DOCUMENT_ID else _get_path(values, field)
+            if cursor_value is _MISSING:
+                break
+            cmp = _compare(_order_value(row[0], row[1].data, field), cursor_value)
+            if cmp:
+                return (cmp > 0) != (direction == DESCENDING)
+        return cursor_id is not None and row[0] > cursor_id
+
+    def stream(self, transaction=None, timeout=None, retry=None):
+        yield from self._run(transaction, timeout)
+
+    def get(self, transaction=None, timeout=None, retry=None) -> List[DocumentSnapshot]:
+        return self._run(transaction, timeout)
+
+
+class CollectionReference(Query):
+    def __init__(self, client, path: str):
+        super().__init__(client, path)
+
+    @property
+    def id(self) -> str:
+        return self._path.rsplit('/', 1)[-1]
+
+    @property
+    def parent(self):
+        """The document holding this subcollection (None for a top-level collection)"""
+        if '/' not in self._path:
+            return None
+        return self._client.document(self._path.rsplit('/', 1)[0])
+
+    def document(self, document_id: Optional[str] = None):
+        return DocumentReference(self._client, self._path, document_id or _auto_id())
+
+    def add(self, document_data: Dict, document_id: Optional[str] = None):
+        ref = self.document(document_id)
+        ref.create(document_data)
+        return datetime.now(timezone.utc), ref
+
+    def list_documents(self):
+        """Documents in the collection, including missing ones that only
+        hold subcollections (like the real client's show_missing)"""
+        prefix = self._path + '/'
+        with self._client._lock:
+            ids = list(self._client._collections.get(self._path, {}))
+            for path, docs in self._client._collections.items():
+                if path.startswith(prefix) and docs:
+                    doc_id = path[len(prefix):].split('/', 1)[0]
+                    if doc_id not in ids:
+                        ids.append(doc_id)
+        return [DocumentReference(self._client, self._path, doc_id) for doc_id in ids]
+
+
+class DocumentReference:
+    def __init__(self, client, collection_path: str, document_id: str):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = document_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection_path}/{self.id}"
+
+    @property
+    def parent(self) -> CollectionReference:
+        return CollectionReference(self._client, self._collection_path)
+
+    def collection(self, collection_id: str) -> CollectionReference:
+        return CollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    def __eq__(self, other):
+        return isinstance(other, DocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def get(self, field_paths=None, transaction=None, timeout=None, retry=None) -> DocumentSnapshot:
+        return self._client._get_documents([self], field_paths, transaction, timeout)[0]
+
+    def set(self, document_data: Dict, merge: bool = False):
+        return self._client._commit_now([('set', self, document_data, merge)])
+
+    def create(self, document_data: Dict):
+        return self._client._commit_now([('create', self, document_data, False)])
+
+    def update(self, field_updates: Dict):
+        return self._client._commit_now([('update', self, field_updates, False)])
+
+    def delete(self):
+        return self._client._commit_now([('delete', self, None, False)])
+
+
+# Writes ---------------------------------------------------------------------
+
+class WriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def __len__(self):
+        return len(self._writes)
+
+    def _add(self, op, reference, data=None, merge=False):
+        self._writes.append((op, reference, data, merge))
+
+    def set(self, reference, document_data: Dict, merge: bool = False):
+        self._add('set', reference, document_data, merge)
+
+    def create(self, reference, document_data: Dict):
+        self._add('create', reference, document_data)
+
+    def update(self, reference, field_updates: Dict):
+        self._add('update', reference, field_updates)
+
+    def delete(self, reference):
+        self._add('delete', reference)
+
+    def commit(self, timeout=None, retry=None):
+        writes, self._writes = self._writes, []
+        return self._client._commit(writes, timeout=timeout)
+
+
+class Transaction(WriteBatch):
+    """Optimistic transaction that works with the real `firestore.transactional`.
+
+    Reads record the version of each document; the commit aborts if any of
+    them changed since, and the decorator retries the function.
+    """
+
+    def __init__(self, client, max_attempts: int = MAX_ATTEMPTS, read_only: bool = False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+        self._reads = {}
+
+    @property
+    def in_progress(self) -> bool:
+        return self._id is not None
+
+    def _add(self, op, reference, data=None, merge=False):
+        if self._read_only:
+            raise ValueError("Cannot perform write operation in read-only transaction.")
+        super()._add(op, reference, data, merge)
+
+    def _record_reads(self, versions):
+        """Remember the version of each document read (0 if it didn't exist)"""
+        for path, version in versions:
+            self._reads.setdefault(path, version)
+
+    def _clean_up(self):
+        self._writes = []
+        self._reads = {}
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        if self.in_progress:
+            raise ValueError("Transaction already begun.")
+        self._client._rpc()
+        self._id = _auto_id().encode()
+
+    def _rollback(self):
+        if not self.in_progress:
+            raise ValueError("Transaction not in progress; cannot be rolled back.")
+        self._client._rpc()
+        self._clean_up()
+
+    def _commit(self):
+        if not self.in_progress:
+            raise ValueError("Transaction not in progress; cannot be committed.")
+        # Like the real client, only a successful commit ends the transaction:
+        # after an abort it is still in progress, so `transactional` can retry
+        # it or, once out of attempts, roll it back
+        results = self._client._commit(self._writes, reads=self._reads)
+        self._clean_up()
+        return results
+
+    def get(self, ref_or_query, timeout=None):
+        if isinstance(ref_or_query, DocumentReference):
+            return iter([ref_or_query.get(transaction=self, timeout=timeout)])
+        return ref_or_query.stream(transaction=self, timeout=timeout)
+
+    def get_all(self, references, timeout=None):
+        return self._client.get_all(references, transaction=self, timeout=timeout)
+
+
+# Client ---------------------------------------------------------------------
+
+class FakeFirestoreClient:
+    """In-process stand-in for a `google.cloud.firestore.Client`.
+
+    Covers the part of the client API that FirebaseService uses: collections,
+    subcollections, documents, where/order_by/limit/start_after/select
+    queries, batches and transactions (driven by the real
+    `firestore.transactional` decorator), with Increment, SERVER_TIMESTAMP and
+    the other transforms. Naive datetimes are stored as UTC and read back
+    timezone-aware, as with the real service.
+
+    Every RPC sleeps `latency` seconds (plus up to `jitter`), and one that
+    would outlast its `timeout` raises DeadlineExceeded, so the Firestore code
+    path can be profiled and benchmarked without a project. `rpc_count` and
+    `aborts` (transaction commits aborted by a conflicting write) are kept
+    for benchmarks.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._collections: Dict[str, Dict[str, _Stored]] = {}
+        self._version = 0
+        self.rpc_count = 0
+        self.aborts = 0
+
+    def _rpc(self, timeout: Optional[float] = None):
+        with self._lock:
+            self.rpc_count += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise DeadlineExceeded(f"Simulated RPC latency {delay:.3f}s exceeded {timeout}s deadline")
+        if delay:
+            time.sleep(delay)
+
+    def collection(self, collection_path: str) -> CollectionReference:
+        return CollectionReference(self, collection_path)
+
+    def document(self, document_path: str) -> DocumentReference:
+        collection_path, document_id = document_path.rsplit('/', 1)
+        return DocumentReference(self, collection_path, document_id)
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def transaction(self, max_attempts: int = MAX_ATTEMPTS, read_only: bool = False) -> Transaction:
+        return Transaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    def get_all(self, references, field_paths=None, transaction=None, timeout=None, retry=None):
+        return iter(self._get_documents(list(references), field_paths, transaction, timeout))
+
+    def _get_documents(self, references, field_paths, transaction, timeout) -> List[DocumentSnapshot]:
+        if transaction is not None and transaction._writes:
+            raise ValueError("Attempted read after write in a transaction.")
+        self._rpc(timeout)
+        read_time = datetime.now(timezone.utc)
+        with self._lock:
+            stored = [self._collections.get(ref._collection_path, {}).get(ref.id) for ref in references]
+        snapshots = [DocumentSnapshot(ref, doc, field_paths, read_time)
+                     for ref, doc in zip(references, stored)]
+        if transaction is not None:
+            transaction._record_reads((ref.path, doc.version if doc else 0)
+                                      for ref, doc in zip(references, stored))
+        return snapshots
+
+    def _commit_now(self, writes):
+        return self._commit(writes)[0]
+
+    def _commit(self, writes, reads=None, timeout=None):
+        if len(writes) > MAX_WRITES_PER_COMMIT:
+            raise InvalidArgument(f"maximum {MAX_WRITES_PER_COMMIT} writes allowed per request")
+        self._rpc(timeout)
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            for path, version in (reads or {}).items():
+                collection_path, doc_id = path.rsplit('/', 1)
+                current = self._collections.get(collection_path, {}).get(doc_id)
+                if (current.version if current else 0) != version:
+                    self.aborts += 1
+                    raise Aborted("Transaction lock timeout; a document read in it was modified")
+
+            # Work on a copy of the touched documents so a failed precondition
+            # leaves the store untouched
+            pending = {}
+            for op, ref, data, merge in writes:
+                key = (ref._collection_path, ref.id)
+                if key not in pending:
+                    existing = self._collections.get(key[0], {}).get(key[1])
+                    pending[key] = existing.data if existing else None
+                current = pending[key]
+                if op == 'create' and current is not None:
+                    raise AlreadyExists(f"Document already exists: {ref.path}")
+                if op == 'update' and current is None:
+                    raise NotFound(f"No document to update: {ref.path}")
+                if op == 'delete':
+                    pending[key] = None
+                elif op == 'update':
+                    updated = _copy(current)
+                    for path, value in data.items():
+                        _set_path(updated, path, DELETE_FIELD if value is DELETE_FIELD
+                                  else _resolve(value, _get_path(current, path), now))
+                    pending[key] = updated
+                elif merge:
+                    pending[key] = _merge(current or {}, data, now)
+                else:
+                    pending[key] = _resolve(dict(data), _MISSING, now)
+
+            for (collection_path, doc_id), data in pending.items():
+                collection = self._collections.setdefault(collection_path, {})
+                if data is None:
+                    collection.pop(doc_id, None)
+                    continue
+                self._version += 1
+                existing = collection.get(doc_id)
+                collection[doc_id] = _Stored(data, self._version,
+                                             existing.create_time if existing else now, now)
+        return [now for _ in writes]
@@ -0,0 +1,205 @@
+# feeds.py
+import heapq
+import os
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from rollups import ESTIMATED_KG_BY_SKILL, naive
+
+FEEDS_COLLECTION = 'user_feeds'
+
+# Entries kept per feed, and most repairers one new request is fanned out to
+FEED_SIZE = int(os.environ.get('FEED_SIZE', '50'))
+FEED_MAX_FANOUT = int(os.environ.get('FEED_MAX_FANOUT', '200'))
+
+URGENCY_WEIGHT = {'High': 3, 'Medium': 2, 'Low': 1}
+
+# Scores are in hours waited: each urgency step is worth three days, so a
+# Medium request has to have waited three days longer than a High one to
+# rank above it. In feeds a full skill match adds half a day on top. Being
+# linear in created_at, scores never need recomputing as requests age.
+URGENCY_HOURS = 72.0
+MATCH_HOURS = 12.0
+# Exact skill in the same neighborhood
+MAX_STRENGTH = 1.5
+
+# Summary fields copied into each feed entry so the dashboard needs one read
+ENTRY_FIELDS = ('item', 'urgency', 'skill_needed', 'requester_name', 'requester_location',
+                'description_preview', 'created_at')
+
+
+def request_skill_tag(request: Dict) -> str:
+    """The skill_tags value that finds candidate repairers for a request"""
+    return (request.get('skill_needed') or '').strip().lower()
+
+
+def _skill_matches(skill: str, needed: str) -> bool:
+    """Same loose rule as the detail page: either contains the other"""
+    return bool(skill) and bool(needed) and (skill in needed or needed in skill)
+
+
+def skill_tags(skills: Iterable[str]) -> List[str]:
+    """Lower-cased skills plus the request categories they match, for array_contains queries"""
+    skills = [s.strip().lower() for s in skills or [] if s and s.strip()]
+    tags = set(skills)
+    for category in ESTIMATED_KG_BY_SKILL:
+        if any(_skill_matches(skill, category.lower()) for skill in skills):
+            tags.add(category.lower())
+    return sorted(tags)
+
+
+@lru_cache(maxsize=1024)
+def _place(location: Optional[str]) -> tuple:
+    return tuple(p.strip().lower() for p in (location or '').split(','))
+
+
+def _strength(skills: List[str], user_place: tuple, request: Dict) -> float:
+    needed = request_skill_tag(request)
+    if needed in skills:
+        strength = 1.0
+    elif any(_skill_matches(skill, needed) for skill in skills):
+        strength = 0.6
+    else:
+        return 0.0
+    request_place = _place(request.get('requester_location'))
+    if user_place == request_place and user_place != ('',):
+        strength += 0.5
+    elif len(user_place) > 1 and user_place[-1] == request_place[-1]:
+        strength += 0.25
+    return strength
+
+
+def match_strength(user: Dict, request: Dict) -> float:
+    """0 if the user can't fix it; otherwise skill fit plus a boost for being nearby"""
+    skills = [s.strip().lower() for s in user.get('skills') or [] if s]
+    return _strength(skills, _place(user.get('location')), request)
+
+
+def priority_score(request: Dict) -> float:
+    """Higher is more pressing: urgency plus hours waited so far.
+
+    Stored as urgency minus `created_at` in hours; the missing "+ now" is the
+    same for every request, so the score sorts correctly forever and never
+    needs recomputing. Both the priority queue and feeds rank by it.
+    """
+    created_at = request.get('created_at')
+    hours = (naive(created_at) - datetime(1970, 1, 1)).total_seconds() / 3600 \
+        if isinstance(created_at, datetime) else 0.0
+    return round(URGENCY_WEIGHT.get(request.get('urgency'), 1) * URGENCY_HOURS - hours, 4)
+
+
+def feed_score(request: Dict, match: float) -> float:
+    return round(priority_score(request) + match * MATCH_HOURS, 4)
+
+
+def feed_entry(request: Dict, match: float) -> Dict:
+    entry = {field: request.get(field) for field in ENTRY_FIELDS}
+    entry.update({'match': match, 'score': feed_score(request, match)})
+    return entry
+
+
+def fan_out(request_id: str, request: Dict, users: Iterable[Dict],
+            feeds: Dict[str, Dict[str, Dict]], size: int = FEED_SIZE) -> Dict[str, Dict[str, Optional[Dict]]]:
+    """Add a new open request to the feeds of the repairers it matches.
+
+    `users` are the candidates whose `skill_tags` contain the needed skill.
+    `feeds` holds their current feed items and is updated in place. Returns
+    {user_id: {request_id: entry or None}}, where None means the entry was
+    pushed out of a full feed and should be deleted.
+    """
+    matches = []
+    for user in users:
+        if user.get('id') == request.get('requester_id'):
+            continue
+        strength = match_strength(user, request)
+        if strength > 0:
+            matches.append((strength, user['id']))
+    matches.sort(key=lambda m: (-m[0], m[1]))
+
+    updates = {}
+    for strength, user_id in matches[:FEED_MAX_FANOUT]:
+        items = feeds.setdefault(user_id, {})
+        items[request_id] = feed_entry(request, strength)
+        dropped = trim(items, size)
+        if request_id in dropped:
+            continue
+        updates[user_id] = {request_id: items[request_id], **{rid: None for rid in dropped}}
+    return updates
+
+
+def trim(items: Dict[str, Dict], size: int = FEED_SIZE) -> List[str]:
+    """Drop the lowest-scoring entries beyond `size`, in place; returns their ids"""
+    if len(items) <= size:
+        return []
+    order = sorted(items, key=lambda rid: (items[rid].get('score', 0), rid))
+    dropped = order[:len(items) - size]
+    for rid in dropped:
+        del items[rid]
+    return dropped
+
+
+def feed_deltas(transition: str, before: Dict, after: Dict) -> Dict[str, Dict[str, None]]:
+    """Entries to delete when a request stops being open (claimed or resolved)"""
+    if before.get('status', 'open') != 'open' or after.get('status') == 'open' or not after.get('id'):
+        return {}
+    return {user_id: {after['id']: None} for user_id in before.get('feed_user_ids') or []}
+
+
+def fanned_out_to(updates: Dict[str, Dict[str, Optional[Dict]]], request_id: str) -> List[str]:
+    return sorted(uid for uid, changes in updates.items() if changes.get(request_id) is not None)
+
+
+def ranked(items: Dict[str, Dict], limit: int = FEED_SIZE) -> List[Dict]:
+    """Feed entries best first, with their request ids"""
+    order = sorted(items, key=lambda rid: (-items[rid].get('score', 0), rid))[:limit]
+    return [{**items[rid], 'id': rid} for rid in order]
+
+
+def rebuild_feeds(open_requests: Iterable[Dict], users: Iterable[Dict],
+                  size: int = FEED_SIZE) -> Dict[str, Dict[str, Dict]]:
+    """Recompute every feed as the user's top `size` matching open requests.
+
+    Also sets each request's `feed_user_ids`. Unlike fan_out this doesn't cap
+    how many repairers one request reaches.
+    """
+    open_requests = list(open_requests)
+    by_skill = defaultdict(list)
+    for req in open_requests:
+        by_skill[request_skill_tag(req)].append((priority_score(req), req['id'], req))
+    for candidates in by_skill.values():
+        candidates.sort(reverse=True)
+
+    feeds = {}
+    for user in users:
+        skills = [s.strip().lower() for s in user.get('skills') or [] if s]
+        place = _place(user.get('location'))
+        best = []  # min-heap of the top `size` (score, request_id, strength, request)
+        for tag in user.get('skill_tags') or skill_tags(user.get('skills')):
+            for base, request_id, req in by_skill.get(tag, ()):
+                # Candidates come highest base score first, so once even the
+                # best possible match can't beat the heap minimum, stop
+                if len(best) == size and base + MAX_STRENGTH * MATCH_HOURS <= best[0][0]:
+                    break
+                if req.get('requester_id') == user['id']:
+                    continue
+                strength = _strength(skills, place, req)
+                if strength <= 0:
+                    continue
+                item = (round(base + strength * MATCH_HOURS, 4), request_id, strength, req)
+                if len(best) < size:
+                    heapq.heappush(best, item)
+                elif item[:2] > best[0][:2]:
+                    heapq.heapreplace(best, item)
+        if best:
+            feeds[user['id']] = {request_id: feed_entry(req, strength)
+                                 for _, request_id, strength, req in best}
+
+    fanned = defaultdict(list)
+    for user_id, items in feeds.items():
+        for request_id in items:
+            fanned[request_id].append(user_id)
+    for req in open_requests:
+        req['feed_user_ids'] = sorted(fanned.get(req['id'], []))
+    return feeds
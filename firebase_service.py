@@ -1,17 +1,59 @@
 # firebase_service.py
 import streamlit as st
-from datetime import datetime
-from typing import Optional, List, Dict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Tuple
+import heapq
 import os
+import threading
+import time
+
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from analytics import ANALYTICS_FIELDS, RequestFrame
+from archive import ARCHIVE_AFTER_DAYS, ARCHIVE_COLLECTION, ArchiveCheckpoint, cursor_value
+from communities import (COMMUNITIES_COLLECTION, community_id, community_name, community_of,
+                         group_by_community, status_counter_name)
+from event_log import (EVENT_CHECKPOINTS_COLLECTION, EVENT_SEQUENCE_BATCH, EVENT_SEQUENCES_COLLECTION,
+                       EVENTS_COLLECTION, MOCK_EVENT_LOG_SIZE, SEQUENCING_FIELDS, history_events,
+                       request_event, user_event)
+from feeds import (FEED_SIZE, FEEDS_COLLECTION, fan_out, fanned_out_to, feed_deltas, ranked,
+                   rebuild_feeds, request_skill_tag, skill_tags)
+from idempotency import duplicate_requests, duplicate_users, idempotent_id
+from leaderboard import (LEADERBOARD_REFRESH_SECONDS, LEADERBOARD_SIZE, LEADERBOARD_TOTALS,
+                         LEADERBOARDS_COLLECTION, OVERALL, TopK, leaderboard_ids,
+                         rebuild_leaderboards, skill_slug)
+from maintenance import MAINTENANCE_BATCH_SIZE, MAX_BATCH_WRITES
+from mock_snapshot import load_snapshot, save_snapshot
+from priority import PriorityIndex, priority_score
+from profiler import service_call
+from resilience import CLOSED, CircuitBreaker, FaultInjectingBackend, RerunBudget
+from rerun_memo import MISSING, RerunMemo
+from request_shapes import SUMMARY_FIELDS, description_preview, to_summary
+from rollups import (ALL_TIME, ROLLUP_SHARDS, ROLLUPS_COLLECTION, apply_deltas, bucket_ids,
+                     naive, rebuild_rollups, recent_bucket_ids, rollup_deltas, summarize)
+from spill_store import RecordsView, SpillStore, record_size
+from sharded_counters import (MockShardedCounter, ShardedCounter, STATUS_FIELDS, count_statuses,
+                              read_counters, status_deltas)
+from user_counters import counter_deltas, empty_counters, rebuild_counters
+from write_queue import WriteBehindQueue, PENDING, COMMITTED, REJECTED
 
 try:
     import firebase_admin
     from firebase_admin import credentials, firestore
+    from google.api_core.exceptions import AlreadyExists
+    from fake_firestore import FakeFirestoreClient
     FIREBASE_AVAILABLE = True
 except ImportError:
     FIREBASE_AVAILABLE = False
     st.warning("Firebase not installed. Using mock data for demonstration.")
 
+# Shards per global counter; raise it if busy events hit the per-document write limit
+STATS_COUNTER_SHARDS = int(os.environ.get('STATS_COUNTER_SHARDS', '10'))
+
+# Collection each queued create op writes to
+CREATE_COLLECTIONS = {'create_user': 'users', 'create_repair_request': 'repair_requests'}
+
 class MockFirestore:
     """Mock Firebase for testing without actual Firebase"""
     def __init__(self):
@@ -19,69 +61,535 @@ class MockFirestore:
         self.requests = []
         self.next_user_id = 1
         self.next_request_id = 1
+        # Index by id so status transitions don't scan the list under the lock
+        self._requests_by_id = {}
+        self._users_by_id = {}
+        # Live requests partitioned by community: {community: {request_id: request}}
+        self._requests_by_community = defaultdict(dict)
+        self.rollups = {}
+        # Resolved requests moved out of the live list, by id. The least
+        # recently used spill to disk past MOCK_MEMORY_BUDGET_MB
+        self.archive = SpillStore()
+        # Archived request ids by ('requester_id' | 'assigned_to_id', user id)
+        self._archived_by_user = defaultdict(list)
+        # Per-user "requests you can fix": {user_id: {request_id: entry}}
+        self.feeds = {}
+        # Fan-out candidates by (community, skill tag)
+        self._users_by_tag = defaultdict(list)
+        # Open requests by urgency and age, per community, for get_priority_queue
+        self.priority = defaultdict(PriorityIndex)
+        self.status_counter = MockShardedCounter(STATS_COUNTER_SHARDS)
+        self.community_counters = defaultdict(lambda: MockShardedCounter(STATS_COUNTER_SHARDS))
+        # Top repairers per leaderboard, with every repairer's count per board
+        self.leaderboards = defaultdict(TopK)
+        self.leaderboard_counts = defaultdict(lambda: defaultdict(int))
+        self.leaderboard_skills = defaultdict(int)
+        # Append-only change events per community stream, each stream's last
+        # sequence number, and subscribers' saved positions
+        self.events = defaultdict(list)
+        self.event_sequences = defaultdict(int)
+        self.event_checkpoints = {}
+        # Live request ids ordered by last change, for get_requests_changed_since,
+        # and archived ones by when they moved, for get_archived_request_ids_since
+        self._changes = OrderedDict()
+        self._archived_changes = OrderedDict()
+        self._last_update_time = datetime.min
+        self._lock = threading.Lock()
     
-    def create_user(self, user_data):
-        user_id = f"user_{self.next_user_id}"
-        user_data['id'] = user_id
-        user_data['created_at'] = datetime.now()
-        self.users.append(user_data)
-        self.next_user_id += 1
-        return user_id
+    def allocate_id(self, collection):
+        """Reserve a document id without writing, like Firestore's document()"""
+        with self._lock:
+            if collection == 'users':
+                self.next_user_id += 1
+                return f"user_{self.next_user_id - 1}"
+            self.next_request_id += 1
+            return f"req_{self.next_request_id - 1}"
+    
+    def create_user(self, user_data, user_id=None):
+        with self._lock:
+            if user_id is None:
+                user_id = f"user_{self.next_user_id}"
+                self.next_user_id += 1
+            elif user_id in self._users_by_id:
+                return user_id
+            user_data['id'] = user_id
+            user_data['created_at'] = datetime.now()
+            user_data['updated_at'] = self._update_time()
+            user_data['counters'] = empty_counters()
+            user_data['skill_tags'] = skill_tags(user_data.get('skills'))
+            user_data['community'] = community_id(user_data.get('location'))
+            for tag in user_data['skill_tags']:
+                self._users_by_tag[user_data['community'], tag].append(user_data)
+            self.users.append(user_data)
+            self._users_by_id[user_id] = user_data
+            self._append_event(user_event(user_data))
+            return user_id
     
     def get_user(self, user_id):
-        return next((user for user in self.users if user['id'] == user_id), None)
+        return self._users_by_id.get(user_id)
     
-    def get_all_users(self):
-        return self.users.copy()
+    def get_user_counters(self, user_id):
+        user = self._users_by_id.get(user_id)
+        return {**empty_counters(), **(user or {}).get('counters', {})}
     
-    def create_repair_request(self, request_data):
-        request_id = f"req_{self.next_request_id}"
-        request_data['id'] = request_id
-        request_data['created_at'] = datetime.now()
-        request_data['status'] = 'open'
-        request_data['resolved_at'] = None
-        request_data['assigned_to_id'] = None
-        self.requests.append(request_data)
-        self.next_request_id += 1
-        return request_id
+    def get_all_users(self, community=None):
+        if community:
+            return [user for user in self.users if user.get('community') == community]
+        return RecordsView(self.users)
+    
+    def create_repair_request(self, request_data, request_id=None):
+        with self._lock:
+            if request_id is None:
+                request_id = f"req_{self.next_request_id}"
+                self.next_request_id += 1
+            elif request_id in self._requests_by_id:
+                # Replayed write that already landed
+                return request_id
+            request_data['id'] = request_id
+            request_data['created_at'] = datetime.now()
+            request_data['status'] = 'open'
+            request_data['resolved_at'] = None
+            request_data['assigned_to_id'] = None
+            request_data['description_preview'] = description_preview(request_data.get('description'))
+            request_data['priority_score'] = priority_score(request_data)
+            request_data['community'] = community_id(request_data.get('requester_location'))
+            request_data['updated_at'] = self._update_time()
+            self.requests.append(request_data)
+            self._requests_by_id[request_id] = request_data
+            self._requests_by_community[request_data['community']][request_id] = request_data
+            self._record_change(request_data)
+            self._on_transition('created', {}, request_data)
+            return request_id
     
     def get_repair_request(self, request_id):
-        return next((req for req in self.requests if req['id'] == request_id), None)
+        return self._requests_by_id.get(request_id) or self.archive.get(request_id)
     
-    def get_all_requests(self, status=None):
+    def get_all_requests(self, status=None, summary=False, community=None):
+        source = self._requests_by_community.get(community, {}).values() if community else self.requests
         if status:
-            return [r for r in self.requests if r['status'] == status]
-        return self.requests.copy()
+            result = [r for r in source if r['status'] == status]
+        elif community:
+            result = list(source)
+        else:
+            result = RecordsView(self.requests)
+        return [to_summary(r) for r in result] if summary else result
     
-    def assign_repairer(self, request_id, user_id):
-        for req in self.requests:
-            if req['id'] == request_id:
-                req['status'] = 'assigned'
-                req['assigned_to_id'] = user_id
-                return True
-        return False
+    def _transition(self, transition, request_id, from_status, updates, assignee_id=None):
+        """Compare-and-set a request's status, mirroring the Firestore transaction"""
+        with self._lock:
+            req = self._requests_by_id.get(request_id)
+            if req is None and from_status == 'resolved':
+                req = self.archive.get(request_id)
+            if req is None or req.get('status') != from_status:
+                return False
+            if assignee_id is not None and req.get('assigned_to_id') != assignee_id:
+                return False
+            self._apply_transition(transition, req, updates)
+            return True
+    
+    def _apply_transition(self, transition, req, updates):
+        """Write a transition and its derived data; called with the lock held"""
+        before = dict(req)
+        req.update(updates)
+        req['updated_at'] = self._update_time()
+        if req['id'] in self._requests_by_id:
+            self._record_change(req)
+        else:
+            self.archive[req['id']] = req
+        self._on_transition(transition, before, req)
+    
+    def _update_time(self):
+        """Strictly increasing modification time, so deltas never tie or go backwards"""
+        now = datetime.now()
+        if now <= self._last_update_time:
+            now = self._last_update_time + timedelta(microseconds=1)
+        self._last_update_time = now
+        return now
+    
+    def _record_change(self, req):
+        self._changes[req['id']] = req['updated_at']
+        self._changes.move_to_end(req['id'])
+    
+    def get_requests_changed_since(self, since, limit=500, summary=False, community=None, after_id=None):
+        """Live requests after the (since, after_id) cursor, ordered by (updated_at, id)"""
+        with self._lock:
+            changed = []
+            # Walk back from the newest change until we pass `since`
+            for request_id, updated_at in reversed(self._changes.items()):
+                if since is not None and updated_at < since:
+                    break
+                if since is not None and updated_at == since and (after_id is None or request_id <= after_id):
+                    continue
+                req = self._requests_by_id[request_id]
+                if community is None or req.get('community') == community:
+                    changed.append(req)
+        changed.sort(key=lambda r: (r['updated_at'], r['id']))
+        changed = changed[:limit]
+        return [to_summary(r) for r in changed] if summary else changed
+    
+    def get_archived_request_ids_since(self, since):
+        """Ids of requests moved to the archive at or after `since`"""
+        with self._lock:
+            archived = []
+            for request_id, archived_at in reversed(self._archived_changes.items()):
+                if archived_at < since:
+                    break
+                archived.append(request_id)
+            return archived
+    
+    def _on_transition(self, transition, before, after):
+        """Apply derived data for a request transition; called with the lock held"""
+        self._append_event(request_event(transition, before, after))
+        for user_id, deltas in counter_deltas(transition, before, after).items():
+            user = self._users_by_id.get(user_id)
+            if user is None:
+                continue
+            counters = user.setdefault('counters', empty_counters())
+            for field, delta in deltas.items():
+                counters[field] = counters.get(field, 0) + delta
+        for bucket, fields in rollup_deltas(transition, before, after).items():
+            apply_deltas(self.rollups.setdefault(bucket, {}), fields)
+        deltas = status_deltas(transition, before, after)
+        self.status_counter.increment(deltas)
+        community = community_of(after)
+        self.community_counters[community].increment(deltas)
+        if transition in ('created', 'released'):
+            self.priority[community].push(after['id'], after['priority_score'])
+        if transition == 'created':
+            # fan_out updates self.feeds in place; only repairers in the same
+            # community are candidates
+            candidates = self._users_by_tag.get((community, request_skill_tag(after)), [])
+            updates = fan_out(after['id'], after, candidates, self.feeds)
+            after['feed_user_ids'] = fanned_out_to(updates, after['id'])
+        for user_id, changes in feed_deltas(transition, before, after).items():
+            for request_id in changes:
+                self.feeds.get(user_id, {}).pop(request_id, None)
+        if transition == 'resolved' and after.get('assigned_to_id'):
+            self._count_on_leaderboards(after)
+        if after.get('status') != 'open' and community in self.priority:
+            self.priority[community].remove(after['id'])
+    
+    def _append_event(self, event):
+        """Append `event` to its community's stream with the next sequence
+        number; called with the lock held"""
+        community = event['community']
+        self.event_sequences[community] += 1
+        event['seq'] = self.event_sequences[community]
+        stream = self.events[community]
+        stream.append(event)
+        # Drop the oldest in chunks, so appends stay cheap
+        if MOCK_EVENT_LOG_SIZE and len(stream) > MOCK_EVENT_LOG_SIZE + MOCK_EVENT_LOG_SIZE // 4:
+            del stream[:len(stream) - MOCK_EVENT_LOG_SIZE]
+    
+    def read_events(self, community, after_seq=0, limit=500):
+        with self._lock:
+            stream = self.events.get(community)
+            if not stream:
+                return []
+            start = max(0, after_seq + 1 - stream[0]['seq'])
+            return stream[start:start + limit]
+    
+    def get_event_heads(self):
+        with self._lock:
+            return dict(self.event_sequences)
+    
+    def get_event_checkpoint(self, name):
+        with self._lock:
+            positions = self.event_checkpoints.get(name)
+            return dict(positions) if positions is not None else None
+    
+    def save_event_checkpoint(self, name, positions):
+        with self._lock:
+            self.event_checkpoints[name] = dict(positions)
+    
+    def load_event_log(self, events, checkpoints=None):
+        """Replace the log with `events`, each already numbered within its community"""
+        self.events = defaultdict(list)
+        self.event_sequences = defaultdict(int)
+        for event in events:
+            self.events[event['community']].append(event)
+            self.event_sequences[event['community']] = event['seq']
+        self.event_checkpoints = dict(checkpoints or {})
+    
+    def rebuild_event_log(self):
+        """Replace the log with events reconstructed from history (see
+        history_events); saved subscriber positions are dropped"""
+        with self._lock:
+            self.load_event_log([])
+            for event in history_events(self.history(), self.users):
+                self._append_event(event)
+            return sum(self.event_sequences.values())
+    
+    def _count_on_leaderboards(self, req):
+        repairer = req['assigned_to_id']
+        name = (self._users_by_id.get(repairer) or {}).get('name')
+        for board in leaderboard_ids(req):
+            self.leaderboard_counts[board][repairer] += 1
+            self.leaderboards[board].offer(repairer, self.leaderboard_counts[board][repairer], name)
+        self.leaderboard_skills[skill_slug(req.get('skill_needed'))] += 1
+    
+    def get_leaderboards(self, board_ids):
+        with self._lock:
+            result = {}
+            for board in board_ids:
+                top = self.leaderboards.get(board)
+                result[board] = {'top': top.entries() if top else []}
+            if OVERALL in result:
+                result[OVERALL].update({'skills': dict(self.leaderboard_skills),
+                                        'resolved': sum(self.leaderboard_skills.values())})
+            return result
+    
+    def load_leaderboards(self, boards):
+        """Replace the leaderboards with rebuild_leaderboards() output"""
+        self.leaderboards = defaultdict(TopK)
+        self.leaderboard_counts = defaultdict(lambda: defaultdict(int))
+        for board, doc in boards.items():
+            self.leaderboards[board] = TopK(LEADERBOARD_SIZE, doc['top'])
+            self.leaderboard_counts[board].update(doc.get('counts', {}))
+        self.leaderboard_skills = defaultdict(int, boards.get(OVERALL, {}).get('skills', {}))
+    
+    def leaderboard_state(self):
+        """The leaderboards in rebuild_leaderboards() form (for snapshots)"""
+        boards = {board: {'top': top.entries(), 'counts': dict(self.leaderboard_counts[board])}
+                  for board, top in self.leaderboards.items()}
+        if OVERALL in boards:
+            boards[OVERALL]['skills'] = dict(self.leaderboard_skills)
+        return boards
+    
+    def rebuild_leaderboards(self):
+        with self._lock:
+            names = {user['id']: user.get('name') for user in self.users}
+            self.load_leaderboards(rebuild_leaderboards(self.history(), names))
+            return len(self.leaderboards)
+    
+    def get_priority_queue(self, limit=50, summary=True, community=None):
+        with self._lock:
+            if community:
+                index = self.priority.get(community)
+                ids = index.top(limit) if index else []
+            else:
+                # Every community's best `limit`, merged
+                ids = [rid for index in self.priority.values() for rid in index.top(limit)]
+            result = [self._requests_by_id[rid] for rid in ids]
+        if not community:
+            result = sorted(result, key=lambda r: -r['priority_score'])[:limit]
+        return [to_summary(r) for r in result] if summary else result
+    
+    def _index_priority(self):
+        self.priority = defaultdict(PriorityIndex)
+        for community, requests in group_by_community(
+                r for r in self.requests if r.get('status') == 'open').items():
+            self.priority[community].rebuild(requests)
     
-    def resolve_request(self, request_id, gratitude_note=""):
+    def _index_communities(self):
+        """Stamp `community` on records without one and rebuild the partitions"""
+        for record in self.users + self.requests:
+            record['community'] = community_of(record)
+        for record in self.archive.values():
+            if record.get('community') != community_of(record):
+                record['community'] = community_of(record)
+                self.archive[record['id']] = record
+        self._requests_by_community = defaultdict(dict)
         for req in self.requests:
-            if req['id'] == request_id:
-                req['status'] = 'resolved'
-                req['resolved_at'] = datetime.now()
-                req['gratitude_note'] = gratitude_note
-                return True
-        return False
+            self._requests_by_community[req['community']][req['id']] = req
+    
+    def list_communities(self):
+        with self._lock:
+            found = {community_of(user): community_name(user.get('location')) for user in self.users}
+            for community, requests in self._requests_by_community.items():
+                if requests and community not in found:
+                    found[community] = community_name(next(iter(requests.values())).get('requester_location'))
+        return [{'id': community, 'name': name} for community, name in sorted(found.items())]
+    
+    def migrate_communities(self, recompute=False):
+        """Set `community` from each record's location; returns records changed per collection"""
+        with self._lock:
+            changed = {'users': 0, 'requests': 0}
+            for collection, records, field in (('users', self.users, 'location'),
+                                                ('requests', self.history(), 'requester_location')):
+                for record in records:
+                    if record.get('community') and not recompute:
+                        continue
+                    community = community_id(record.get(field))
+                    if record.get('community') != community:
+                        record['community'] = community
+                        changed[collection] += 1
+                        if record['id'] in self.archive:
+                            self.archive[record['id']] = record
+            self._index_communities()
+            self._index_skill_tags()
+            self._index_priority()
+            return changed
+    
+    def get_feed(self, user_id, limit=FEED_SIZE):
+        with self._lock:
+            return ranked(self.feeds.get(user_id, {}), limit)
+    
+    def _index_skill_tags(self):
+        self._users_by_tag = defaultdict(list)
+        for user in self.users:
+            for tag in user.get('skill_tags') or []:
+                self._users_by_tag[community_of(user), tag].append(user)
     
-    def get_user_requests(self, user_id, role='requester'):
+    def rebuild_feeds(self):
+        with self._lock:
+            for user in self.users:
+                user['skill_tags'] = skill_tags(user.get('skills'))
+            self._index_skill_tags()
+            users = group_by_community(self.users)
+            self.feeds = {}
+            for community, requests in self._requests_by_community.items():
+                self.feeds.update(rebuild_feeds(
+                    [r for r in requests.values() if r.get('status') == 'open'], users.get(community, [])))
+            return len(self.feeds)
+    
+    def rebuild_user_counters(self):
+        with self._lock:
+            rebuilt = rebuild_counters(self.history())
+            for user in self.users:
+                user['counters'] = rebuilt.get(user['id'], empty_counters())
+            return len(self.users)
+    
+    def get_rollups(self, bucket_ids):
+        return {bucket: self.rollups.get(bucket) for bucket in bucket_ids}
+    
+    def rebuild_rollups(self):
+        with self._lock:
+            self.rollups = rebuild_rollups(self.history())
+            return len(self.rollups)
+    
+    def assign_repairer(self, request_id, user_id):
+        return self._transition('assigned', request_id, 'open', {
+            'status': 'assigned',
+            'assigned_to_id': user_id,
+            'assigned_at': datetime.now()
+        })
+    
+    def resolve_request(self, request_id, gratitude_note="", repairer_id=None):
+        return self._transition('resolved', request_id, 'assigned', {
+            'status': 'resolved',
+            'resolved_at': datetime.now(),
+            'gratitude_note': gratitude_note
+        }, assignee_id=repairer_id)
+    
+    def add_gratitude_note(self, request_id, gratitude_note):
+        return self._transition('gratitude', request_id, 'resolved', {
+            'gratitude_note': gratitude_note
+        })
+    
+    def get_user_requests(self, user_id, role='requester', summary=False):
         field = 'requester_id' if role == 'requester' else 'assigned_to_id'
-        return [r for r in self.requests if r.get(field) == user_id]
+        result = [r for r in self.requests if r.get(field) == user_id]
+        # Only this user's archived requests are read back from the archive
+        result += [self.archive[rid] for rid in self._archived_by_user.get((field, user_id), [])]
+        return [to_summary(r) for r in result] if summary else result
     
-    def get_stats(self):
-        stats = {'total': 0, 'open': 0, 'assigned': 0, 'resolved': 0}
-        for req in self.requests:
-            stats['total'] += 1
-            status = req.get('status', 'open')
-            if status in stats:
-                stats[status] += 1
-        return stats
+    def history(self):
+        """Live and archived requests together, for rebuilds and per-user history"""
+        return self.requests + list(self.archive.values())
+    
+    def archive_resolved(self, cutoff, batch_size, after=None):
+        """Move up to `batch_size` requests resolved before `cutoff` into the
+        archive, ordered by (resolved_at, id) and starting past the `after`
+        cursor; returns how many moved and the cursor of the last"""
+        
+        def past_cursor(req):
+            if after is None:
+                return True
+            after_time, after_id = after
+            if after_id is None:
+                return req['resolved_at'] > after_time
+            return (req['resolved_at'], req['id']) > (after_time, after_id)
+        
+        with self._lock:
+            candidates = sorted(
+                (r for r in self.requests
+                 if r.get('status') == 'resolved' and isinstance(r.get('resolved_at'), datetime)
+                 and r['resolved_at'] < cutoff and past_cursor(r)),
+                key=lambda r: (r['resolved_at'], r['id']))[:batch_size]
+            moved = {r['id'] for r in candidates}
+            if moved:
+                archived_at = datetime.now()
+                for req in candidates:
+                    req['archived_at'] = archived_at
+                    req['updated_at'] = self._update_time()
+                    self._archived_changes[req['id']] = req['updated_at']
+                    self.archive[req['id']] = req
+                    self._index_archived(req)
+                    del self._requests_by_id[req['id']]
+                    self._requests_by_community[community_of(req)].pop(req['id'], None)
+                    self._changes.pop(req['id'], None)
+                self.requests = [r for r in self.requests if r['id'] not in moved]
+            last = candidates[-1] if candidates else None
+            return len(moved), (last['resolved_at'], last['id']) if last else None
+    
+    def _index_archived(self, req):
+        for field in ('requester_id', 'assigned_to_id'):
+            if req.get(field):
+                self._archived_by_user[field, req[field]].append(req['id'])
+    
+    def memory_stats(self):
+        """Estimated memory held by records, and the archive's residency and spill counts"""
+        with self._lock:
+            live_bytes = sum(map(record_size, self.requests))
+            user_bytes = sum(map(record_size, self.users))
+            return {'live_requests': len(self.requests), 'live_bytes': live_bytes,
+                    'users': len(self.users), 'user_bytes': user_bytes,
+                    'archive': self.archive.memory_stats()}
+    
+    def maintenance_batch(self, transition, from_status, time_field, cutoff, batch_size, updates):
+        """Apply `transition` to up to `batch_size` live requests in `from_status`
+        whose `time_field` is before `cutoff`, oldest first; returns how many changed"""
+        with self._lock:
+            due = heapq.nsmallest(
+                batch_size,
+                (r for r in self.requests if r.get('status') == from_status
+                 and isinstance(r.get(time_field), datetime) and r[time_field] < cutoff),
+                key=lambda r: r[time_field])
+            for req in due:
+                self._apply_transition(transition, req, updates)
+            return len(due)
+    
+    def get_stats(self, community=None):
+        if community:
+            counter = self.community_counters.get(community)
+            return {**{field: 0 for field in STATUS_FIELDS}, **(counter.read() if counter else {})}
+        return {**{field: 0 for field in STATUS_FIELDS}, **self.status_counter.read()}
+    
+    def reindex(self):
+        """Rebuild the id and change-order indexes after records were edited in place"""
+        with self._lock:
+            self._users_by_id = {user['id']: user for user in self.users}
+            self._requests_by_id = {req['id']: req for req in self.requests}
+            self._index_communities()
+            self._index_skill_tags()
+            for req in self.requests:
+                req['priority_score'] = priority_score(req)
+            self._index_priority()
+            self._changes = OrderedDict(
+                (req['id'], req['updated_at'])
+                for req in sorted(self.requests, key=lambda r: r['updated_at']))
+            if self._changes:
+                self._last_update_time = max(self._last_update_time, next(reversed(self._changes.values())))
+    
+    def snapshot(self, path):
+        """Save the whole database, indexes included, to a columnar snapshot file"""
+        save_snapshot(self, path)
+    
+    @classmethod
+    def restore(cls, path):
+        db = cls()
+        load_snapshot(db, path)
+        return db
+    
+    def rebuild_stats_counters(self):
+        with self._lock:
+            stats, by_community = count_statuses(self.history())
+            self.status_counter.reset(stats)
+            self.community_counters.clear()
+            for community, counts in by_community.items():
+                self.community_counters[community].reset(counts)
+            return stats
 
 class FirebaseService:
     _instance = None
@@ -89,13 +597,62 @@ class FirebaseService:
     def __init__(self):
         self.db = None
         self.mock_mode = False
+        self.write_queue = None
+
+        self._connect()
+        
+        if not self.mock_mode and self.db:
+            self.status_counter = ShardedCounter(self.db, 'request_status', STATS_COUNTER_SHARDS)
+            self._community_counters = {}
+            self.leaderboard_totals = ShardedCounter(self.db, LEADERBOARD_TOTALS, STATS_COUNTER_SHARDS)
+
+        if self.mock_mode and (os.environ.get('MOCK_FAULT_RATE') or os.environ.get('MOCK_LATENCY_MS')):
+            self.db = FaultInjectingBackend(
+                self.db,
+                failure_rate=float(os.environ.get('MOCK_FAULT_RATE', '0')),
+                latency=float(os.environ.get('MOCK_LATENCY_MS', '0')) / 1000)
+
+        # Per-call deadline, per-rerun budget and circuit breaker for backend calls
+        self.call_deadline = float(os.environ.get('FIRESTORE_CALL_DEADLINE', '2.0'))
+        self.write_deadline = float(os.environ.get('FIRESTORE_WRITE_DEADLINE', '10.0'))
+        self.rerun_budget = float(os.environ.get('RERUN_TIME_BUDGET', '5.0'))
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.environ.get('BREAKER_FAILURE_THRESHOLD', '5')),
+            reset_timeout=float(os.environ.get('BREAKER_RESET_TIMEOUT', '30')))
+        self.resilience_stats = {'deadline_exceeded': 0, 'budget_exhausted': 0,
+                                 'degraded_reads': 0, 'served_from_cache': 0}
+        self._rerun = threading.local()
+        # When the last page rerun or API call began (maintenance yields to them)
+        self.last_rerun_at = 0.0
+        # Read memos of recent reruns, for get_rerun_read_report
+        self._recent_memos = deque(maxlen=50)
+        self._last_good = OrderedDict()
+        self._last_good_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='firestore-call')
+        # Writes get their own workers so a stuck write can't hold up reads
+        self._write_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='firestore-write')
+        # Cross-community admin reads run one guarded read per community on
+        # here, so they don't queue behind (or starve) the per-call workers
+        self._community_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='community-read')
 
+        if os.environ.get('WRITE_BEHIND', 'false').lower() == 'true' and self.db:
+            spool_path = os.environ.get('WRITE_BEHIND_SPOOL', '.write_behind_spool.jsonl')
+            self.write_queue = WriteBehindQueue(self._apply_write_batch, spool_path)
+
+    def _connect(self):
         # Check if we should use mock mode
         use_mock = os.environ.get('USE_MOCK_DB', 'false').lower() == 'true'
 
+        # In-process fake client: runs the real Firestore code path offline
+        if os.environ.get('USE_FAKE_FIRESTORE', 'false').lower() == 'true' and FIREBASE_AVAILABLE:
+            self.db = FakeFirestoreClient(
+                latency=float(os.environ.get('FAKE_FIRESTORE_LATENCY_MS', '0')) / 1000)
+            st.info("🧪 Using in-process fake Firestore")
+            return
+
         if use_mock or not FIREBASE_AVAILABLE:
             self.mock_mode = True
-            self.db = MockFirestore()
+            self.db = self._new_mock_db()
             st.info("🔧 Using mock database for demonstration")
             return
 
@@ -105,7 +662,7 @@ class FirebaseService:
             if 'firebase' not in st.secrets:
                 st.warning("Firebase secrets not found in Streamlit secrets. Using mock database.")
                 self.mock_mode = True
-                self.db = MockFirestore()
+                self.db = self._new_mock_db()
                 return
 
             firebase_config = st.secrets.get("firebase", {})
@@ -113,7 +670,7 @@ class FirebaseService:
             if not firebase_config:
                 st.warning("Firebase config empty. Using mock database.")
                 self.mock_mode = True
-                self.db = MockFirestore()
+                self.db = self._new_mock_db()
                 return
 
             # Check for required fields
@@ -125,7 +682,7 @@ class FirebaseService:
             ]:
                 st.warning(f"Missing Firebase config fields: {missing_fields}. Using mock database.")
                 self.mock_mode = True
-                self.db = MockFirestore()
+                self.db = self._new_mock_db()
                 return
 
             # Initialize Firebase only if not already initialized
@@ -155,7 +712,17 @@ class FirebaseService:
             st.error(f"⚠️ Could not connect to Firebase: {str(e)[:200]}")
             st.info("Using mock database instead.")
             self.mock_mode = True
-            self.db = MockFirestore()
+            self.db = self._new_mock_db()
+    
+    def _new_mock_db(self):
+        """Empty mock database, or the one saved at MOCK_DB_SNAPSHOT if it exists"""
+        snapshot_path = os.environ.get('MOCK_DB_SNAPSHOT')
+        if snapshot_path and os.path.exists(snapshot_path):
+            try:
+                return MockFirestore.restore(snapshot_path)
+            except Exception as e:
+                st.error(f"Error loading mock snapshot: {e}")
+        return MockFirestore()
     
     @classmethod
     def get_instance(cls):
@@ -164,166 +731,1502 @@ class FirebaseService:
         return cls._instance
     
     # All methods with proper error handling
-    def create_user(self, user_data: Dict) -> Optional[str]:
-        if self.mock_mode or not self.db:
-            return self.db.create_user(user_data) if self.db else None
-        
-        try:
-            doc_ref = self.db.collection('users').document()
-            user_data['created_at'] = datetime.now()
-            doc_ref.set(user_data)
-            return doc_ref.id
-        except Exception as e:
-            st.error(f"Error creating user: {e}")
+    def create_user(self, user_data: Dict, idempotency_key: Optional[str] = None) -> Optional[str]:
+        """Create a user; repeating a call with the same `idempotency_key`
+        returns the same id without creating another document"""
+        user_id = idempotent_id('users', idempotency_key) if idempotency_key else None
+        if self.write_queue:
+            return self._enqueue_create('create_user', 'users', user_data, user_id)
+        if not self.db:
             return None
+        return self._guarded_write("creating user", self._write_user, user_data, user_id, default=None)
     
-    def get_user(self, user_id: str) -> Optional[Dict]:
-        if self.mock_mode or not self.db:
-            return self.db.get_user(user_id) if self.db else None
+    def _write_user(self, user_data: Dict, user_id: Optional[str] = None) -> str:
+        if self.mock_mode:
+            return self.db.create_user(user_data, user_id)
         
+        doc_ref = self.db.collection('users').document(user_id)
+        user_data['created_at'] = datetime.now()
+        user_data['updated_at'] = firestore.SERVER_TIMESTAMP
+        user_data['counters'] = empty_counters()
+        user_data['skill_tags'] = skill_tags(user_data.get('skills'))
+        user_data['community'] = community_id(user_data.get('location'))
+        
+        # The user and its UserCreated event are written together
+        batch = self.db.batch()
+        batch.create(doc_ref, user_data)
+        self._event_writes(batch, [user_event({**user_data, 'id': doc_ref.id})])
         try:
-            doc = self.db.collection('users').document(user_id).get()
-            return doc.to_dict() if doc.exists else None
-        except Exception as e:
-            st.error(f"Error getting user: {e}")
+            batch.commit()
+        except AlreadyExists:
+            pass  # a resubmit or replay of a create that already landed
+        self._register_communities([user_data.get('location')])
+        return doc_ref.id
+    
+    def get_user(self, user_id: str) -> Optional[Dict]:
+        if not self.db:
             return None
+        return self._guarded_read('get_user', self._fetch_user, user_id, default=None)
     
-    def get_all_users(self) -> List[Dict]:
-        if self.mock_mode or not self.db:
-            return self.db.get_all_users() if self.db else []
+    def _fetch_user(self, user_id: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        if self.mock_mode:
+            return self.db.get_user(user_id)
         
-        try:
-            users = self.db.collection('users').stream()
-            return [{**user.to_dict(), 'id': user.id} for user in users]
-        except Exception as e:
-            st.error(f"Error getting users: {e}")
+        doc = self.db.collection('users').document(user_id).get(timeout=timeout)
+        return doc.to_dict() if doc.exists else None
+    
+    def get_all_users(self, community: Optional[str] = None) -> List[Dict]:
+        """Users of `community`, else of the rerun's community (everyone if neither is set)"""
+        if not self.db:
             return []
+        return self._guarded_read('get_all_users', self._fetch_all_users,
+                                  self._scope(community), default=[])
     
-    def create_repair_request(self, request_data: Dict) -> Optional[str]:
-        if self.mock_mode or not self.db:
-            return self.db.create_repair_request(request_data) if self.db else None
-
-        try:
-            return self._extracted_from_create_repair_request_6(request_data)
-        except Exception as e:
-            st.error(f"Error creating repair request: {e}")
+    def _fetch_all_users(self, community: Optional[str] = None,
+                         timeout: Optional[float] = None) -> List[Dict]:
+        if self.mock_mode:
+            return self.db.get_all_users(community)
+        
+        query = self.db.collection('users')
+        if community:
+            query = query.where('community', '==', community)
+        users = query.stream(timeout=timeout)
+        return [{**user.to_dict(), 'id': user.id} for user in users]
+    
+    def create_repair_request(self, request_data: Dict,
+                              idempotency_key: Optional[str] = None) -> Optional[str]:
+        """Create an open request; repeating a call with the same
+        `idempotency_key` returns the same id without creating another one"""
+        request_id = idempotent_id('repair_requests', idempotency_key) if idempotency_key else None
+        if self.write_queue:
+            return self._enqueue_create('create_repair_request', 'repair_requests', request_data,
+                                        request_id)
+        if not self.db:
             return None
+        return self._guarded_write("creating repair request", self._write_repair_request,
+                                   request_data, request_id, default=None)
 
-    # TODO Rename this here and in `create_repair_request`
-    def _extracted_from_create_repair_request_6(self, request_data):
-        doc_ref = self.db.collection('repair_requests').document()
+    def _write_repair_request(self, request_data: Dict, request_id: Optional[str] = None) -> str:
+        if self.mock_mode:
+            return self.db.create_repair_request(request_data, request_id)
+        
+        doc_ref = self.db.collection('repair_requests').document(request_id)
         request_data['created_at'] = datetime.now()
         request_data['status'] = 'open'
         request_data['resolved_at'] = None
         request_data['assigned_to_id'] = None
-        doc_ref.set(request_data)
+        request_data['description_preview'] = description_preview(request_data.get('description'))
+        request_data['priority_score'] = priority_score(request_data)
+        request_data['community'] = community_id(request_data.get('requester_location'))
+        request_data['updated_at'] = firestore.SERVER_TIMESTAMP
+        
+        # Create the request, bump the requester's counters, fan it out to
+        # matching repairers' feeds and log it atomically. With a caller-chosen
+        # id the request may already exist (a resubmit), and then nothing is
+        # written. Users and feeds are looked up beforehand, outside the
+        # transaction, so concurrent creates don't abort each other over them.
+        existing_users = self._existing_users(counter_deltas('created', {}, request_data))
+        feed_updates = self._plan_fan_out([(doc_ref.id, request_data)])
+        
+        @firestore.transactional
+        def create(transaction):
+            if request_id is not None and doc_ref.get(transaction=transaction).exists:
+                return
+            transaction.create(doc_ref, request_data)
+            self._transition_writes(transaction, 'created', {}, request_data, existing_users)
+            self._feed_writes(transaction, feed_updates)
+            self._event_writes(transaction, [request_event('created', {}, {**request_data, 'id': doc_ref.id})])
+        
+        create(self.db.transaction())
         return doc_ref.id
     
     def get_repair_request(self, request_id: str) -> Optional[Dict]:
-        if self.mock_mode or not self.db:
-            return self.db.get_repair_request(request_id) if self.db else None
-        
-        try:
-            doc = self.db.collection('repair_requests').document(request_id).get()
-            if doc.exists:
-                data = doc.to_dict()
-                data['id'] = doc.id
-                return data
-            return None
-        except Exception as e:
-            st.error(f"Error getting repair request: {e}")
+        if not self.db:
             return None
+        memo = getattr(self._rerun, 'memo', None)
+        record = memo.record(request_id) if memo else None
+        if record is not None:
+            return record  # already fetched in full by a list read this rerun
+        return self._guarded_read('get_repair_request', self._fetch_repair_request,
+                                  request_id, default=None)
     
-    def get_all_requests(self, status: str = None) -> List[Dict]:
-        if self.mock_mode or not self.db:
-            return self.db.get_all_requests(status) if self.db else []
+    def _fetch_repair_request(self, request_id: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        if self.mock_mode:
+            return self.db.get_repair_request(request_id)
         
-        try:
-            if status:
-                requests = self.db.collection('repair_requests').where('status', '==', status).stream()
-            else:
-                requests = self.db.collection('repair_requests').stream()
-            
-            result = []
-            for req in requests:
-                data = req.to_dict()
-                data['id'] = req.id
-                result.append(data)
-            
-            # Sort by creation date (newest first)
-            result.sort(key=lambda x: x.get('created_at', datetime.min), reverse=True)
-            return result
-        except Exception as e:
-            st.error(f"Error getting repair requests: {e}")
+        doc = self.db.collection('repair_requests').document(request_id).get(timeout=timeout)
+        if not doc.exists:
+            # Old resolved requests live in the archive
+            doc = self.db.collection(ARCHIVE_COLLECTION).document(request_id).get(timeout=timeout)
+        if doc.exists:
+            data = doc.to_dict()
+            data['id'] = doc.id
+            return data
+        return None
+
+    def get_repair_requests(self, request_ids: List[str]) -> List[Dict]:
+        """Full records for several requests in one round trip (missing ids are skipped)"""
+        if not self.db or not request_ids:
+            return []
+        return self._guarded_read('get_repair_requests', self._fetch_repair_requests,
+                                  tuple(request_ids), default=[])
+
+    def _fetch_repair_requests(self, request_ids, timeout: Optional[float] = None) -> List[Dict]:
+        if self.mock_mode:
+            return [{**r, 'id': rid} for rid in request_ids
+                    for r in [self.db.get_repair_request(rid)] if r]
+
+        found = {}
+        for collection in ('repair_requests', ARCHIVE_COLLECTION):
+            refs = [self.db.collection(collection).document(rid) for rid in request_ids if rid not in found]
+            for snap in (self.db.get_all(refs, timeout=timeout) if refs else []):
+                if snap.exists:
+                    found[snap.id] = {**snap.to_dict(), 'id': snap.id}
+        return [found[rid] for rid in request_ids if rid in found]
+
+    def get_all_requests(self, status: str = None, summary: bool = False,
+                         community: Optional[str] = None) -> List[Dict]:
+        """All live requests of a community (see set_community), newest first.
+        
+        With `summary=True` only SUMMARY_FIELDS are fetched (a projected
+        query), which is all list views need; use get_repair_request for the
+        full record.
+        """
+        if not self.db:
             return []
+        community = self._scope(community)
+        memo = getattr(self._rerun, 'memo', None)
+        if status and memo:
+            # Filter the unfiltered list if this rerun already has it
+            everything = memo.get(('get_all_requests', (None, summary, community)))
+            if everything is not MISSING:
+                return [r for r in everything if r.get('status') == status]
+        result = self._guarded_read('get_all_requests', self._fetch_all_requests,
+                                    status, summary, community, default=[])
+        if memo and not summary:
+            memo.remember_records(result)
+        return result
     
-    def assign_repairer(self, request_id: str, user_id: str) -> bool:
-        if self.mock_mode or not self.db:
-            return self.db.assign_repairer(request_id, user_id) if self.db else False
+    def _fetch_all_requests(self, status: str = None, summary: bool = False,
+                            community: Optional[str] = None,
+                            timeout: Optional[float] = None) -> List[Dict]:
+        if self.mock_mode:
+            return self.db.get_all_requests(status, summary, community)
         
-        try:
-            self.db.collection('repair_requests').document(request_id).update({
-                'status': 'assigned',
-                'assigned_to_id': user_id
+        query = self.db.collection('repair_requests')
+        if community:
+            query = query.where('community', '==', community)
+        if status:
+            query = query.where('status', '==', status)
+        if summary:
+            query = query.select(SUMMARY_FIELDS)
+        requests = query.stream(timeout=timeout)
+        
+        result = []
+        for req in requests:
+            data = req.to_dict()
+            data['id'] = req.id
+            result.append(data)
+        
+        # Sort by creation date (newest first)
+        result.sort(key=lambda x: x.get('created_at', datetime.min), reverse=True)
+        return result
+    
+    def get_requests_changed_since(self, since: Optional[datetime], limit: int = 500,
+                                   summary: bool = False, community: Optional[str] = None,
+                                   after_id: Optional[str] = None) -> List[Dict]:
+        """Live requests modified after `since` (all of them if None), ordered
+        by (updated_at, id).
+        
+        Pass the newest `updated_at` already seen to pick up only what changed.
+        To page through rows that share a timestamp, pass the last row's
+        `updated_at` and id as `since` and `after_id`. RequestSyncCache in
+        delta_sync.py does this and merges the results.
+        """
+        if not self.db:
+            return []
+        return self._guarded_read('get_requests_changed_since', self._fetch_requests_changed_since,
+                                  since, limit, summary, self._scope(community), after_id, default=[])
+    
+    def _fetch_requests_changed_since(self, since: Optional[datetime], limit: int = 500,
+                                      summary: bool = False, community: Optional[str] = None,
+                                      after_id: Optional[str] = None,
+                                      timeout: Optional[float] = None) -> List[Dict]:
+        if self.mock_mode:
+            return self.db.get_requests_changed_since(since, limit, summary, community, after_id)
+        
+        query = self.db.collection('repair_requests')
+        if community:
+            query = query.where('community', '==', community)
+        # Document id breaks updated_at ties, so a page boundary inside one
+        # batch commit's rows neither skips nor repeats any
+        query = query.order_by('updated_at').order_by('__name__')
+        if since is not None and after_id is not None:
+            query = query.start_after({'updated_at': since, '__name__': after_id})
+        elif since is not None:
+            query = query.where('updated_at', '>', since)
+        query = query.limit(limit)
+        if summary:
+            query = query.select(SUMMARY_FIELDS)
+        
+        result = []
+        for req in query.stream(timeout=timeout):
+            data = req.to_dict()
+            data['id'] = req.id
+            result.append(data)
+        return result
+    
+    def get_archived_request_ids_since(self, since: datetime) -> Optional[List[str]]:
+        """Ids of requests moved to the archive (or changed there) at or after `since`.
+        
+        Archived requests leave the live collection, so the delta query never
+        returns them; RequestSyncCache drops these ids instead. Returns None if
+        the read failed, so the caller knows it may have missed some.
+        """
+        if not self.db:
+            return []
+        return self._guarded_read('get_archived_request_ids_since', self._fetch_archived_request_ids_since,
+                                  since, default=None)
+    
+    def _fetch_archived_request_ids_since(self, since: datetime,
+                                          timeout: Optional[float] = None) -> List[str]:
+        if self.mock_mode:
+            return self.db.get_archived_request_ids_since(since)
+        # Ids only; the archive move stamps updated_at, so this needs no extra index
+        query = self.db.collection(ARCHIVE_COLLECTION).where('updated_at', '>=', since).select([])
+        return [doc.id for doc in query.stream(timeout=timeout)]
+    
+    def assign_repairer(self, request_id: str, user_id: str) -> bool:
+        """Claim an open request; returns False if someone else got there first"""
+        if self.write_queue:
+            self._forget_rerun_reads()
+            self.write_queue.enqueue('assign_repairer', request_id, {
+                'user_id': user_id,
+                'assigned_at': datetime.now()
             })
             return True
-        except Exception as e:
-            st.error(f"Error assigning repairer: {e}")
+        if not self.db:
             return False
+        return self._guarded_write("assigning repairer", self._assign_repairer,
+                                   request_id, user_id, default=False)
     
-    def resolve_request(self, request_id: str, gratitude_note: str = "") -> bool:
-        if self.mock_mode or not self.db:
-            return self.db.resolve_request(request_id, gratitude_note) if self.db else False
-        
-        try:
-            self.db.collection('repair_requests').document(request_id).update({
-                'status': 'resolved',
-                'resolved_at': datetime.now(),
-                'gratitude_note': gratitude_note
+    def _assign_repairer(self, request_id: str, user_id: str,
+                         assigned_at: Optional[datetime] = None) -> bool:
+        if self.mock_mode:
+            return self.db.assign_repairer(request_id, user_id)
+        return self._transition_request('assigned', request_id, 'open', {
+            'status': 'assigned',
+            'assigned_to_id': user_id,
+            'assigned_at': assigned_at or datetime.now()
+        })
+    
+    def resolve_request(self, request_id: str, gratitude_note: str = "",
+                        repairer_id: Optional[str] = None) -> bool:
+        """Resolve an assigned request, optionally checking who it is assigned to"""
+        if self.write_queue:
+            self._forget_rerun_reads()
+            self.write_queue.enqueue('resolve_request', request_id, {
+                'gratitude_note': gratitude_note,
+                'repairer_id': repairer_id,
+                'resolved_at': datetime.now()
             })
             return True
-        except Exception as e:
-            st.error(f"Error resolving request: {e}")
+        if not self.db:
             return False
+        return self._guarded_write("resolving request", self._resolve_request,
+                                   request_id, gratitude_note, repairer_id, default=False)
+    
+    def _resolve_request(self, request_id: str, gratitude_note: str = "",
+                         repairer_id: Optional[str] = None,
+                         resolved_at: Optional[datetime] = None) -> bool:
+        if self.mock_mode:
+            return self.db.resolve_request(request_id, gratitude_note, repairer_id)
+        return self._transition_request('resolved', request_id, 'assigned', {
+            'status': 'resolved',
+            'resolved_at': resolved_at or datetime.now(),
+            'gratitude_note': gratitude_note
+        }, assignee_id=repairer_id)
     
-    def get_user_requests(self, user_id: str, role: str = 'requester') -> List[Dict]:
-        if self.mock_mode or not self.db:
-            return self.db.get_user_requests(user_id, role) if self.db else []
+    def add_gratitude_note(self, request_id: str, gratitude_note: str) -> bool:
+        """Attach the requester's thank-you to an already resolved request"""
+        if self.write_queue:
+            self._forget_rerun_reads()
+            self.write_queue.enqueue('add_gratitude_note', request_id,
+                                     {'gratitude_note': gratitude_note})
+            return True
+        if not self.db:
+            return False
+        return self._guarded_write("saving gratitude note", self._add_gratitude_note,
+                                   request_id, gratitude_note, default=False)
+    
+    def _add_gratitude_note(self, request_id: str, gratitude_note: str) -> bool:
+        if self.mock_mode:
+            return self.db.add_gratitude_note(request_id, gratitude_note)
+        return self._transition_request('gratitude', request_id, 'resolved', {
+            'gratitude_note': gratitude_note
+        })
+    
+    def _transition_request(self, transition_name: str, request_id: str, from_status: str,
+                            updates: Dict, assignee_id: Optional[str] = None) -> bool:
+        """Compare-and-set a request's status inside a Firestore transaction.
         
-        try:
-            field = 'requester_id' if role == 'requester' else 'assigned_to_id'
-            requests = self.db.collection('repair_requests').where(field, '==', user_id).stream()
-            
-            result = []
+        The transaction re-reads the document and only writes if it is still in
+        `from_status`, so concurrent claims are serialized by Firestore and all
+        but one of them come back False instead of silently overwriting.
+        """
+        live_ref = self.db.collection('repair_requests').document(request_id)
+        
+        @firestore.transactional
+        def transition(transaction):
+            doc_ref = live_ref
+            snapshot = doc_ref.get(transaction=transaction)
+            if not snapshot.exists and from_status == 'resolved':
+                # Gratitude can still be added after the request was archived
+                doc_ref = self.db.collection(ARCHIVE_COLLECTION).document(request_id)
+                snapshot = doc_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return False
+            current = {**snapshot.to_dict(), 'id': request_id}
+            if current.get('status') != from_status:
+                return False
+            if assignee_id is not None and current.get('assigned_to_id') != assignee_id:
+                return False
+            after = {**current, **updates}
+            # All transaction reads must happen before the first write
+            existing_users = self._existing_users(counter_deltas(transition_name, current, after))
+            transaction.update(doc_ref, {**updates, 'updated_at': firestore.SERVER_TIMESTAMP})
+            self._transition_writes(transaction, transition_name, current, after, existing_users)
+            self._event_writes(transaction, [request_event(transition_name, current, after)])
+            return True
+        
+        return transition(self.db.transaction())
+    
+    def _existing_users(self, user_ids) -> set:
+        """Ids from `user_ids` that have a user document (demo users don't).
+        
+        Read outside any transaction: users are never deleted, so the answer
+        can't go stale, and keeping user documents out of a transaction's
+        read set means claims and creates touching the same requester's
+        counters don't abort each other.
+        """
+        refs = [self.db.collection('users').document(user_id) for user_id in user_ids]
+        if not refs:
+            return set()
+        return {snap.id for snap in self.db.get_all(refs) if snap.exists}
+    
+    def _transition_writes(self, writer, transition_name: str, before: Dict, after: Dict,
+                           existing_users: set):
+        """Add derived-data writes for a transition to a transaction or batch"""
+        repairer = after.get('assigned_to_id') if transition_name == 'resolved' else None
+        for user_id, deltas in counter_deltas(transition_name, before, after).items():
+            if user_id not in existing_users:
+                continue
+            fields = {f'counters.{field}': firestore.Increment(delta) for field, delta in deltas.items()}
+            if user_id == repairer:
+                # One write per document: the repairer's board counts ride
+                # along; the boards themselves are refreshed on read
+                fields.update({f'leaderboard_counts.{board}': firestore.Increment(1)
+                               for board in leaderboard_ids(after)})
+            writer.update(self.db.collection('users').document(user_id), fields)
+        if repairer:
+            self.leaderboard_totals.increment(
+                writer, {'resolved': 1, f"skills.{skill_slug(after.get('skill_needed'))}": 1},
+                firestore.Increment)
+        for bucket, fields in rollup_deltas(transition_name, before, after).items():
+            self._rollup_counter(bucket).increment(writer, fields, firestore.Increment)
+        deltas = status_deltas(transition_name, before, after)
+        self.status_counter.increment(writer, deltas, firestore.Increment)
+        self._community_counter(community_of(after)).increment(writer, deltas, firestore.Increment)
+        self._feed_writes(writer, feed_deltas(transition_name, before, after))
+    
+    def _plan_fan_out(self, requests) -> Dict[str, Dict]:
+        """Feed changes for new requests, given as (request_id, data) pairs.
+        
+        Finds matching repairers in the request's community through their
+        `skill_tags`, reads their current feeds and sets `feed_user_ids` on
+        each request's data. Feeds are read outside any transaction: two
+        creates racing on one feed can leave it an entry over FEED_SIZE until
+        the next fan-out trims it, which beats aborting one of them.
+        """
+        if not requests:
+            return {}
+        candidates = {}
+        for community, tag in {(community_of(req), request_skill_tag(req)) for _, req in requests}:
+            if not tag:
+                continue
+            query = (self.db.collection('users')
+                     .where('community', '==', community)
+                     .where('skill_tags', 'array_contains', tag))
+            candidates[community, tag] = [{**doc.to_dict(), 'id': doc.id}
+                                          for doc in query.select(['skills', 'location']).stream()]
+        user_ids = sorted({user['id'] for users in candidates.values() for user in users})
+        refs = [self.db.collection(FEEDS_COLLECTION).document(user_id) for user_id in user_ids]
+        feeds = {snap.id: (snap.to_dict() or {}).get('items', {})
+                 for snap in (self.db.get_all(refs) if refs else []) if snap.exists}
+        
+        updates = {}
+        for request_id, req in requests:
+            users = candidates.get((community_of(req), request_skill_tag(req)), [])
+            planned = fan_out(request_id, req, users, feeds)
+            req['feed_user_ids'] = fanned_out_to(planned, request_id)
+            for user_id, changes in planned.items():
+                updates.setdefault(user_id, {}).update(changes)
+        return updates
+    
+    def _feed_writes(self, writer, updates: Dict[str, Dict]):
+        """Merge feed entries into users' feed documents; None deletes an entry"""
+        for user_id, changes in updates.items():
+            items = {request_id: firestore.DELETE_FIELD if entry is None else entry
+                     for request_id, entry in changes.items()}
+            writer.set(self.db.collection(FEEDS_COLLECTION).document(user_id), {'items': items},
+                       merge=True)
+    
+    def get_user_requests(self, user_id: str, role: str = 'requester',
+                          summary: bool = False) -> List[Dict]:
+        if not self.db:
+            return []
+        result = self._guarded_read('get_user_requests', self._fetch_user_requests,
+                                    user_id, role, summary, default=[])
+        memo = getattr(self._rerun, 'memo', None)
+        if memo and not summary:
+            memo.remember_records(result)
+        return result
+    
+    def _fetch_user_requests(self, user_id: str, role: str = 'requester', summary: bool = False,
+                             timeout: Optional[float] = None) -> List[Dict]:
+        if self.mock_mode:
+            return self.db.get_user_requests(user_id, role, summary)
+        
+        field = 'requester_id' if role == 'requester' else 'assigned_to_id'
+        result = []
+        # A member's history spans the live collection and the archive
+        for collection in ('repair_requests', ARCHIVE_COLLECTION):
+            query = self.db.collection(collection).where(field, '==', user_id)
+            if summary:
+                query = query.select(SUMMARY_FIELDS)
+            requests = query.stream(timeout=timeout)
             for req in requests:
                 data = req.to_dict()
                 data['id'] = req.id
                 result.append(data)
-            
-            return result
-        except Exception as e:
-            st.error(f"Error getting user requests: {e}")
+        
+        return result
+    
+    def get_stats(self, community: Optional[str] = None) -> Dict:
+        """Per-status counts for a community (see set_community), or everywhere"""
+        if not self.db:
+            return {}
+        return self._guarded_read('get_stats', self._fetch_stats, self._scope(community), default={})
+    
+    def _fetch_stats(self, community: Optional[str] = None, timeout: Optional[float] = None) -> Dict:
+        if self.mock_mode:
+            return self.db.get_stats(community)
+        
+        # Sum of the counter shards: N small documents instead of every request
+        counter = self._community_counter(community) if community else self.status_counter
+        return {**{field: 0 for field in STATUS_FIELDS}, **counter.read(timeout=timeout)}
+    
+    def _community_counter(self, community: str) -> ShardedCounter:
+        if community not in self._community_counters:
+            self._community_counters[community] = ShardedCounter(
+                self.db, status_counter_name(community), STATS_COUNTER_SHARDS)
+        return self._community_counters[community]
+    
+    def rebuild_stats_counters(self) -> Dict:
+        """Recount requests by status and reset the global and per-community
+        sharded counters to match"""
+        if self.mock_mode:
+            return self.db.rebuild_stats_counters()
+        
+        stats, by_community = count_statuses(self._fetch_history())
+        self.status_counter.reset(stats)
+        for community, counts in by_community.items():
+            self._community_counter(community).reset(counts)
+        return stats
+    
+    # Per-user counters
+    def get_user_counters(self, user_id: str) -> Dict:
+        """Requested / in-progress / fixed / gratitude counts from one user document"""
+        if not self.db:
+            return empty_counters()
+        return self._guarded_read('get_user_counters', self._fetch_user_counters,
+                                  user_id, default=empty_counters())
+    
+    def _fetch_user_counters(self, user_id: str, timeout: Optional[float] = None) -> Dict:
+        if self.mock_mode:
+            return self.db.get_user_counters(user_id)
+        
+        doc = self.db.collection('users').document(user_id).get(['counters'], timeout=timeout)
+        counters = (doc.to_dict() or {}).get('counters', {}) if doc.exists else {}
+        return {**empty_counters(), **counters}
+    
+    def rebuild_user_counters(self) -> int:
+        """Recompute every user's counters from request history (for backfills).
+        
+        Returns the number of user documents written. Run it while writes are
+        quiet: increments that land mid-rebuild may be overwritten.
+        """
+        if self.mock_mode:
+            return self.db.rebuild_user_counters()
+        
+        rebuilt = rebuild_counters(self._fetch_history())
+        written = 0
+        batch = self.db.batch()
+        for user in self.db.collection('users').select([]).stream():
+            batch.update(user.reference, {'counters': rebuilt.get(user.id, empty_counters())})
+            written += 1
+            if written % 400 == 0:
+                batch.commit()
+                batch = self.db.batch()
+        batch.commit()
+        return written
+    
+    # Recommended-for-you feeds
+    def get_feed(self, user_id: str, limit: int = FEED_SIZE) -> List[Dict]:
+        """Open requests this user can fix, best match first, from one feed document"""
+        if not self.db:
             return []
+        return self._guarded_read('get_feed', self._fetch_feed, user_id, limit, default=[])
     
-    def get_stats(self) -> Dict:
-        if self.mock_mode or not self.db:
-            return self.db.get_stats() if self.db else {}
+    def _fetch_feed(self, user_id: str, limit: int = FEED_SIZE,
+                    timeout: Optional[float] = None) -> List[Dict]:
+        if self.mock_mode:
+            return self.db.get_feed(user_id, limit)
         
-        try:
-            all_requests = self.get_all_requests()
-            stats = {
-                'total': len(all_requests),
-                'open': 0,
-                'assigned': 0,
-                'resolved': 0
-            }
+        doc = self.db.collection(FEEDS_COLLECTION).document(user_id).get(timeout=timeout)
+        return ranked((doc.to_dict() or {}).get('items', {}) if doc.exists else {}, limit)
+    
+    def rebuild_feeds(self) -> int:
+        """Recompute every feed from the open requests, and users' `skill_tags`.
+        
+        Needed once for users and requests written before feeds existed, or
+        after a user changes their skills. Returns the number of feeds written.
+        """
+        if self.mock_mode:
+            return self.db.rebuild_feeds()
+        
+        users = []
+        for doc in self.db.collection('users').select(['skills', 'location', 'community']).stream():
+            users.append({**doc.to_dict(), 'id': doc.id})
+        open_requests = []
+        for doc in self.db.collection('repair_requests').where('status', '==', 'open').stream():
+            open_requests.append({**doc.to_dict(), 'id': doc.id})
+        # Repairers only get requests from their own community
+        users_by_community = group_by_community(users)
+        rebuilt = {}
+        for community, requests in group_by_community(open_requests).items():
+            rebuilt.update(rebuild_feeds(requests, users_by_community.get(community, [])))
+        
+        feeds = self.db.collection(FEEDS_COLLECTION)
+        writes = [('update', self.db.collection('users').document(user['id']),
+                   {'skill_tags': skill_tags(user.get('skills'))}) for user in users]
+        writes += [('update', self.db.collection('repair_requests').document(req['id']),
+                    {'feed_user_ids': req['feed_user_ids']}) for req in open_requests]
+        writes += [('delete', doc.reference) for doc in feeds.select([]).stream()
+                   if doc.id not in rebuilt]
+        writes += [('set', feeds.document(user_id), {'items': items})
+                   for user_id, items in rebuilt.items()]
+        batch = self.db.batch()
+        for written, (method, *args) in enumerate(writes, 1):
+            getattr(batch, method)(*args)
+            if written % 400 == 0:
+                batch.commit()
+                batch = self.db.batch()
+        batch.commit()
+        return len(rebuilt)
+    
+    # Event log
+    def read_events(self, community: str, after_seq: int = 0, limit: int = 500) -> List[Dict]:
+        """Events of `community`'s stream numbered after `after_seq`, oldest first.
+        
+        For consumers (see event_log.EventSubscription); failures raise
+        instead of degrading, so a consumer never mistakes an outage for an
+        empty log.
+        """
+        if self.mock_mode:
+            return self.db.read_events(community, after_seq, limit)
+        
+        query = (self.db.collection(EVENTS_COLLECTION)
+                 .where('community', '==', community)
+                 .where('seq', '>', after_seq)
+                 .order_by('seq')
+                 .limit(limit))
+        events = []
+        for doc in query.stream():
+            event = doc.to_dict()
+            for field in SEQUENCING_FIELDS:
+                event.pop(field, None)
+            events.append(event)
+        return events
+    
+    def get_event_heads(self) -> Dict[str, int]:
+        """Sequence number of the newest event in each community's stream.
+        
+        In Firestore this first numbers the events appended since the last
+        call (see _sequence_events), so the heads cover everything committed.
+        """
+        if self.mock_mode:
+            return self.db.get_event_heads()
+        pending = (self.db.collection(EVENTS_COLLECTION)
+                   .where('seq', '==', None)
+                   .limit(EVENT_SEQUENCE_BATCH))
+        for community in sorted({(doc.to_dict() or {}).get('community')
+                                 for doc in pending.select(['community']).stream()}):
+            self._sequence_events(community)
+        return {doc.id: (doc.to_dict() or {}).get('last', 0)
+                for doc in self.db.collection(EVENT_SEQUENCES_COLLECTION).stream()}
+    
+    def get_event_checkpoint(self, name: str) -> Optional[Dict[str, int]]:
+        """Positions subscriber `name` last committed, or None if it never has"""
+        if self.mock_mode:
+            return self.db.get_event_checkpoint(name)
+        snap = self.db.collection(EVENT_CHECKPOINTS_COLLECTION).document(name).get()
+        return (snap.to_dict() or {}).get('positions', {}) if snap.exists else None
+    
+    def save_event_checkpoint(self, name: str, positions: Dict[str, int]):
+        if self.mock_mode:
+            return self.db.save_event_checkpoint(name, positions)
+        self.db.collection(EVENT_CHECKPOINTS_COLLECTION).document(name).set({
+            'positions': positions,
+            'updated_at': firestore.SERVER_TIMESTAMP
+        })
+    
+    def _event_writes(self, writer, events: List[Dict]) -> int:
+        """Append `events` unnumbered; returns the writes added.
+        
+        Each event is a blind create under an auto id, stamped with the
+        commit time and its place in the commit, so a request transaction
+        reads nothing for the log and concurrent writers in one community
+        don't contend on its sequence document. _sequence_events numbers
+        them later.
+        """
+        for ordinal, event in enumerate(events):
+            writer.create(self.db.collection(EVENTS_COLLECTION).document(), {
+                **event, 'seq': None, 'recorded_at': firestore.SERVER_TIMESTAMP, 'ordinal': ordinal})
+        return len(events)
+    
+    def _sequence_events(self, community: str) -> int:
+        """Number `community`'s pending events in commit order; returns how many.
+        
+        Each transaction takes up to EVENT_SEQUENCE_BATCH pending events and
+        the stream's head together, so two sequencers racing on a stream
+        abort one another instead of handing out a number twice. Only
+        readers of the log write the head, never request transactions.
+        """
+        head_ref = self.db.collection(EVENT_SEQUENCES_COLLECTION).document(community)
+        pending = (self.db.collection(EVENTS_COLLECTION)
+                   .where('community', '==', community)
+                   .where('seq', '==', None)
+                   .order_by('recorded_at')
+                   .order_by('ordinal')
+                   .limit(EVENT_SEQUENCE_BATCH))
+        
+        @firestore.transactional
+        def assign(transaction):
+            snaps = list(pending.stream(transaction=transaction))
+            if not snaps:
+                return 0
+            head = head_ref.get(transaction=transaction)
+            last = (head.to_dict() or {}).get('last', 0) if head.exists else 0
+            for seq, snap in enumerate(snaps, last + 1):
+                transaction.update(snap.reference, {'seq': seq})
+            transaction.set(head_ref, {'last': last + len(snaps)})
+            return len(snaps)
+        
+        numbered = 0
+        while True:
+            count = assign(self.db.transaction())
+            numbered += count
+            if count < EVENT_SEQUENCE_BATCH:
+                return numbered
+    
+    # Leaderboards
+    def get_leaderboards(self, board_ids: List[str]) -> Dict[str, Dict]:
+        """Top repairers on each board, best first, in one batched read.
+        
+        Boards are OVERALL, skill_board(skill) and month_board(date). Each
+        comes back as {'top': [{'user_id', 'name', 'count'}]}, and the overall
+        board also carries 'skills' (resolved repairs per skill) and 'resolved'.
+        In Firestore a board can be up to LEADERBOARD_REFRESH_SECONDS behind.
+        """
+        if not self.db or not board_ids:
+            return {}
+        return self._guarded_read('get_leaderboards', self._fetch_leaderboards,
+                                  tuple(board_ids), default={})
+    
+    def _fetch_leaderboards(self, board_ids, timeout: Optional[float] = None) -> Dict[str, Dict]:
+        if self.mock_mode:
+            return self.db.get_leaderboards(board_ids)
+        
+        refs = [self.db.collection(LEADERBOARDS_COLLECTION).document(board) for board in board_ids]
+        found = {snap.id: snap.to_dict() for snap in self.db.get_all(refs, timeout=timeout) if snap.exists}
+        now = naive(datetime.now(timezone.utc))
+        for board in board_ids:
+            refreshed_at = found.get(board, {}).get('updated_at')
+            if not isinstance(refreshed_at, datetime) or \
+                    (now - naive(refreshed_at)).total_seconds() >= LEADERBOARD_REFRESH_SECONDS:
+                found[board] = self._refresh_leaderboard(board, timeout=timeout)
+        boards = {board: {'top': found.get(board, {}).get('top', [])} for board in board_ids}
+        if OVERALL in boards:
+            totals = self.leaderboard_totals.read(timeout=timeout)
+            boards[OVERALL].update({'skills': totals.get('skills', {}), 'resolved': totals.get('resolved', 0)})
+        return boards
+    
+    def _refresh_leaderboard(self, board: str, timeout: Optional[float] = None) -> Dict:
+        """Recompute one board from the repairers' `leaderboard_counts` and store it.
+        
+        Resolves only bump the repairer's own count, so they neither read nor
+        write the shared board document; readers rebuild it from a top-K
+        query at most once per LEADERBOARD_REFRESH_SECONDS. Demo repairers
+        without a user document aren't ranked.
+        """
+        field = f'leaderboard_counts.{board}'
+        query = (self.db.collection('users')
+                 .order_by(field, direction=firestore.Query.DESCENDING)
+                 .limit(LEADERBOARD_SIZE)
+                 .select(['name', field]))
+        top = []
+        for doc in query.stream(timeout=timeout):
+            data = doc.to_dict()
+            count = (data.get('leaderboard_counts') or {}).get(board)
+            if count:
+                top.append({'user_id': doc.id, 'name': data.get('name') or 'Anonymous', 'count': count})
+        top.sort(key=lambda e: (-e['count'], e['name']))
+        self.db.collection(LEADERBOARDS_COLLECTION).document(board).set(
+            {'top': top, 'updated_at': firestore.SERVER_TIMESTAMP})
+        return {'top': top}
+    
+    def rebuild_leaderboards(self) -> int:
+        """Recompute every leaderboard, and each repairer's board counts, from
+        request history (for backfills; run it while writes are quiet).
+        Returns the number of boards written."""
+        if self.mock_mode:
+            return self.db.rebuild_leaderboards()
+        
+        users = {doc.id: doc.to_dict() for doc in self.db.collection('users').select(['name']).stream()}
+        boards = rebuild_leaderboards(self._fetch_history(),
+                                      {user_id: data.get('name') for user_id, data in users.items()})
+        user_counts = defaultdict(dict)
+        for board, doc in boards.items():
+            for user_id, count in doc.pop('counts').items():
+                user_counts[user_id][board] = count
+        overall = boards.get(OVERALL, {})
+        self.leaderboard_totals.reset({'resolved': overall.pop('resolved', 0),
+                                       'skills': overall.pop('skills', {})})
+        
+        collection = self.db.collection(LEADERBOARDS_COLLECTION)
+        writes = [('delete', doc.reference) for doc in collection.select([]).stream() if doc.id not in boards]
+        writes += [('set', collection.document(board), {**doc, 'updated_at': firestore.SERVER_TIMESTAMP})
+                   for board, doc in boards.items()]
+        writes += [('update', self.db.collection('users').document(user_id),
+                    {'leaderboard_counts': user_counts.get(user_id, {})}) for user_id in users]
+        batch = self.db.batch()
+        for written, (method, *args) in enumerate(writes, 1):
+            getattr(batch, method)(*args)
+            if written % 400 == 0:
+                batch.commit()
+                batch = self.db.batch()
+        batch.commit()
+        return len(boards)
+    
+    # Priority queue
+    def get_priority_queue(self, limit: int = 50, community: Optional[str] = None) -> List[Dict]:
+        """Open requests most in need of a repairer first: urgent and long-waiting"""
+        if not self.db:
+            return []
+        return self._guarded_read('get_priority_queue', self._fetch_priority_queue,
+                                  limit, self._scope(community), default=[])
+    
+    def _fetch_priority_queue(self, limit: int = 50, community: Optional[str] = None,
+                              timeout: Optional[float] = None) -> List[Dict]:
+        if self.mock_mode:
+            return self.db.get_priority_queue(limit, community=community)
+        
+        # Needs a composite index on (status, priority_score desc), and on
+        # (community, status, priority_score desc) for the scoped query
+        query = self.db.collection('repair_requests').where('status', '==', 'open')
+        if community:
+            query = query.where('community', '==', community)
+        query = (query
+                 .order_by('priority_score', direction=firestore.Query.DESCENDING)
+                 .limit(limit)
+                 .select(list(SUMMARY_FIELDS)))
+        return [{**doc.to_dict(), 'id': doc.id} for doc in query.stream(timeout=timeout)]
+    
+    # Impact rollups
+    def get_impact_summary(self) -> Dict:
+        """All-time and this-month impact from two rollup buckets"""
+        if not self.db:
+            return {}
+        this_month = bucket_ids(datetime.now())[2]
+        docs = self._guarded_read('get_rollups', self._fetch_rollups,
+                                  (ALL_TIME, this_month), default={})
+        all_time = summarize(docs.get(ALL_TIME))
+        month = summarize(docs.get(this_month))
+        return {
+            'items_saved': all_time['resolved'],
+            'items_saved_this_month': month['resolved'],
+            'kg_saved': all_time['kg_saved'],
+            'kg_saved_this_month': month['kg_saved'],
+            'created_this_month': month['created'],
+            'median_hours_to_resolve': all_time['median_hours_to_resolve'],
+            'kg_by_skill': all_time['kg_by_skill'],
+        }
+    
+    def get_rollup_series(self, period: str = 'day', count: int = 30) -> List[Dict]:
+        """Summaries for the last `count` day/week/month buckets, oldest first"""
+        if not self.db:
+            return []
+        ids = tuple(recent_bucket_ids(period, count))
+        docs = self._guarded_read('get_rollups', self._fetch_rollups, ids, default={})
+        return [{'bucket': bucket, **summarize(docs.get(bucket))} for bucket in ids]
+    
+    def _fetch_rollups(self, ids, timeout: Optional[float] = None) -> Dict[str, Dict]:
+        if self.mock_mode:
+            return self.db.get_rollups(ids)
+        
+        # One batched get of every bucket's shards
+        return read_counters(self.db, [self._rollup_counter(bucket) for bucket in ids], timeout=timeout)
+    
+    def _rollup_counter(self, bucket: str) -> ShardedCounter:
+        return ShardedCounter(self.db, bucket, ROLLUP_SHARDS, collection=ROLLUPS_COLLECTION)
+    
+    def rebuild_rollups(self) -> int:
+        """Recompute every rollup bucket from request history. Returns the bucket count."""
+        if self.mock_mode:
+            return self.db.rebuild_rollups()
+        
+        rebuilt = rebuild_rollups(self._fetch_history())
+        rollups = self.db.collection(ROLLUPS_COLLECTION)
+        # Bucket documents don't exist, only their shards; list_documents
+        # still finds them
+        buckets = {ref.id for ref in rollups.list_documents()} | set(rebuilt)
+        writes = 0
+        batch = self.db.batch()
+        for bucket in buckets:
+            counter = self._rollup_counter(bucket)
+            for shard in counter.shards.select([]).stream():
+                batch.delete(shard.reference)
+                writes += 1
+            # Also drops a bucket written as one document, before sharding
+            batch.delete(rollups.document(bucket))
+            writes += 1
+            if bucket in rebuilt:
+                batch.set(counter.shards.document('0'), rebuilt[bucket])
+                writes += 1
+            if writes >= 400:
+                batch.commit()
+                batch = self.db.batch()
+                writes = 0
+        batch.commit()
+        return len(rebuilt)
+    
+    def backfill_description_previews(self) -> int:
+        """Add `description_preview` to requests written before it existed"""
+        if self.mock_mode:
+            return 0  # the mock database starts empty, so every request has one
+        
+        written = 0
+        batch = self.db.batch()
+        for collection in ('repair_requests', ARCHIVE_COLLECTION):
+            for doc in self.db.collection(collection).select(['description', 'description_preview']).stream():
+                data = doc.to_dict()
+                if 'description_preview' in data:
+                    continue
+                batch.update(doc.reference, {'description_preview': description_preview(data.get('description'))})
+                written += 1
+                if written % 400 == 0:
+                    batch.commit()
+                    batch = self.db.batch()
+        batch.commit()
+        return written
+    
+    def backfill_priority_scores(self) -> int:
+        """Add `priority_score` to open requests written before it existed"""
+        if self.mock_mode:
+            return 0  # the mock database scores every request it creates
+        
+        written = 0
+        batch = self.db.batch()
+        query = (self.db.collection('repair_requests').where('status', '==', 'open')
+                 .select(['urgency', 'created_at', 'priority_score']))
+        for doc in query.stream():
+            data = doc.to_dict()
+            if 'priority_score' in data:
+                continue
+            batch.update(doc.reference, {'priority_score': priority_score(data)})
+            written += 1
+            if written % 400 == 0:
+                batch.commit()
+                batch = self.db.batch()
+        batch.commit()
+        return written
+    
+    def find_duplicates(self, window_minutes: int = 30) -> Dict[str, List[List[Dict]]]:
+        """Likely duplicate live requests and users left by resubmitted forms.
+        
+        Report only: each group is oldest first, and removing the extras is
+        left to an admin (rebuild counters, stats and rollups afterwards).
+        """
+        window = timedelta(minutes=window_minutes)
+        if self.mock_mode:
+            return {'requests': duplicate_requests(self.db.requests, window),
+                    'users': duplicate_users(self.db.get_all_users())}
+        
+        requests = self.db.collection('repair_requests').select(
+            ['requester_id', 'item', 'description', 'status', 'created_at'])
+        users = self.db.collection('users').select(['name', 'location', 'created_at'])
+        return {
+            'requests': duplicate_requests(({**doc.to_dict(), 'id': doc.id} for doc in requests.stream()),
+                                           window),
+            'users': duplicate_users({**doc.to_dict(), 'id': doc.id} for doc in users.stream()),
+        }
+    
+    # Communities
+    def _register_communities(self, locations, writer=None):
+        """Make sure each location's community has a `communities` document"""
+        names = {community_id(location): community_name(location) for location in locations}
+        for community, name in names.items():
+            ref = self.db.collection(COMMUNITIES_COLLECTION).document(community)
+            if writer is None:
+                ref.set({'name': name}, merge=True)
+            else:
+                writer.set(ref, {'name': name}, merge=True)
+    
+    def list_communities(self) -> List[Dict]:
+        """Every community as {'id', 'name'}, by id"""
+        if not self.db:
+            return []
+        return self._guarded_read('list_communities', self._fetch_communities, default=[])
+    
+    def _fetch_communities(self, timeout: Optional[float] = None) -> List[Dict]:
+        if self.mock_mode:
+            return self.db.list_communities()
+        
+        docs = self.db.collection(COMMUNITIES_COLLECTION).stream(timeout=timeout)
+        return sorted(({'id': doc.id, 'name': (doc.to_dict() or {}).get('name', doc.id)} for doc in docs),
+                      key=lambda c: c['id'])
+    
+    def _across_communities(self, name: str, fetch, communities: Optional[List[str]], *args,
+                            default) -> Dict[str, object]:
+        """One guarded read per community, run in parallel: {community: result}.
+        
+        `fetch` takes the community as its last argument before `timeout`.
+        Each read has its own deadline, so one slow community degrades to its
+        last good result (or `default`) without holding up the rest.
+        """
+        if communities is None:
+            communities = [c['id'] for c in self.list_communities()]
+        futures = {community: self._community_executor.submit(
+                       self._guarded_read, name, fetch, *args, community, default=default)
+                   for community in communities}
+        return {community: future.result() for community, future in futures.items()}
+    
+    def get_stats_by_community(self, communities: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Admin view: per-status counts for each community (all of them by default)"""
+        if not self.db:
+            return {}
+        return self._across_communities('get_stats', self._fetch_stats, communities, default={})
+    
+    def get_requests_across_communities(self, status: str = None, summary: bool = True,
+                                        communities: Optional[List[str]] = None) -> List[Dict]:
+        """Admin view: live requests from several communities, newest first.
+        
+        Runs one community-scoped query per community in parallel instead of
+        one scan of the whole collection.
+        """
+        if not self.db:
+            return []
+        results = self._across_communities('get_all_requests', self._fetch_all_requests, communities,
+                                           status, summary, default=[])
+        merged = [req for requests in results.values() for req in requests]
+        merged.sort(key=lambda r: r.get('created_at') or datetime.min, reverse=True)
+        return merged
+    
+    def migrate_communities(self, dry_run: bool = False, recompute: bool = False) -> Dict[str, int]:
+        """Re-home users and live and archived requests into their communities.
+        
+        Sets `community` from the location on every document that lacks it
+        (or on all of them with `recompute`), and registers each community.
+        Returns the number of documents changed per collection. Rebuild the
+        stats counters and feeds afterwards.
+        """
+        if self.mock_mode:
+            if dry_run:
+                return {'users': sum(1 for u in self.db.users if not u.get('community')),
+                        'requests': sum(1 for r in self.db.history() if not r.get('community'))}
+            return self.db.migrate_communities(recompute)
+        
+        changed = {'users': 0, 'requests': 0}
+        locations = []
+        written = 0
+        batch = self.db.batch()
+        for key, collection, field in (('users', 'users', 'location'),
+                                       ('requests', 'repair_requests', 'requester_location'),
+                                       ('requests', ARCHIVE_COLLECTION, 'requester_location')):
+            for doc in self.db.collection(collection).select([field, 'community']).stream():
+                data = doc.to_dict()
+                locations.append(data.get(field))
+                community = community_id(data.get(field))
+                if data.get('community') == community or (data.get('community') and not recompute):
+                    continue
+                changed[key] += 1
+                if dry_run:
+                    continue
+                batch.update(doc.reference, {'community': community})
+                written += 1
+                if written % 400 == 0:
+                    batch.commit()
+                    batch = self.db.batch()
+        if not dry_run:
+            batch.commit()
+            self._register_communities(locations)
+        return changed
+    
+    # Analytics
+    def get_request_frame(self) -> RequestFrame:
+        """Every live and archived request as columns, for analytics.
+        
+        Scans both collections once, projected to `ANALYTICS_FIELDS`.
+        """
+        if self.mock_mode:
+            return RequestFrame.from_requests(self.db.history())
+        
+        requests = []
+        for collection in ('repair_requests', ARCHIVE_COLLECTION):
+            for doc in self.db.collection(collection).select(list(ANALYTICS_FIELDS)).stream():
+                requests.append(doc.to_dict())
+        return RequestFrame.from_requests(requests)
+    
+    # Hot/cold tiering
+    def _fetch_history(self) -> List[Dict]:
+        """Every request, live and archived (for rebuilds)"""
+        if self.mock_mode:
+            return self.db.history()
+        
+        result = []
+        for collection in ('repair_requests', ARCHIVE_COLLECTION):
+            for req in self.db.collection(collection).stream():
+                data = req.to_dict()
+                data['id'] = req.id
+                result.append(data)
+        return result
+    
+    def archive_resolved_requests(self, older_than_days: int = ARCHIVE_AFTER_DAYS,
+                                  batch_size: int = 200,
+                                  checkpoint_path: str = '.archive_checkpoint.json',
+                                  max_batches: Optional[int] = None) -> Dict:
+        """Move resolved requests older than `older_than_days` into the archive.
+        
+        Works oldest-first in batches. Each batch copies the documents and
+        deletes the live ones in a single write batch, so a request is never
+        in both places or neither. Progress is checkpointed after every batch.
+        Returns the checkpoint state, plus 'done' once nothing is left to move.
+        """
+        # Midnight-aligned so an interrupted run resumes if restarted the same day
+        cutoff = datetime.combine(datetime.now().date() - timedelta(days=older_than_days), datetime.min.time())
+        checkpoint = ArchiveCheckpoint(checkpoint_path)
+        state = checkpoint.load(cutoff)
+        
+        while max_batches is None or state['batches'] < max_batches:
+            moved, last = self._archive_batch(cutoff, batch_size, cursor_value(state))
+            if not moved:
+                checkpoint.clear()
+                return {**state, 'done': True}
+            state['archived'] += moved
+            state['batches'] += 1
+            state['cursor'], state['cursor_id'] = last[0].isoformat(), last[1]
+            checkpoint.save(state)
+        return {**state, 'done': False}
+    
+    def _archive_batch(self, cutoff: datetime, batch_size: int,
+                       after: Optional[Tuple[datetime, Optional[str]]]):
+        if self.mock_mode:
+            return self.db.archive_resolved(cutoff, batch_size, after)
+        
+        # Document id breaks resolved_at ties, so requests resolved together
+        # on a batch boundary aren't skipped
+        query = (self.db.collection('repair_requests')
+                 .where('status', '==', 'resolved')
+                 .where('resolved_at', '<', cutoff)
+                 .order_by('resolved_at')
+                 .order_by('__name__')
+                 .limit(batch_size))
+        if after is not None:
+            after_time, after_id = after
+            query = query.start_after({'resolved_at': after_time, '__name__': after_id}
+                                      if after_id is not None else {'resolved_at': after_time})
+        docs = list(query.stream())
+        if not docs:
+            return 0, None
+        
+        archive = self.db.collection(ARCHIVE_COLLECTION)
+        archived_at = datetime.now()
+        batch = self.db.batch()
+        for doc in docs:
+            batch.set(archive.document(doc.id), {**doc.to_dict(), 'archived_at': archived_at,
+                                                 'updated_at': firestore.SERVER_TIMESTAMP})
+            batch.delete(doc.reference)
+        batch.commit()
+        return len(docs), (naive(docs[-1].get('resolved_at')), docs[-1].id)
+    
+    # Maintenance
+    def release_stale_assignments(self, cutoff: datetime,
+                                  batch_size: int = MAINTENANCE_BATCH_SIZE) -> Dict[str, int]:
+        """Put up to `batch_size` requests assigned before `cutoff` back to open.
+        
+        Oldest assignment first, in one commit. Returns 'scanned', 'changed'
+        and 'writes' for the batch; call again until fewer than `batch_size`
+        are scanned (MaintenanceScheduler does this).
+        """
+        return self._maintenance_batch('released', 'assigned', 'assigned_at', cutoff, batch_size, {
+            'status': 'open',
+            'assigned_to_id': None,
+            'assigned_at': None,
+            'released_at': datetime.now()
+        })
+    
+    def expire_open_requests(self, cutoff: datetime,
+                             batch_size: int = MAINTENANCE_BATCH_SIZE) -> Dict[str, int]:
+        """Expire up to `batch_size` open requests created before `cutoff` (see
+        release_stale_assignments)"""
+        return self._maintenance_batch('expired', 'open', 'created_at', cutoff, batch_size, {
+            'status': 'expired',
+            'expired_at': datetime.now()
+        })
+    
+    def _maintenance_batch(self, transition_name: str, from_status: str, time_field: str,
+                           cutoff: datetime, batch_size: int, updates: Dict) -> Dict[str, int]:
+        if not self.db:
+            return {'scanned': 0, 'changed': 0, 'writes': 0}
+        self._forget_rerun_reads()
+        if self.mock_mode:
+            changed = self.db.maintenance_batch(transition_name, from_status, time_field,
+                                                cutoff, batch_size, updates)
+            return {'scanned': changed, 'changed': changed, 'writes': changed}
+        
+        query = (self.db.collection('repair_requests')
+                 .where('status', '==', from_status)
+                 .where(time_field, '<', cutoff)
+                 .order_by(time_field)
+                 .limit(batch_size))
+        refs = [doc.reference for doc in query.select([]).stream()]
+        if not refs:
+            return {'scanned': 0, 'changed': 0, 'writes': 0}
+        
+        @firestore.transactional
+        def apply(transaction):
+            # Re-check each request: it may have been claimed or resolved
+            # since the query ran
+            changes = []
+            for snap in self.db.get_all(refs, transaction=transaction):
+                current = {**(snap.to_dict() or {}), 'id': snap.id}
+                due = current.get(time_field)
+                if snap.exists and current.get('status') == from_status and due and naive(due) < cutoff:
+                    changes.append((snap.reference, current, {**current, **updates}))
+            existing_users = self._existing_users(
+                {user_id for _, before, after in changes
+                 for user_id in counter_deltas(transition_name, before, after)})
+            plan = self._plan_batch_writes(transition_name, changes, existing_users)
+            # Leave the rest for the next batch rather than exceed the commit
+            # limit; each change is an update plus an event
+            while changes and 2 * len(changes) + plan['count'] > MAX_BATCH_WRITES:
+                changes = changes[:len(changes) // 2]
+                plan = self._plan_batch_writes(transition_name, changes, existing_users)
+            for ref, _, _ in changes:
+                transaction.update(ref, {**updates, 'updated_at': firestore.SERVER_TIMESTAMP})
+            self._batch_writes(transaction, plan)
+            logged = self._event_writes(transaction, [
+                request_event(transition_name, before, after) for _, before, after in changes])
+            return len(changes), len(changes) + plan['count'] + logged
+        
+        changed, writes = apply(self.db.transaction())
+        return {'scanned': len(refs), 'changed': changed, 'writes': writes}
+    
+    def _plan_batch_writes(self, transition_name: str, changes, existing_users: set) -> Dict:
+        """Derived-data changes for many transitions, summed per document"""
+        users = defaultdict(lambda: defaultdict(int))
+        rollups = defaultdict(lambda: defaultdict(float))
+        status = defaultdict(int)
+        communities = defaultdict(lambda: defaultdict(int))
+        feeds = {}
+        for _, before, after in changes:
+            for user_id, deltas in counter_deltas(transition_name, before, after).items():
+                if user_id in existing_users:
+                    for field, delta in deltas.items():
+                        users[user_id][field] += delta
+            for bucket, fields in rollup_deltas(transition_name, before, after).items():
+                for field, delta in fields.items():
+                    rollups[bucket][field] += delta
+            for field, delta in status_deltas(transition_name, before, after).items():
+                status[field] += delta
+                communities[community_of(after)][field] += delta
+            for user_id, entries in feed_deltas(transition_name, before, after).items():
+                feeds.setdefault(user_id, {}).update(entries)
+        return {'users': users, 'rollups': rollups, 'status': dict(status),
+                'communities': communities, 'feeds': feeds,
+                'count': len(users) + len(rollups) + bool(status) + len(communities) + len(feeds)}
+    
+    def _batch_writes(self, writer, plan: Dict):
+        """Add the writes of a _plan_batch_writes plan to a transaction or batch"""
+        for user_id, deltas in plan['users'].items():
+            writer.update(self.db.collection('users').document(user_id), {
+                f'counters.{field}': firestore.Increment(delta) for field, delta in deltas.items()
+            })
+        for bucket, fields in plan['rollups'].items():
+            self._rollup_counter(bucket).increment(writer, dict(fields), firestore.Increment)
+        self.status_counter.increment(writer, plan['status'], firestore.Increment)
+        for community, deltas in plan['communities'].items():
+            self._community_counter(community).increment(writer, dict(deltas), firestore.Increment)
+        self._feed_writes(writer, plan['feeds'])
+    
+    # Deadlines, rerun budget and circuit breaker
+    def begin_rerun(self):
+        """Start a fresh time budget and read memo for the current script run
+        (call at the top of each page)"""
+        self.last_rerun_at = time.monotonic()
+        self._rerun.budget = RerunBudget(self.rerun_budget)
+        self._rerun.memo = RerunMemo()
+        self._rerun.community = None
+        self._recent_memos.append(self._rerun.memo)
+    
+    def set_community(self, community: Optional[str]):
+        """Scope this run's community-aware reads (requests, users, stats,
+        priority queue) to one community; pages pass community_of(user)"""
+        self._rerun.community = community
+    
+    def _scope(self, community: Optional[str] = None) -> Optional[str]:
+        return community or getattr(self._rerun, 'community', None)
+    
+    def _forget_rerun_reads(self):
+        memo = getattr(self._rerun, 'memo', None)
+        if memo:
+            memo.clear()
+    
+    def get_resilience_metrics(self) -> Dict:
+        budget = getattr(self._rerun, 'budget', None)
+        memo = getattr(self._rerun, 'memo', None)
+        return {
+            'breaker': self.breaker.snapshot(),
+            'call_deadline': self.call_deadline,
+            'write_deadline': self.write_deadline,
+            'rerun_budget': self.rerun_budget,
+            'rerun_calls': budget.calls if budget else 0,
+            'rerun_calls_saved': memo.saved if memo else 0,
+            'rerun_remaining': round(budget.remaining(), 3) if budget else None,
+            **self.resilience_stats
+        }
+    
+    def get_memory_stats(self) -> Dict:
+        """Record memory and archive spill counters of the mock database ({} otherwise)"""
+        if not self.mock_mode or not self.db:
+            return {}
+        return self.db.memory_stats()
+    
+    def get_rerun_read_report(self) -> List[Dict]:
+        """Backend reads made and repeated reads saved, per recent rerun (oldest first)"""
+        return [memo.snapshot() for memo in list(self._recent_memos)]
+    
+    def is_degraded(self) -> bool:
+        """True if this rerun served any cached or empty fallback results"""
+        budget = getattr(self._rerun, 'budget', None)
+        return self.breaker.state != CLOSED or bool(budget and budget.degraded_calls)
+    
+    def _guarded_read(self, name: str, fetch, *args, default):
+        """Run a read under the call deadline, rerun budget and circuit breaker.
+        
+        The fetch runs on a worker thread so the page stops waiting when the
+        deadline passes. When a read can't be made or fails, the last good
+        result for the same call is served instead, falling back to `default`.
+        A read already made successfully in this rerun is served from the memo.
+        """
+        with service_call(name):
+            key = (name, args)
+            memo = getattr(self._rerun, 'memo', None)
+            if memo:
+                result = memo.get(key)
+                if result is not MISSING:
+                    return result
+            budget = getattr(self._rerun, 'budget', None)
+            timeout = budget.call_timeout(self.call_deadline) if budget else self.call_deadline
+            if timeout <= 0:
+                self.resilience_stats['budget_exhausted'] += 1
+                return self._degraded_read(key, default, budget)
+            if not self.breaker.allow():
+                return self._degraded_read(key, default, budget)
+        
+            if budget:
+                budget.calls += 1
+            future = self._executor.submit(fetch, *args, timeout=timeout)
+            try:
+                result = future.result(timeout=timeout)
+            except FutureTimeout:
+                self.resilience_stats['deadline_exceeded'] += 1
+                self.breaker.record_failure()
+                return self._degraded_read(key, default, budget)
+            except Exception:
+                self.breaker.record_failure()
+                return self._degraded_read(key, default, budget)
+        
+            self.breaker.record_success()
+            if memo:
+                memo.put(key, result)
+            with self._last_good_lock:
+                self._last_good[key] = result
+                self._last_good.move_to_end(key)
+                if len(self._last_good) > 256:
+                    self._last_good.popitem(last=False)
+            return result
+    
+    def _degraded_read(self, key, default, budget: Optional[RerunBudget]):
+        self.resilience_stats['degraded_reads'] += 1
+        if budget:
+            budget.degraded_calls += 1
+            if not budget.warned:
+                budget.warned = True
+                st.warning("⚠️ The community database is responding slowly. Some information may be out of date.")
+        with self._last_good_lock:
+            if key in self._last_good:
+                self.resilience_stats['served_from_cache'] += 1
+                return self._last_good[key]
+        return default
+    
+    def _guarded_write(self, action: str, write, *args, default):
+        """Run a write under the write deadline and circuit breaker.
+        
+        The write runs on a worker thread. When the deadline passes the page
+        stops waiting and reports failure, although the write itself can't be
+        cancelled and may still commit.
+        """
+        with service_call(action):
+            self._forget_rerun_reads()
+            if not self.breaker.allow():
+                st.error(f"Error {action}: the database is temporarily unavailable. Please try again shortly.")
+                return default
+        
+            future = self._write_executor.submit(write, *args)
+            try:
+                result = future.result(timeout=self.write_deadline)
+            except FutureTimeout:
+                self.resilience_stats['deadline_exceeded'] += 1
+                self.breaker.record_failure()
+                st.error(f"Error {action}: the database didn't respond in time. "
+                         f"Check again before retrying, it may still have been saved.")
+                return default
+            except Exception as e:
+                self.breaker.record_failure()
+                st.error(f"Error {action}: {e}")
+                return default
+        
+            self.breaker.record_success()
+            return result
+    
+    # Write-behind support
+    def get_write_status(self, doc_id: str) -> str:
+        """'pending', 'committed', 'rejected' or 'failed' for the latest write to a document"""
+        if not self.write_queue:
+            return COMMITTED
+        return self.write_queue.status(doc_id) or COMMITTED
+    
+    def get_pending_writes(self) -> List[Dict]:
+        return self.write_queue.pending() if self.write_queue else []
+    
+    def _enqueue_create(self, op: str, collection: str, data: Dict,
+                        doc_id: Optional[str] = None) -> str:
+        if doc_id is None:
+            if self.mock_mode:
+                doc_id = self.db.allocate_id(collection)
+            else:
+                doc_id = self.db.collection(collection).document().id
+        elif self.write_queue.status(doc_id) in (PENDING, COMMITTED):
+            return doc_id  # resubmitted while the first create is queued or done
+        data['id'] = doc_id
+        self._forget_rerun_reads()
+        return self.write_queue.enqueue(op, doc_id, data)
+    
+    def _apply_write_batch(self, entries: List[Dict]) -> Dict[str, str]:
+        """Commit queued writes for the write-behind worker.
+        
+        Creates go out together in one Firestore batch; status transitions
+        each need their own transaction. An op whose document already has an
+        earlier op waiting for retry is held back to keep per-document order.
+        """
+        results = {}
+        creates = [e for e in entries if e['op'].startswith('create_')]
+        if creates and not self.mock_mode:
+            # Creates replayed after a crash, or resubmitted with an
+            # idempotency key, may have landed already
+            landed = {snap.id for snap in self.db.get_all(
+                [self.db.collection(CREATE_COLLECTIONS[e['op']]).document(e['doc_id']) for e in creates])
+                if snap.exists}
+            results.update({e['op_id']: COMMITTED for e in creates if e['doc_id'] in landed})
+            creates = [e for e in creates if e['doc_id'] not in landed]
+        if creates and not self.mock_mode:
+            requesters = {e['payload'].get('requester_id') for e in creates
+                          if e['op'] == 'create_repair_request'}
+            existing_users = self._existing_users(requesters - {None})
+            existing_users |= {e['doc_id'] for e in creates if e['op'] == 'create_user'}
+            payloads = {}
+            for entry in creates:
+                payload = {k: v for k, v in entry['payload'].items() if k != 'id'}
+                payload.setdefault('created_at', datetime.now())
+                payloads[entry['op_id']] = payload
+            feed_updates = self._plan_fan_out(
+                [(e['doc_id'], payloads[e['op_id']]) for e in creates if e['op'] == 'create_repair_request'])
             
-            for req in all_requests:
-                status = req.get('status', 'open')
-                if status in stats:
-                    stats[status] += 1
+            for entry in creates:
+                payload = payloads[entry['op_id']]
+                payload['updated_at'] = firestore.SERVER_TIMESTAMP
+                if entry['op'] == 'create_user':
+                    payload['counters'] = empty_counters()
+                    payload['skill_tags'] = skill_tags(payload.get('skills'))
+                    payload['community'] = community_id(payload.get('location'))
+                    continue
+                payload.update({'status': 'open', 'resolved_at': None, 'assigned_to_id': None,
+                                'description_preview': description_preview(payload.get('description')),
+                                'priority_score': priority_score(payload),
+                                'community': community_id(payload.get('requester_location'))})
             
-            return stats
-        except Exception as e:
-            st.error(f"Error getting stats: {e}")
-            return {}
\ No newline at end of file
+            batch = self.db.batch()
+            events = []
+            for entry in creates:
+                payload = payloads[entry['op_id']]
+                if entry['op'] == 'create_user':
+                    batch.create(self.db.collection('users').document(entry['doc_id']), payload)
+                    events.append(user_event({**payload, 'id': entry['doc_id']}))
+                    continue
+                batch.create(self.db.collection('repair_requests').document(entry['doc_id']), payload)
+                self._transition_writes(batch, 'created', {}, payload, existing_users)
+                events.append(request_event('created', {}, {**payload, 'id': entry['doc_id']}))
+            self._feed_writes(batch, feed_updates)
+            self._register_communities([e['payload'].get('location') for e in creates
+                                        if e['op'] == 'create_user'], batch)
+            self._event_writes(batch, events)
+            batch.commit()
+            results.update({e['op_id']: COMMITTED for e in creates})
+        
+        blocked = set()
+        for entry in entries:
+            if entry['op_id'] in results:
+                continue
+            doc_id, payload = entry['doc_id'], dict(entry['payload'])
+            if doc_id in blocked:
+                results[entry['op_id']] = PENDING
+                continue
+            try:
+                if entry['op'] == 'create_user':
+                    ok = bool(self._write_user(payload, doc_id))
+                elif entry['op'] == 'create_repair_request':
+                    ok = bool(self._write_repair_request(payload, doc_id))
+                elif entry['op'] == 'assign_repairer':
+                    ok = self._assign_repairer(doc_id, payload['user_id'], payload.get('assigned_at'))
+                elif entry['op'] == 'resolve_request':
+                    ok = self._resolve_request(doc_id, payload['gratitude_note'],
+                                               payload['repairer_id'], payload['resolved_at'])
+                else:
+                    ok = self._add_gratitude_note(doc_id, payload['gratitude_note'])
+                results[entry['op_id']] = COMMITTED if ok else REJECTED
+            except Exception:
+                results[entry['op_id']] = PENDING
+                blocked.add(doc_id)
+        return results
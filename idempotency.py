@@ -0,0 +1,77 @@
+# idempotency.py
+import hashlib
+import json
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+from rollups import naive
+
+# Keep derived ids recognisable next to the backends' own ids
+ID_PREFIXES = {'users': 'user_', 'repair_requests': 'req_'}
+
+# Identical requests from one person this close together are reported as
+# likely duplicates
+DUPLICATE_WINDOW = timedelta(minutes=30)
+
+
+def new_form_key() -> str:
+    """Random token for one submit of a form, kept in st.session_state across
+    its retries and replaced once the create succeeds"""
+    return uuid.uuid4().hex
+
+
+def idempotency_key(form_key: str, fields: Dict) -> str:
+    """Same form session and same submitted values give the same key"""
+    payload = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(f"{form_key}:{payload}".encode('utf-8')).hexdigest()
+
+
+def idempotent_id(collection: str, key: str) -> str:
+    """Deterministic document id for a create carrying `key`"""
+    digest = hashlib.sha256(f"{collection}:{key}".encode('utf-8')).hexdigest()[:20]
+    return f"{ID_PREFIXES.get(collection, '')}{digest}"
+
+
+def _normalized(value) -> str:
+    return ' '.join(str(value or '').lower().split())
+
+
+def _created(record: Dict) -> datetime:
+    created_at = record.get('created_at')
+    return naive(created_at) if isinstance(created_at, datetime) else datetime.min
+
+
+def duplicate_requests(requests: Iterable[Dict], window: timedelta = DUPLICATE_WINDOW) -> List[List[Dict]]:
+    """Groups of requests with the same requester, item and description, each
+    created within `window` of the one before; oldest first in each group"""
+    by_content = defaultdict(list)
+    for req in requests:
+        key = (req.get('requester_id'), _normalized(req.get('item')), _normalized(req.get('description')))
+        by_content[key].append(req)
+
+    groups = []
+    for candidates in by_content.values():
+        if len(candidates) < 2:
+            continue
+        candidates.sort(key=_created)
+        group = candidates[:1]
+        for previous, req in zip(candidates, candidates[1:]):
+            if _created(req) - _created(previous) > window:
+                if len(group) > 1:
+                    groups.append(group)
+                group = []
+            group.append(req)
+        if len(group) > 1:
+            groups.append(group)
+    return groups
+
+
+def duplicate_users(users: Iterable[Dict]) -> List[List[Dict]]:
+    """Groups of users with the same name and location (the sign-in form
+    treats those as one person); oldest first in each group"""
+    by_identity = defaultdict(list)
+    for user in users:
+        by_identity[(_normalized(user.get('name')), _normalized(user.get('location')))].append(user)
+    return [sorted(group, key=_created) for group in by_identity.values() if len(group) > 1]
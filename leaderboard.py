@@ -0,0 +1,127 @@
+# leaderboard.py
+import heapq
+import os
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from rollups import naive
+
+LEADERBOARDS_COLLECTION = 'leaderboards'
+OVERALL = 'overall'
+# Sharded counter with the resolved repairs in total and per skill
+LEADERBOARD_TOTALS = 'leaderboard_totals'
+
+# Repairers kept on each leaderboard
+LEADERBOARD_SIZE = int(os.environ.get('LEADERBOARD_SIZE', '10'))
+# Firestore board documents are recomputed on read once they are this old
+LEADERBOARD_REFRESH_SECONDS = float(os.environ.get('LEADERBOARD_REFRESH_SECONDS', '60'))
+
+
+# Board ids double as document ids and user-document field names, so they
+# stick to [a-z0-9_]
+def skill_slug(skill: Optional[str]) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', (skill or '').lower()).strip('_') or 'general'
+
+
+def skill_board(skill: Optional[str]) -> str:
+    return f"skill_{skill_slug(skill)}"
+
+
+def month_board(ts: datetime) -> str:
+    return f"month_{naive(ts):%Y_%m}"
+
+
+def leaderboard_ids(request: Dict) -> List[str]:
+    """Boards a resolved request counts on: overall, its skill and the month it was fixed"""
+    boards = [OVERALL, skill_board(request.get('skill_needed'))]
+    if isinstance(request.get('resolved_at'), datetime):
+        boards.append(month_board(request['resolved_at']))
+    return boards
+
+
+class TopK:
+    """The `k` repairers with the most resolved repairs, as a bounded min-heap.
+
+    Counts only grow, so offering a repairer's new count after each resolve
+    keeps the board exact: a repairer off the board re-enters as soon as
+    their count beats the smallest one on it. Ties keep whoever got there
+    first.
+    """
+
+    def __init__(self, k: int = LEADERBOARD_SIZE, entries: Iterable[Dict] = ()):
+        self.k = k
+        self._heap = []
+        self._entries = {}
+        for entry in entries:
+            self.offer(entry['user_id'], entry['count'], entry.get('name'))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def offer(self, user_id: str, count: int, name: Optional[str] = None) -> bool:
+        """Record a repairer's current count; returns True if the board changed"""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            if entry['count'] == count and (name is None or entry['name'] == name):
+                return False
+            entry['count'] = count
+            entry['name'] = name or entry['name']
+            self._heap = [(e['count'], uid) for uid, e in self._entries.items()]
+            heapq.heapify(self._heap)
+            return True
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, (count, user_id))
+        elif self._heap and count > self._heap[0][0]:
+            _, dropped = heapq.heapreplace(self._heap, (count, user_id))
+            del self._entries[dropped]
+        else:
+            return False
+        self._entries[user_id] = {'user_id': user_id, 'name': name or 'Anonymous', 'count': count}
+        return True
+
+    def entries(self) -> List[Dict]:
+        """Board rows, best first"""
+        return sorted((dict(e) for e in self._entries.values()), key=lambda e: (-e['count'], e['name']))
+
+
+def rebuild_leaderboards(requests: Iterable[Dict], names: Dict[str, str],
+                         k: int = LEADERBOARD_SIZE) -> Dict[str, Dict]:
+    """Recompute every board from the full request history.
+
+    Returns {board_id: {'top': [...]}}, with the per-repairer counts each
+    board was ranked by under 'counts', and per-skill totals on the overall
+    board.
+    """
+    counts = defaultdict(lambda: defaultdict(int))
+    tops = defaultdict(lambda: TopK(k))
+    skills = defaultdict(int)
+    resolved = [req for req in requests if req.get('status') == 'resolved' and req.get('assigned_to_id')]
+    # Replay in resolve order so ties break the same way as the live boards
+    resolved.sort(key=lambda req: naive(req['resolved_at']) if isinstance(req.get('resolved_at'), datetime)
+                  else datetime.min)
+    for req in resolved:
+        repairer = req['assigned_to_id']
+        for board in leaderboard_ids(req):
+            counts[board][repairer] += 1
+            tops[board].offer(repairer, counts[board][repairer], names.get(repairer))
+        skills[skill_slug(req.get('skill_needed'))] += 1
+    boards = {board: {'top': tops[board].entries(), 'counts': dict(by_user)}
+              for board, by_user in counts.items()}
+    if skills:
+        boards[OVERALL].update({'skills': dict(skills), 'resolved': sum(skills.values())})
+    return boards
+
+
+def board_markdown(top: List[Dict], limit: int = 5, user_id: Optional[str] = None) -> str:
+    """A board as a markdown list, medals for the first three and the viewer in bold"""
+    medals = ['🥇', '🥈', '🥉']
+    lines = []
+    for rank, entry in enumerate(top[:limit]):
+        name = entry.get('name') or 'Anonymous'
+        if entry.get('user_id') == user_id:
+            name = f"**{name} (you)**"
+        repairs = f"{entry['count']} repair{'s' if entry['count'] != 1 else ''}"
+        lines.append(f"{medals[rank] if rank < 3 else f'{rank + 1}.'} {name} — {repairs}")
+    return '\n\n'.join(lines)
@@ -0,0 +1,158 @@
+# maintenance.py
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# Assigned requests untouched for this long go back to open
+ASSIGNMENT_TIMEOUT_DAYS = int(os.environ.get('ASSIGNMENT_TIMEOUT_DAYS', '14'))
+# Open requests nobody claimed for this long are expired
+OPEN_REQUEST_EXPIRY_DAYS = int(os.environ.get('OPEN_REQUEST_EXPIRY_DAYS', '90'))
+MAINTENANCE_BATCH_SIZE = int(os.environ.get('MAINTENANCE_BATCH_SIZE', '100'))
+MAINTENANCE_WRITES_PER_SECOND = float(os.environ.get('MAINTENANCE_WRITES_PER_SECOND', '20'))
+MAINTENANCE_INTERVAL_SECONDS = float(os.environ.get('MAINTENANCE_INTERVAL_SECONDS', '3600'))
+# Hold off while a page rerun or API call started this recently
+MAINTENANCE_QUIET_SECONDS = float(os.environ.get('MAINTENANCE_QUIET_SECONDS', '2'))
+
+# Firestore's limit on writes in one batch or transaction
+MAX_BATCH_WRITES = 500
+
+
+class RateLimiter:
+    """Token bucket: `acquire(n)` blocks until `n` writes fit under `rate` per second"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst or max(rate, 1.0)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def acquire(self, n: float = 1) -> float:
+        """Take `n` tokens, sleeping off any debt; returns the seconds slept"""
+        if self.rate <= 0:
+            return 0.0
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= n
+        if self._tokens >= 0:
+            return 0.0
+        wait = -self._tokens / self.rate
+        self.sleep(wait)
+        return wait
+
+
+class MaintenanceScheduler:
+    """Background upkeep of request statuses.
+
+    Each run releases assignments older than `assignment_timeout_days` back
+    to open and expires open requests older than `expiry_days`. Both scan
+    with indexed queries, oldest first, `batch_size` requests at a time, and
+    write each batch in one commit (see FirebaseService.release_stale_assignments
+    and expire_open_requests). Writes are throttled to `writes_per_second`,
+    and a batch waits (up to `max_quiet_wait` seconds) until no interactive
+    read has started for `quiet_seconds`.
+
+    Call `run_once()` from a cron job (scripts/run_maintenance.py), or
+    `start()` to run every `interval` seconds on a daemon thread.
+    """
+
+    def __init__(self, firebase, interval: float = MAINTENANCE_INTERVAL_SECONDS,
+                 batch_size: int = MAINTENANCE_BATCH_SIZE,
+                 writes_per_second: float = MAINTENANCE_WRITES_PER_SECOND,
+                 assignment_timeout_days: float = ASSIGNMENT_TIMEOUT_DAYS,
+                 expiry_days: float = OPEN_REQUEST_EXPIRY_DAYS,
+                 quiet_seconds: float = MAINTENANCE_QUIET_SECONDS, max_quiet_wait: float = 30.0):
+        self.firebase = firebase
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self.limiter = RateLimiter(writes_per_second, sleep=self._stop.wait)
+        self.assignment_timeout = timedelta(days=assignment_timeout_days)
+        self.expiry = timedelta(days=expiry_days)
+        self.quiet_seconds = quiet_seconds
+        self.max_quiet_wait = max_quiet_wait
+        self.runs = deque(maxlen=20)
+        self.totals = {'runs': 0, 'released': 0, 'expired': 0, 'writes': 0, 'errors': 0}
+        self._thread = None
+        self._run_lock = threading.Lock()
+
+    def run_once(self, now: Optional[datetime] = None, max_batches: Optional[int] = None) -> Dict:
+        """One full pass; returns its statistics (also kept in `runs`)"""
+        with self._run_lock:
+            now = now or datetime.now()
+            stats = {'started_at': now, 'released': 0, 'expired': 0, 'scanned': 0, 'skipped': 0,
+                     'batches': 0, 'writes': 0, 'throttled_seconds': 0.0, 'yielded_seconds': 0.0,
+                     'errors': [], 'done': True}
+            start = time.perf_counter()
+            for key, step, cutoff in (
+                    ('released', self.firebase.release_stale_assignments, now - self.assignment_timeout),
+                    ('expired', self.firebase.expire_open_requests, now - self.expiry)):
+                while not self._stop.is_set():
+                    if max_batches is not None and stats['batches'] >= max_batches:
+                        stats['done'] = False
+                        break
+                    stats['yielded_seconds'] += self._wait_for_quiet()
+                    try:
+                        batch = step(cutoff, self.batch_size)
+                    except Exception as e:
+                        stats['errors'].append(f"{key}: {e}")
+                        break
+                    stats['batches'] += 1
+                    stats['scanned'] += batch['scanned']
+                    stats['skipped'] += batch['scanned'] - batch['changed']
+                    stats['writes'] += batch['writes']
+                    stats[key] += batch['changed']
+                    # Pay for the writes afterwards, so the average stays under the rate
+                    stats['throttled_seconds'] += self.limiter.acquire(batch['writes'])
+                    if batch['scanned'] < self.batch_size or not batch['changed']:
+                        break
+            stats['duration_seconds'] = round(time.perf_counter() - start, 3)
+            self.runs.append(stats)
+            self.totals['runs'] += 1
+            self.totals['errors'] += len(stats['errors'])
+            for key in ('released', 'expired', 'writes'):
+                self.totals[key] += stats[key]
+            return stats
+
+    def _wait_for_quiet(self) -> float:
+        """Sleep while interactive traffic is active; returns the seconds waited"""
+        waited = 0.0
+        while waited < self.max_quiet_wait and not self._stop.is_set():
+            idle = time.monotonic() - getattr(self.firebase, 'last_rerun_at', 0.0)
+            if idle >= self.quiet_seconds:
+                break
+            pause = min(self.quiet_seconds - idle, self.max_quiet_wait - waited)
+            self._stop.wait(pause)
+            waited += pause
+        return waited
+
+    def start(self):
+        """Run every `interval` seconds on a daemon thread until `stop()`"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='maintenance', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.totals['errors'] += 1
+                self.runs.append({'started_at': datetime.now(), 'errors': [str(e)], 'done': False})
+            self._stop.wait(self.interval)
+
+    def report(self) -> List[Dict]:
+        """Recent runs, newest first"""
+        return list(reversed(self.runs))
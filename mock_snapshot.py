@@ -0,0 +1,273 @@
+# mock_snapshot.py
+import gc
+import json
+import mmap
+import os
+import struct
+from array import array
+from collections import OrderedDict
+from copy import deepcopy
+from datetime import datetime, timedelta
+from itertools import repeat
+from operator import itemgetter
+from typing import Dict, List
+
+from feeds import ENTRY_FIELDS
+from leaderboard import rebuild_leaderboards
+from sharded_counters import count_statuses
+
+# Columns are stdlib arrays rather than numpy or Arrow, although analytics
+# depends on both: a restore ends in a dict per record anyway, so vectorized
+# columns would only add a conversion, and the mock database loads without
+# importing either
+MAGIC = b'MRXSNAP1'
+HEADER = struct.Struct('<8sQ')
+
+EPOCH = datetime(1970, 1, 1)
+TS_NONE = -2 ** 63
+TS_MISSING = TS_NONE + 1
+MISSING_CODE = -1
+
+# Stand-in for a field a row doesn't have, while columns are decoded
+_MISSING = object()
+
+
+def _encode_json(value):
+    if isinstance(value, datetime):
+        return {'$dt': value.isoformat()}
+    raise TypeError(f"Cannot snapshot {type(value).__name__}")
+
+
+def _decode_json(obj):
+    if len(obj) == 1 and '$dt' in obj:
+        return datetime.fromisoformat(obj['$dt'])
+    return obj
+
+
+def _value_key(value):
+    # 1, 1.0 and True hash equal, so key on the type as well
+    if isinstance(value, (dict, list)):
+        return (type(value), json.dumps(value, sort_keys=True, default=_encode_json))
+    return (type(value), value)
+
+
+def _is_ts_column(values) -> bool:
+    present = [v for v in values if v is not _MISSING and v is not None]
+    return bool(present) and all(isinstance(v, datetime) and v.tzinfo is None for v in present)
+
+
+def _encode_column(values):
+    """Column descriptor and blobs. Naive datetimes are int64 microseconds;
+    anything else is dictionary-encoded as int32 codes into a JSON value table."""
+    if _is_ts_column(values):
+        stamps = array('q', (
+            TS_MISSING if v is _MISSING else TS_NONE if v is None
+            else (v - EPOCH) // timedelta(microseconds=1)
+            for v in values))
+        return {'kind': 'ts'}, [stamps.tobytes()]
+
+    table, codes, index = [], array('i'), {}
+    for value in values:
+        if value is _MISSING:
+            codes.append(MISSING_CODE)
+            continue
+        key = _value_key(value)
+        code = index.get(key)
+        if code is None:
+            code = index[key] = len(table)
+            table.append(value)
+        codes.append(code)
+    return {'kind': 'values'}, [codes.tobytes(),
+                                json.dumps(table, default=_encode_json).encode('utf-8')]
+
+
+def _blob(buf, span):
+    offset, length = span
+    return buf[offset:offset + length]
+
+
+def _decode_column(buf, desc) -> List:
+    if desc['kind'] == 'ts':
+        stamps = array('q')
+        stamps.frombytes(_blob(buf, desc['blobs'][0]))
+        holes = []
+        if TS_NONE in stamps or TS_MISSING in stamps:
+            holes = [(idx, None if micros == TS_NONE else _MISSING)
+                     for idx, micros in enumerate(stamps) if micros <= TS_MISSING]
+            for idx, _ in holes:
+                stamps[idx] = 0
+        # map() keeps the per-value work in C; this is most of the restore time
+        result = list(map(EPOCH.__add__, map(timedelta, repeat(0), repeat(0), stamps)))
+        for idx, value in holes:
+            result[idx] = value
+        return result
+
+    codes = array('i')
+    codes.frombytes(_blob(buf, desc['blobs'][0]))
+    table = json.loads(bytes(_blob(buf, desc['blobs'][1])), object_hook=_decode_json)
+    # Index -1 picks the trailing sentinel for missing fields
+    table.append(_MISSING)
+    if any(isinstance(value, (dict, list)) for value in table):
+        # Equal dicts and lists share a table entry, but the mock changes
+        # them in place (counters, skills, feeds), so each row gets its own
+        return [deepcopy(value) if isinstance(value, (dict, list)) else value
+                for value in map(table.__getitem__, codes)]
+    if len(table) == 2 and MISSING_CODE not in codes:
+        return [table[0]] * len(codes)
+    return list(map(table.__getitem__, codes))
+
+
+def _encode_rows(rows: List[Dict], blobs: List[bytes], offset: int):
+    names = list(OrderedDict.fromkeys(name for row in rows for name in row))
+    columns = {}
+    for name in names:
+        desc, data = _encode_column([row.get(name, _MISSING) for row in rows])
+        desc['blobs'] = []
+        for blob in data:
+            desc['blobs'].append((offset, len(blob)))
+            blobs.append(blob)
+            offset += len(blob)
+        columns[name] = desc
+    return {'rows': len(rows), 'columns': columns}, offset
+
+
+def _decode_rows(buf, table) -> List[Dict]:
+    dense_names, dense, sparse = [], [], []
+    for name, desc in table['columns'].items():
+        column = _decode_column(buf, desc)
+        if _MISSING in column:
+            sparse.append((name, column))
+        else:
+            dense_names.append(name)
+            dense.append(column)
+    if dense:
+        rows = list(map(dict, map(zip, repeat(dense_names), zip(*dense))))
+    else:
+        rows = [{} for _ in range(table['rows'])]
+    # Fields only some rows have are filled in afterwards, column by column
+    for name, column in sparse:
+        for row, value in zip(rows, column):
+            if value is not _MISSING:
+                row[name] = value
+    return rows
+
+
+def save_snapshot(db, path: str):
+    """Write a MockFirestore to `path` in a columnar layout.
+
+    Each field of each collection is stored as one contiguous column after a
+    JSON manifest, so a restore decodes whole columns at a time instead of
+    inserting records one by one. Call with the database otherwise idle.
+    """
+    with db._lock:
+        request_index = {req['id']: idx for idx, req in enumerate(db.requests)}
+        change_order = array('i', (request_index[request_id] for request_id in db._changes))
+        # Feeds are stored flat, one row per entry. The request fields each
+        # entry copies are filled back in from the request on restore.
+        feed_entries = [{'user_id': user_id, 'request_id': request_id,
+                         'match': entry['match'], 'score': entry['score']}
+                        for user_id, items in db.feeds.items() for request_id, entry in items.items()]
+        collections = {'users': db.users, 'requests': db.requests,
+                       'archive': list(db.archive.values()), 'feed_entries': feed_entries,
+                       'events': [event for stream in db.events.values() for event in stream]}
+        manifest = {
+            'next_user_id': db.next_user_id,
+            'next_request_id': db.next_request_id,
+            'last_update_time': db._last_update_time.isoformat(),
+            'rollups': db.rollups,
+            'status_counter': db.status_counter.read(),
+            'community_counters': {community: counter.read()
+                                   for community, counter in db.community_counters.items()},
+            'leaderboards': db.leaderboard_state(),
+            'event_checkpoints': db.event_checkpoints,
+            'tables': {},
+        }
+        blobs, offset = [], 0
+        for name, rows in collections.items():
+            manifest['tables'][name], offset = _encode_rows(rows, blobs, offset)
+        manifest['change_order'] = (offset, len(change_order) * change_order.itemsize)
+        blobs.append(change_order.tobytes())
+
+    encoded = json.dumps(manifest, default=_encode_json).encode('utf-8')
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(encoded)))
+        f.write(encoded)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(db, path: str):
+    """Replace the contents of an empty MockFirestore with a saved snapshot"""
+    # Restoring allocates millions of objects and none of them form cycles,
+    # so don't let the collector rescan them over and over meanwhile
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        _load(db, path)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _load(db, path: str):
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        magic, manifest_length = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a mock database snapshot")
+        start = HEADER.size + manifest_length
+        manifest = json.loads(bytes(mapped[HEADER.size:start]).decode('utf-8'),
+                              object_hook=_decode_json)
+        body = memoryview(mapped)[start:]
+        try:
+            tables = {name: _decode_rows(body, table) for name, table in manifest['tables'].items()}
+            change_order = array('i')
+            change_order.frombytes(_blob(body, manifest['change_order']))
+        finally:
+            body.release()
+
+    with db._lock:
+        db.users = tables['users']
+        db.requests = tables['requests']
+        db._users_by_id = {user['id']: user for user in db.users}
+        db._requests_by_id = {req['id']: req for req in db.requests}
+        # Past MOCK_MEMORY_BUDGET_MB, archived requests spill to disk as they go in
+        db.archive.clear()
+        db._archived_by_user.clear()
+        for req in tables['archive']:
+            db.archive[req['id']] = req
+            db._index_archived(req)
+        db.feeds = {}
+        for row in tables.get('feed_entries', []):
+            req = db._requests_by_id[row['request_id']]
+            entry = {field: req.get(field) for field in ENTRY_FIELDS}
+            entry['match'], entry['score'] = row['match'], row['score']
+            db.feeds.setdefault(row['user_id'], {})[row['request_id']] = entry
+        db._index_communities()
+        db._index_skill_tags()
+        db._index_priority()
+        changed = list(map(db.requests.__getitem__, change_order))
+        db._changes = OrderedDict(zip(map(itemgetter('id'), changed),
+                                      map(itemgetter('updated_at'), changed)))
+        db.next_user_id = manifest['next_user_id']
+        db.next_request_id = manifest['next_request_id']
+        db._last_update_time = datetime.fromisoformat(manifest['last_update_time'])
+        db.rollups = manifest['rollups']
+        db.status_counter.reset(manifest['status_counter'])
+        if 'community_counters' in manifest:
+            community_counters = manifest['community_counters']
+        else:
+            # Saved before communities existed
+            community_counters = count_statuses(db.history())[1]
+        db.community_counters.clear()
+        for community, counts in community_counters.items():
+            db.community_counters[community].reset(counts)
+        # Snapshots saved before the event log existed start with an empty one
+        db.load_event_log(tables.get('events', []), manifest.get('event_checkpoints'))
+        if 'leaderboards' in manifest:
+            db.load_leaderboards(manifest['leaderboards'])
+        else:
+            # Saved before leaderboards existed
+            db.load_leaderboards(rebuild_leaderboards(
+                db.history(), {user['id']: user.get('name') for user in db.users}))
@@ -1,6 +1,8 @@
 # pages/1_📝_Log_Request.py
 import streamlit as st
 from firebase_service import FirebaseService
+from profiler import finish_rerun_profile, mark_section, start_rerun_profile
+from idempotency import idempotency_key, new_form_key
 from datetime import datetime
 
 st.set_page_config(page_title="Log Repair Request", page_icon="📝")
@@ -17,9 +19,18 @@ if 'current_user' not in st.session_state or st.session_state.current_user is No
     st.stop()
 
 firebase = FirebaseService.get_instance()
+firebase.begin_rerun()
 user = st.session_state.current_user
+start_rerun_profile("Log Request", user, firebase.mock_mode)
+
+# Key for the current submit: sending the same values again (double click,
+# rerun, retry after an error) returns the request already created instead
+# of a new one. A confirmed create replaces it, so logging the same repair
+# again later is a new request.
+form_key = st.session_state.setdefault('log_request_form_key', new_form_key())
 
 # Log request form
+mark_section("Form")
 with st.form("log_request_form"):
     st.markdown(f"**Requester:** {user['name']} ({user['location']})")
     
@@ -63,11 +74,16 @@ with st.form("log_request_form"):
                 'status': 'open'
             }
             
-            request_id = firebase.create_repair_request(request_data)
+            request_id = firebase.create_repair_request(
+                request_data, idempotency_key=idempotency_key(form_key, request_data))
             if request_id:
+                st.session_state.log_request_form_key = new_form_key()
                 st.success("✅ Repair request logged successfully!")
                 st.balloons()
-                st.info("Your request is now visible to the community. Someone with the right skills will offer to help!")
+                if firebase.get_write_status(request_id) == 'pending':
+                    st.info("⏳ Your request is saved and syncing to the community board. It will appear for neighbors in a moment.")
+                else:
+                    st.info("Your request is now visible to the community. Someone with the right skills will offer to help!")
                 
                 # Show next steps
                 st.markdown("### What happens next?")
@@ -86,4 +102,6 @@ with st.form("log_request_form"):
 # Back button
 st.divider()
 if st.button("← Back to Main Page"):
-    st.switch_page("app.py")
\ No newline at end of file
+    st.switch_page("app.py")
+
+finish_rerun_profile()
@@ -1,7 +1,11 @@
 # pages/2_🔍_Browse_Requests.py
 import streamlit as st
 from firebase_service import FirebaseService
-from datetime import datetime
+from communities import community_name, community_of
+from profiler import finish_rerun_profile, mark_section, start_rerun_profile
+from delta_sync import RequestSyncCache
+from request_cards import render_request_cards
+from entity_store import PREFETCH_DETAILS, entity_store
 
 st.set_page_config(page_title="Browse Repair Requests", page_icon="🔍")
 
@@ -17,13 +21,19 @@ if 'current_user' not in st.session_state or st.session_state.current_user is No
     st.stop()
 
 firebase = FirebaseService.get_instance()
+firebase.begin_rerun()
 user = st.session_state.current_user
+community = community_of(user)
+firebase.set_community(community)
+start_rerun_profile("Browse Requests", user, firebase.mock_mode)
+st.caption(f"📍 Showing requests in {community_name(user.get('location'))}")
 
 # Filters
+mark_section("Filters")
 st.sidebar.header("🔍 Filters")
 status_filter = st.sidebar.multiselect(
     "Status",
-    ["open", "assigned", "resolved"],
+    ["open", "assigned", "resolved", "expired"],
     default=["open", "assigned"]
 )
 
@@ -41,10 +51,18 @@ urgency_filter = st.sidebar.multiselect(
     default=["High", "Medium", "Low"]
 )
 
-# Get all requests
-all_requests = firebase.get_all_requests()
+sort_order = st.sidebar.radio("Sort by", ["⚡ Priority", "🆕 Newest"])
+
+# Get all requests (summary fields only; the detail page loads the full record).
+# After the first load only requests changed since the last rerun are fetched.
+mark_section("Load requests")
+request_sync = st.session_state.setdefault(f'request_sync_{community}', RequestSyncCache())
+all_requests = request_sync.sync(firebase)
+store = entity_store(st.session_state)
+store.observe(all_requests)
 
 # Apply filters
+mark_section("Filter")
 filtered_requests = []
 for req in all_requests:
     if req.get('status') not in status_filter:
@@ -57,65 +75,38 @@ for req in all_requests:
         continue
     filtered_requests.append(req)
 
-# Display results
+# Priority: the most urgent, longest-waiting open requests first, then the
+# rest in their usual newest-first order
+mark_section("Priority order")
+if sort_order == "⚡ Priority" and "open" in status_filter:
+    queue = firebase.get_priority_queue(limit=100)
+    rank = {req['id']: position for position, req in enumerate(queue)}
+    filtered_requests.sort(key=lambda r: (
+        rank.get(r['id'], len(rank)) if r.get('status') == 'open' else len(rank) + 1,
+        -(r.get('priority_score') or 0) if r.get('status') == 'open' else 0))
+
+# Display results: one page of cards in a single payload, plus one picker
+mark_section("Cards")
 if not filtered_requests:
     st.info("No repair requests match your filters. Try adjusting them or check back later!")
 else:
     st.success(f"Found {len(filtered_requests)} repair request(s)")
+    shown, chosen = render_request_cards(filtered_requests, user['id'], key='browse')
     
-    for req in filtered_requests:
-        with st.container():
-            col1, col2 = st.columns([3, 1])
-            
-            with col1:
-                # Status badge
-                status = req.get('status', 'open')
-                status_color = {
-                    'open': '🟠',
-                    'assigned': '🔵', 
-                    'resolved': '🟢'
-                }.get(status, '⚪')
-                
-                st.markdown(f"**{status_color} {req.get('item', 'Unknown Item')}**")
-                st.caption(f"📍 {req.get('requester_location', 'Unknown location')} | "
-                          f"⏱️ {req.get('urgency', 'Medium')} urgency")
-                
-                st.markdown(f"*{req.get('description', 'No description')}*")
-                
-                # Skill needed
-                skill = req.get('skill_needed')
-                if skill:
-                    st.markdown(f"**Skill needed:** {skill}")
-                
-                # Requester info
-                st.caption(f"Requested by {req.get('requester_name', 'Anonymous')} • "
-                          f"{req.get('created_at', datetime.now()).strftime('%b %d, %Y') if isinstance(req.get('created_at'), datetime) else 'Recently'}")
-            
-            with col2:
-                # Action buttons based on status
-                if status == 'open':
-                    if st.button("Offer to Fix", key=f"offer_{req['id']}", type="primary"):
-                        st.session_state.selected_request = req['id']
-                        st.switch_page("pages/3_👷_Assign_Repairer.py")
-                elif status == 'assigned':
-                    assigned_to = req.get('assigned_to_id')
-                    if assigned_to == user['id']:
-                        if st.button("Mark Resolved", key=f"resolve_{req['id']}"):
-                            st.session_state.selected_request = req['id']
-                            st.switch_page("pages/4_✅_Resolve_&_Gratitude.py")
-                    else:
-                        st.info("Assigned")
-                elif status == 'resolved':
-                    st.success("✅ Resolved")
-                
-                # View details button
-                if st.button("View Details", key=f"details_{req['id']}"):
-                    st.session_state.selected_request = req['id']
-                    st.switch_page("pages/3_👷_Assign_Repairer.py")
-            
-            st.divider()
+    # Fetch the top cards' full records in the background so their detail
+    # page opens without a round trip
+    if PREFETCH_DETAILS:
+        store.prefetch(firebase, [r['id'] for r in shown[:PREFETCH_DETAILS]])
+    
+    if chosen:
+        st.session_state.selected_request = chosen['id']
+        if chosen.get('status') == 'assigned' and chosen.get('assigned_to_id') == user['id']:
+            st.switch_page("pages/4_✅_Resolve_&_Gratitude.py")
+        st.switch_page("pages/3_👷_Assign_Repairer.py")
 
 # Back button
 st.divider()
 if st.button("← Back to Main Page"):
-    st.switch_page("app.py")
\ No newline at end of file
+    st.switch_page("app.py")
+
+finish_rerun_profile()
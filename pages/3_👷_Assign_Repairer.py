@@ -1,6 +1,8 @@
 # pages/3_👷_Assign_Repairer.py
 import streamlit as st
+from entity_store import entity_store
 from firebase_service import FirebaseService
+from profiler import finish_rerun_profile, mark_section, start_rerun_profile
 from datetime import datetime
 
 st.set_page_config(page_title="Assign Repairer", page_icon="👷")
@@ -16,7 +18,9 @@ if 'current_user' not in st.session_state or st.session_state.current_user is No
     st.stop()
 
 firebase = FirebaseService.get_instance()
+firebase.begin_rerun()
 user = st.session_state.current_user
+start_rerun_profile("Assign Repairer", user, firebase.mock_mode)
 
 # Get request ID from session state or URL params
 request_id = st.session_state.get('selected_request')
@@ -26,8 +30,10 @@ if not request_id:
         st.switch_page("pages/2_🔍_Browse_Requests.py")
     st.stop()
 
-# Fetch request details
-request = firebase.get_repair_request(request_id)
+# Fetch request details (Browse usually prefetched them into the session's store)
+mark_section("Load request")
+store = entity_store(st.session_state)
+request = store.load_request(firebase, request_id)
 if not request:
     st.error("Repair request not found.")
     if st.button("Browse Requests"):
@@ -35,6 +41,7 @@ if not request:
     st.stop()
 
 # Display request details
+mark_section("Details")
 col1, col2 = st.columns([2, 1])
 
 with col1:
@@ -43,7 +50,8 @@ with col1:
     status_display = {
         'open': ('🟠 Open', 'Waiting for someone to help'),
         'assigned': ('🔵 In Progress', f"Being fixed by {request.get('assigned_to_name', 'a neighbor')}"),
-        'resolved': ('🟢 Resolved', f"Fixed on {request.get('resolved_at', datetime.now()).strftime('%b %d') if isinstance(request.get('resolved_at'), datetime) else 'recently'}")
+        'resolved': ('🟢 Resolved', f"Fixed on {request.get('resolved_at', datetime.now()).strftime('%b %d') if isinstance(request.get('resolved_at'), datetime) else 'recently'}"),
+        'expired': ('⚫ Expired', 'Closed after waiting too long without a repairer')
     }.get(status, ('⚪ Unknown', ''))
     
     st.markdown(f"## {status_display[0]}")
@@ -79,8 +87,17 @@ with col2:
     
     st.markdown("---")
     
+    # Show queued writes that haven't reached the database yet
+    write_status = firebase.get_write_status(request_id)
+    if write_status == 'pending':
+        st.info("⏳ Your latest change to this request is syncing...")
+    elif write_status == 'rejected':
+        st.warning("Another neighbor got to this request before your change synced.")
+    elif write_status == 'failed':
+        st.error("Your latest change to this request could not be saved. Please try again.")
+    
     # Action section based on status
-    if status == 'open':
+    if status == 'open' and write_status != 'pending':
         st.markdown("#### 🤝 Can You Help?")
         
         # Check if user has matching skills
@@ -94,6 +111,7 @@ with col2:
         
         if st.button("I'll Fix This!", type="primary", use_container_width=True):
             success = firebase.assign_repairer(request_id, user['id'])
+            store.invalidate(request_id)
             if success:
                 st.success(f"✅ You're now assigned to fix this {request.get('item', 'item')}!")
                 st.balloons()
@@ -105,7 +123,11 @@ with col2:
                 
                 st.rerun()
             else:
-                st.error("Failed to assign repairer. Please try again.")
+                latest = firebase.get_repair_request(request_id)
+                if latest and latest.get('status') != 'open':
+                    st.warning("Another neighbor offered to fix this just before you. Thanks for stepping up!")
+                else:
+                    st.error("Failed to assign repairer. Please try again.")
     
     elif status == 'assigned':
         assigned_to_id = request.get('assigned_to_id')
@@ -130,4 +152,6 @@ with col2:
         st.switch_page("pages/2_🔍_Browse_Requests.py")
     
     if st.button("Back to Main Page", use_container_width=True):
-        st.switch_page("app.py")
\ No newline at end of file
+        st.switch_page("app.py")
+
+finish_rerun_profile()
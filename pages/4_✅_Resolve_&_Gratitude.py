@@ -1,6 +1,8 @@
 # pages/4_✅_Resolve_&_Gratitude.py
 import streamlit as st
+from entity_store import entity_store
 from firebase_service import FirebaseService
+from profiler import finish_rerun_profile, mark_section, start_rerun_profile
 from datetime import datetime
 
 st.set_page_config(page_title="Resolve & Gratitude", page_icon="✅")
@@ -17,15 +19,21 @@ if 'current_user' not in st.session_state or st.session_state.current_user is No
     st.stop()
 
 firebase = FirebaseService.get_instance()
+firebase.begin_rerun()
 user = st.session_state.current_user
+start_rerun_profile("Resolve & Gratitude", user, firebase.mock_mode)
 
 # Get assigned repairs
+mark_section("Load repairs")
 assigned_requests = firebase.get_user_requests(user['id'], role='assignee')
 
 # Get requested repairs (for showing gratitude)
 my_requests = firebase.get_user_requests(user['id'], role='requester')
+store = entity_store(st.session_state)
+store.put(assigned_requests + my_requests)
 
 # Tab layout
+mark_section("Tabs")
 tab1, tab2 = st.tabs(["🔧 My Assigned Repairs", "💝 My Requests"])
 
 with tab1:
@@ -41,7 +49,8 @@ with tab1:
         if in_progress:
             st.markdown(f"### In Progress ({len(in_progress)})")
             for req in in_progress:
-                with st.expander(f"🛠️ {req.get('item', 'Unknown Item')}"):
+                syncing = " (⏳ syncing)" if firebase.get_write_status(req['id']) == 'pending' else ""
+                with st.expander(f"🛠️ {req.get('item', 'Unknown Item')}{syncing}"):
                     col1, col2 = st.columns([3, 1])
                     with col1:
                         st.write(req.get('description', 'No description'))
@@ -98,7 +107,8 @@ with tab2:
                                                    placeholder="Thank you for your help! What did this repair mean to you?")
                             if st.form_submit_button("Send Gratitude"):
                                 if gratitude:
-                                    success = firebase.resolve_request(req['id'], gratitude)
+                                    success = firebase.add_gratitude_note(req['id'], gratitude)
+                                    store.invalidate(req['id'])
                                     if success:
                                         st.success("Thank you for sharing your gratitude!")
                                         st.rerun()
@@ -106,9 +116,10 @@ with tab2:
             st.info("Your repair requests are still in progress. Check back when they're completed!")
 
 # Handle resolution if a request was selected
+mark_section("Resolve form")
 if 'selected_request' in st.session_state:
     request_id = st.session_state.selected_request
-    request = firebase.get_repair_request(request_id)
+    request = store.load_request(firebase, request_id)
     
     if request and request.get('status') == 'assigned' and request.get('assigned_to_id') == user['id']:
         st.divider()
@@ -127,18 +138,22 @@ if 'selected_request' in st.session_state:
             col1, col2 = st.columns(2)
             with col1:
                 if st.form_submit_button("✅ Mark as Resolved", type="primary", use_container_width=True):
-                    success = firebase.resolve_request(request_id, gratitude_note)
+                    success = firebase.resolve_request(request_id, gratitude_note, repairer_id=user['id'])
+                    store.invalidate(request_id)
                     if success:
                         st.success("Repair marked as resolved! Thank you for your contribution to the community.")
                         st.balloons()
                         st.session_state.pop('selected_request', None)
                         st.rerun()
+                    else:
+                        st.error("This repair could not be marked as resolved. It may have already been completed.")
             with col2:
                 if st.form_submit_button("Cancel", use_container_width=True):
                     st.session_state.pop('selected_request', None)
                     st.rerun()
 
 # Navigation
+mark_section("Navigation")
 st.divider()
 col1, col2 = st.columns(2)
 with col1:
@@ -146,4 +161,6 @@ with col1:
         st.switch_page("app.py")
 with col2:
     if st.button("Browse More Requests", use_container_width=True):
-        st.switch_page("pages/2_🔍_Browse_Requests.py")
\ No newline at end of file
+        st.switch_page("pages/2_🔍_Browse_Requests.py")
+
+finish_rerun_profile()
@@ -0,0 +1,122 @@
+# pages/5_📊_Analytics.py
+import io
+import time
+
+import pandas as pd
+import streamlit as st
+
+from admin import is_admin
+from analytics import GROUP_FIELDS, backlog_trend, duration_percentiles
+from firebase_service import FirebaseService
+from profiler import finish_rerun_profile, mark_section, start_rerun_profile
+
+st.set_page_config(page_title="Analytics", page_icon="📊")
+
+# Header
+st.markdown("<h1 class='main-header'>📊 Repair Analytics</h1>", unsafe_allow_html=True)
+st.markdown("### How quickly requests get claimed and fixed")
+
+# Check if user is logged in
+if 'current_user' not in st.session_state or st.session_state.current_user is None:
+    st.warning("Please register/sign in from the main page first.")
+    if st.button("Go to Main Page"):
+        st.switch_page("app.py")
+    st.stop()
+
+firebase = FirebaseService.get_instance()
+firebase.begin_rerun()
+user = st.session_state.current_user
+start_rerun_profile("Analytics", user, firebase.mock_mode)
+
+if not is_admin(user, firebase.mock_mode):
+    st.warning("This page is only available to admins.")
+    st.stop()
+
+# The history scan is the slow part, so it is kept for the session and only
+# repeated on request
+mark_section("Load history")
+if st.sidebar.button("🔄 Reload history") or 'analytics_frame' not in st.session_state:
+    start = time.perf_counter()
+    try:
+        st.session_state.analytics_frame = firebase.get_request_frame()
+        st.session_state.analytics_loaded = time.perf_counter() - start
+    except Exception as e:
+        st.error(f"Error loading request history: {e}")
+        st.stop()
+frame = st.session_state.analytics_frame
+
+st.caption(f"{len(frame):,} requests, live and archived, "
+           f"loaded in {st.session_state.analytics_loaded:.1f}s")
+
+if not len(frame):
+    st.info("No requests yet.")
+    st.stop()
+
+group_by = st.sidebar.selectbox("Break down by", list(GROUP_FIELDS), format_func=str.title)
+days = st.sidebar.slider("Trend window (days)", 14, 365, 90)
+
+mark_section("Charts")
+tab1, tab2, tab3, tab4 = st.tabs(["⏱️ Time to Claim", "✅ Time to Resolve", "📈 Backlog", "🏘️ Communities"])
+
+with tab1:
+    rows = duration_percentiles(frame, group_by, 'assign')
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        st.caption("Hours from posting to a repairer claiming it. "
+                   "Requests claimed before claim times were recorded are left out.")
+    else:
+        st.info("No claimed requests yet.")
+
+with tab2:
+    rows = duration_percentiles(frame, group_by, 'resolve')
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        st.caption("Hours from posting to the repair being marked fixed.")
+    else:
+        st.info("No resolved requests yet.")
+
+with tab3:
+    trend = backlog_trend(frame, days)
+    chart = pd.DataFrame(trend).set_index('day')
+    st.markdown("**Backlog at end of day**")
+    st.line_chart(chart[['open_backlog', 'unresolved_backlog']])
+    st.markdown("**Daily flow**")
+    st.bar_chart(chart[['created', 'claimed', 'resolved', 'expired']])
+
+with tab4:
+    # One counter read per community, run in parallel
+    communities = firebase.list_communities()
+    stats = firebase.get_stats_by_community([c['id'] for c in communities])
+    rows = [{'community': c['name'], **stats.get(c['id'], {})} for c in communities]
+    if rows:
+        rows.sort(key=lambda row: -row.get('total', 0))
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        st.caption("Request counts, archived ones included, from each community's stats counter.")
+    else:
+        st.info("No communities yet.")
+
+buffer = io.BytesIO()
+frame.write_parquet(buffer)
+st.sidebar.download_button("⬇️ Export Parquet", buffer.getvalue(),
+                           file_name="repair_requests.parquet",
+                           mime="application/vnd.apache.parquet")
+
+if firebase.mock_mode:
+    with st.sidebar.expander("🧠 Mock database memory"):
+        try:
+            memory = firebase.get_memory_stats()
+            archive = memory['archive']
+            st.markdown(f"**Live:** {memory['live_requests']:,} requests, ~{memory['live_bytes'] / 2**20:.1f} MB  \n"
+                        f"**Users:** {memory['users']:,}, ~{memory['user_bytes'] / 2**20:.1f} MB  \n"
+                        f"**Archive:** {archive['resident']:,} of {archive['records']:,} in memory, "
+                        f"~{archive['resident_bytes'] / 2**20:.1f} MB")
+            if archive['budget_bytes']:
+                st.caption(f"Budget {archive['budget_bytes'] / 2**20:.1f} MB · "
+                           f"{archive['spill_file_bytes'] / 2**20:.1f} MB on disk · "
+                           f"{archive['faults']:,} read back, {archive['evictions']:,} evicted")
+            else:
+                st.caption("No memory budget set (MOCK_MEMORY_BUDGET_MB).")
+        except Exception as e:
+            st.error(f"Error reading memory stats: {e}")
+
+finish_rerun_profile()
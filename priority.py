@@ -0,0 +1,52 @@
+# priority.py
+import heapq
+from typing import Dict, Iterable, List
+
+# Shared with feeds so both rank requests the same way
+from feeds import priority_score  # noqa: F401
+
+
+class PriorityIndex:
+    """Open request ids in a max-heap by priority_score.
+
+    Removal is lazy: entries for requests that were claimed stay in the heap
+    until they surface in `top` (or the heap is compacted), which keeps every
+    operation O(log n).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._scores = {}
+
+    def __len__(self):
+        return len(self._scores)
+
+    def push(self, request_id: str, score: float):
+        self._scores[request_id] = score
+        heapq.heappush(self._heap, (-score, request_id))
+
+    def remove(self, request_id: str):
+        if self._scores.pop(request_id, None) is not None and len(self._heap) > 2 * len(self._scores) + 64:
+            self._compact()
+
+    def top(self, limit: int) -> List[str]:
+        """Ids of the `limit` highest-priority requests, best first"""
+        found, seen = [], set()
+        while self._heap and len(found) < limit:
+            entry = heapq.heappop(self._heap)
+            # A request released back to open is pushed again and can still
+            # have its old entry in the heap
+            if self._scores.get(entry[1]) == -entry[0] and entry[1] not in seen:
+                found.append(entry)
+                seen.add(entry[1])
+        for entry in found:
+            heapq.heappush(self._heap, entry)
+        return [request_id for _, request_id in found]
+
+    def rebuild(self, requests: Iterable[Dict]):
+        self._scores = {req['id']: req.get('priority_score', priority_score(req)) for req in requests}
+        self._compact()
+
+    def _compact(self):
+        self._heap = [(-score, request_id) for request_id, score in self._scores.items()]
+        heapq.heapify(self._heap)
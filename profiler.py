@@ -0,0 +1,217 @@
+# profiler.py
+import cProfile
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import streamlit as st
+
+from admin import is_admin
+
+# Where raw profiles are saved: <page>-<time>.prof (pstats / snakeviz) plus
+# a .json summary next to it
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '.profiles')
+
+APP_ROOT = str(Path(__file__).resolve().parent)
+STREAMLIT_DIR = f"{os.sep}streamlit{os.sep}"
+
+# The profiler of the run executing on this thread, for the service hooks
+_active = threading.local()
+
+
+class RerunProfiler:
+    """cProfile plus wall-clock spans for one script run.
+
+    Pages split themselves into sections with mark_section(); FirebaseService
+    records each guarded read and write as a call inside the current section.
+    Render time comes from cProfile: time spent in Streamlit functions called
+    directly from app code.
+    """
+
+    def __init__(self, page: str):
+        self.page = page
+        self.started_at = datetime.now()
+        self.sections = []
+        self.result = None
+        self.path = None
+        self._start = time.perf_counter()
+        self.mark('Setup')
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def mark(self, name: str):
+        now = self.elapsed()
+        if self.sections:
+            self.sections[-1]['end'] = now
+        self.sections.append({'name': name, 'start': now, 'end': None, 'calls': {}})
+
+    def record_call(self, name: str, seconds: float):
+        count_and_time = self.sections[-1]['calls'].setdefault(name, [0, 0.0])
+        count_and_time[0] += 1
+        count_and_time[1] += seconds
+
+    def finish(self) -> Dict:
+        self._profile.disable()
+        total = self.elapsed()
+        self.sections[-1]['end'] = total
+        stats = pstats.Stats(self._profile)
+        self.result = {
+            'page': self.page,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'total': total,
+            'sections': [{'name': s['name'], 'seconds': s['end'] - s['start'],
+                          'calls': {name: {'count': count, 'seconds': seconds}
+                                    for name, (count, seconds) in s['calls'].items()}}
+                         for s in self.sections],
+            'render_calls': _render_calls(stats),
+            'hot_functions': _hot_functions(stats),
+        }
+        self.path = self._save(stats)
+        return self.result
+
+    def _save(self, stats: pstats.Stats) -> Optional[str]:
+        try:
+            directory = Path(PROFILE_DIR)
+            directory.mkdir(parents=True, exist_ok=True)
+            slug = re.sub(r'[^a-z0-9]+', '-', self.page.lower()).strip('-') or 'page'
+            stem = directory / f"{slug}-{self.started_at:%Y%m%d-%H%M%S}"
+            stats.dump_stats(f"{stem}.prof")
+            with open(f"{stem}.json", 'w') as f:
+                json.dump(self.result, f, indent=2)
+            return f"{stem}.prof"
+        except OSError:
+            return None
+
+
+def _function_label(func) -> str:
+    filename, line, name = func
+    if filename.startswith(APP_ROOT):
+        filename = os.path.relpath(filename, APP_ROOT)
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def _render_calls(stats: pstats.Stats, limit: int = 10) -> List[Dict]:
+    """Streamlit commands (st.markdown, st.button, ...) by time.
+
+    Counts calls made from app code, or through the metrics wrapper every
+    st.* command goes through, so Streamlit's internal calls aren't doubled.
+    """
+    wrappers = {func for func in stats.stats if STREAMLIT_DIR in func[0] and func[2] == 'wrapped_func'}
+    totals = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        if STREAMLIT_DIR not in func[0] or func in wrappers or func[2].startswith('_'):
+            continue
+        for caller, (calls, _, _, cumulative) in callers.items():
+            if STREAMLIT_DIR in caller[0] and caller not in wrappers:
+                continue
+            count_and_time = totals.setdefault(f"st.{func[2]}", [0, 0.0])
+            count_and_time[0] += calls
+            count_and_time[1] += cumulative
+    ranked = sorted(totals.items(), key=lambda item: -item[1][1])[:limit]
+    return [{'name': name, 'count': count, 'seconds': seconds} for name, (count, seconds) in ranked]
+
+
+def _hot_functions(stats: pstats.Stats, limit: int = 15) -> List[Dict]:
+    """The app's own functions by cumulative time"""
+    functions = [(func, row) for func, row in stats.stats.items() if func[0].startswith(APP_ROOT)]
+    functions.sort(key=lambda item: -item[1][3])
+    return [{'name': _function_label(func), 'count': row[1], 'own_seconds': row[2], 'seconds': row[3]}
+            for func, row in functions[:limit]]
+
+
+def start_rerun_profile(page: str, user: Optional[Dict], mock_mode: bool = False) -> Optional[RerunProfiler]:
+    """Call at the top of a page, after begin_rerun().
+
+    Admins get a sidebar button that profiles the run it triggers, or add
+    `?profile=1` to the URL to profile every run. A profile a previous run
+    left open (it hit st.stop()) is finished and shown first.
+    """
+    leftover = st.session_state.pop('rerun_profiler', None)
+    if leftover is not None:
+        show_rerun_profile(leftover.finish(), leftover.path)
+    _active.profiler = None
+
+    if not is_admin(user, mock_mode):
+        return None
+    requested = st.sidebar.button("🔬 Profile this page", help="Profile the rerun this click starts")
+    if not (requested or st.query_params.get('profile') == '1'):
+        return None
+    try:
+        profiler = RerunProfiler(page)
+    except ValueError:
+        # Python 3.12+ allows one active profiler per process
+        st.sidebar.warning("Another profile is running; try again in a moment.")
+        return None
+    _active.profiler = profiler
+    st.session_state.rerun_profiler = profiler
+    return profiler
+
+
+def finish_rerun_profile():
+    """Call at the bottom of a page: finish this run's profile and show it"""
+    profiler = st.session_state.pop('rerun_profiler', None)
+    _active.profiler = None
+    if profiler is not None:
+        show_rerun_profile(profiler.finish(), profiler.path)
+
+
+def mark_section(name: str):
+    """Start a named page section in the active profile (no-op otherwise)"""
+    profiler = getattr(_active, 'profiler', None)
+    if profiler is not None:
+        profiler.mark(name)
+
+
+@contextmanager
+def service_call(name: str):
+    """Time a service call into the active profile (no-op otherwise)"""
+    profiler = getattr(_active, 'profiler', None)
+    if profiler is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.record_call(name, time.perf_counter() - started)
+
+
+def _bar(label: str, seconds: float, total: float, depth: int, color: str) -> str:
+    width = max(0.5, 100 * seconds / total) if total else 0
+    return (f'<div style="margin-left:{depth * 1.5}rem;font-size:0.85rem;">'
+            f'<div style="background:{color};width:{width:.1f}%;height:0.35rem;border-radius:2px;"></div>'
+            f'{label} — {seconds * 1000:.1f} ms</div>')
+
+
+def show_rerun_profile(result: Dict, path: Optional[str] = None):
+    """Flame-graph-style breakdown: run → sections → service calls"""
+    total = result['total']
+    with st.expander(f"🔬 Profile of {result['page']}: {total * 1000:.0f} ms", expanded=True):
+        rows = [_bar(f"<b>{result['page']}</b>", total, total, 0, '#1E88E5')]
+        for section in result['sections']:
+            rows.append(_bar(section['name'], section['seconds'], total, 1, '#43A047'))
+            for name, call in sorted(section['calls'].items(), key=lambda item: -item[1]['seconds']):
+                rows.append(_bar(f"{name} ×{call['count']}", call['seconds'], total, 2, '#FB8C00'))
+        st.markdown(''.join(rows), unsafe_allow_html=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**Render calls**")
+            st.dataframe([{'call': r['name'], 'count': r['count'], 'ms': round(r['seconds'] * 1000, 1)}
+                          for r in result['render_calls']], hide_index=True)
+        with col2:
+            st.markdown("**Hottest app functions**")
+            st.dataframe([{'function': f['name'], 'calls': f['count'], 'ms': round(f['seconds'] * 1000, 1)}
+                          for f in result['hot_functions']], hide_index=True)
+        if path:
+            st.caption(f"Raw profile saved to `{path}` (open with pstats or snakeviz)")
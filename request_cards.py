@@ -0,0 +1,111 @@
+# request_cards.py
+import html
+import math
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import streamlit as st
+
+# Cards sent to the browser per page of a card list
+CARDS_PER_PAGE = int(os.environ.get('CARDS_PER_PAGE', '20'))
+
+STATUS_ICONS = {'open': '🟠', 'assigned': '🔵', 'resolved': '🟢', 'expired': '⚫'}
+STATUS_COLORS = {'open': '#FF9800', 'assigned': '#2196F3', 'resolved': '#4CAF50', 'expired': '#9E9E9E'}
+
+CARD_CSS = """
+<style>
+.card-grid { display: grid; gap: 0.75rem; }
+.card-grid.two-up { grid-template-columns: repeat(auto-fill, minmax(18rem, 1fr)); }
+.rc-card { background: white; border-radius: 10px; padding: 1rem 1.25rem;
+           box-shadow: 0 2px 8px rgba(0,0,0,0.08); border-left: 4px solid #1E88E5; }
+.rc-head { display: flex; justify-content: space-between; align-items: start; gap: 0.5rem; }
+.rc-head h4 { margin: 0; font-size: 1.05rem; }
+.rc-badge { color: white; padding: 0.15rem 0.6rem; border-radius: 12px;
+            font-size: 0.75rem; font-weight: bold; white-space: nowrap; }
+.rc-meta { color: #1E88E5; font-size: 0.85rem; margin: 0.35rem 0; }
+.rc-card details summary { cursor: pointer; color: #555; font-size: 0.85rem; }
+.rc-card details p { color: #666; font-size: 0.9rem; margin: 0.4rem 0 0 0; }
+</style>
+"""
+
+
+def card_html(req: Dict) -> str:
+    """One request card; the description opens in the browser without a rerun"""
+    status = req.get('status', 'open')
+    created_at = req.get('created_at')
+    created = created_at.strftime('%b %d, %Y') if isinstance(created_at, datetime) else 'Recently'
+    meta = [f"📍 {req.get('requester_location') or 'Unknown location'}",
+            f"⏱️ {req.get('urgency') or 'Medium'} urgency"]
+    if req.get('skill_needed'):
+        meta.append(f"🛠️ {req['skill_needed']}")
+    return (
+        f'<div class="rc-card" style="border-left-color: {STATUS_COLORS.get(status, "#666")};">'
+        f'<div class="rc-head"><h4>{STATUS_ICONS.get(status, "⚪")} {html.escape(req.get("item") or "Unknown Item")}</h4>'
+        f'<span class="rc-badge" style="background: {STATUS_COLORS.get(status, "#666")};">'
+        f'{html.escape(status.upper())}</span></div>'
+        f'<div class="rc-meta">{html.escape(" | ".join(meta))}</div>'
+        f'<details><summary>Description</summary>'
+        f'<p><em>{html.escape(req.get("description_preview") or "No description")}</em></p>'
+        f'<p>Requested by {html.escape(req.get("requester_name") or "Anonymous")} • {created}</p>'
+        f'</details></div>'
+    )
+
+
+def cards_markdown(requests: List[Dict], columns: int = 1) -> str:
+    """Cards for `requests` as a single markdown payload"""
+    grid = 'card-grid two-up' if columns > 1 else 'card-grid'
+    return CARD_CSS + f'<div class="{grid}">' + ''.join(card_html(r) for r in requests) + '</div>'
+
+
+def action_label(req: Dict, user_id: str) -> str:
+    if req.get('status') == 'open':
+        return "🤝 Offer to Fix"
+    if req.get('status') == 'assigned' and req.get('assigned_to_id') == user_id:
+        return "✅ Mark Resolved"
+    return "View Details"
+
+
+def render_request_cards(requests: List[Dict], user_id: str, key: str,
+                         page_size: int = CARDS_PER_PAGE) -> Tuple[List[Dict], Optional[Dict]]:
+    """Render one page of request cards with a single pager and picker.
+
+    The page's cards go out as one markdown element instead of a block of
+    elements and buttons each, so a rerun sends a handful of deltas and
+    registers three widgets however many requests match. Returns the
+    requests on the shown page and the one whose action button was clicked.
+    """
+    if not requests:
+        st.info("No requests to show.")
+        return [], None
+    pages = max(1, math.ceil(len(requests) / page_size))
+    page_key = f'{key}_page'
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key,
+                               disabled=pages == 1)
+    start = (page - 1) * page_size
+    shown = requests[start:start + page_size]
+    with col2:
+        st.caption(f"Showing {start + 1}–{start + len(shown)} of {len(requests)}")
+
+    st.markdown(cards_markdown(shown), unsafe_allow_html=True)
+
+    by_id = {req['id']: req for req in shown}
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        selected = st.selectbox(
+            "Choose a request", list(by_id), index=None, key=f'{key}_selected',
+            format_func=lambda rid: f"{STATUS_ICONS.get(by_id[rid].get('status'), '⚪')} "
+                                    f"{by_id[rid].get('item', 'Unknown Item')} — "
+                                    f"{by_id[rid].get('requester_location', 'Unknown location')}",
+            placeholder="Pick a request on this page...")
+    with col2:
+        req = by_id.get(selected)
+        label = action_label(req, user_id) if req else "Open"
+        clicked = st.button(label, key=f'{key}_open', type="primary", disabled=req is None,
+                            use_container_width=True)
+    return shown, (req if clicked else None)
@@ -0,0 +1,39 @@
+# request_shapes.py
+from typing import Dict, Optional
+
+# Characters of the description kept on the document for list views
+PREVIEW_LENGTH = 120
+
+# Fields list views need. Long free text (description, notes, location_notes,
+# gratitude_note) is left out and only loaded by get_repair_request.
+SUMMARY_FIELDS = (
+    'item',
+    'status',
+    'urgency',
+    'skill_needed',
+    'requester_id',
+    'requester_name',
+    'requester_location',
+    'assigned_to_id',
+    'created_at',
+    'resolved_at',
+    'updated_at',
+    'description_preview',
+    'priority_score',
+)
+
+
+def description_preview(description: Optional[str]) -> str:
+    description = (description or '').strip()
+    if len(description) <= PREVIEW_LENGTH:
+        return description
+    return description[:PREVIEW_LENGTH].rsplit(' ', 1)[0] + '…'
+
+
+def to_summary(request: Dict) -> Dict:
+    """Summary shape of a full request dict (what a projected query returns)"""
+    summary = {field: request[field] for field in SUMMARY_FIELDS if field in request}
+    if 'description_preview' not in summary and 'description' in request:
+        summary['description_preview'] = description_preview(request['description'])
+    summary['id'] = request['id']
+    return summary
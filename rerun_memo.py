@@ -0,0 +1,49 @@
+# rerun_memo.py
+from typing import Dict, Hashable, Iterable, Optional
+
+MISSING = object()
+
+
+class RerunMemo:
+    """Reads made during one script run.
+
+    A repeated read with the same arguments is served from here, and full
+    records from list reads stand in for single-request reads. Any write
+    clears it, so a read after a write in the same run sees the change.
+    """
+
+    def __init__(self):
+        self._results = {}
+        self._records = {}
+        self.calls = 0
+        self.saved = 0
+
+    def get(self, key: Hashable):
+        """The memoized result for `key`, or MISSING"""
+        result = self._results.get(key, MISSING)
+        if result is not MISSING:
+            self.saved += 1
+        return result
+
+    def put(self, key: Hashable, result):
+        self.calls += 1
+        self._results[key] = result
+
+    def remember_records(self, records: Iterable[Dict]):
+        """Index full request records from a list read by id"""
+        for record in records:
+            if record.get('id'):
+                self._records[record['id']] = record
+
+    def record(self, request_id: str) -> Optional[Dict]:
+        record = self._records.get(request_id)
+        if record is not None:
+            self.saved += 1
+        return record
+
+    def clear(self):
+        self._results.clear()
+        self._records.clear()
+
+    def snapshot(self) -> Dict:
+        return {'calls': self.calls, 'saved': self.saved}
@@ -0,0 +1,141 @@
+# resilience.py
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class InjectedFault(Exception):
+    """Failure raised on purpose by FaultInjectingBackend"""
+
+
+class CircuitBreaker:
+    """Stop calling a failing backend until a probe shows it has recovered.
+
+    Closed: calls go through and the outcomes of the last `window` calls are
+    kept. Once `failure_threshold` of them are failures the breaker opens and
+    every call is short-circuited for `reset_timeout` seconds. Then a single
+    half-open probe is let through: success closes the breaker, failure
+    re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 window: int = 10, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=max(window, failure_threshold))
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.stats = {'successes': 0, 'failures': 0, 'short_circuited': 0,
+                      'trips': 0, 'probes': 0}
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    self.stats['short_circuited'] += 1
+                    return False
+                self._probe_in_flight = True
+                self.stats['probes'] += 1
+                return True
+            if self.state == OPEN:
+                self.stats['short_circuited'] += 1
+                return False
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.stats['successes'] += 1
+            self._probe_in_flight = False
+            if self.state != CLOSED:
+                self._outcomes.clear()
+            self._outcomes.append(True)
+            self.state = CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.stats['failures'] += 1
+            self._outcomes.append(False)
+            self._probe_in_flight = False
+            recent_failures = self._outcomes.count(False)
+            if self.state == HALF_OPEN or recent_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.stats['trips'] += 1
+                self.state = OPEN
+                self._opened_at = self.clock()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {'state': self.state,
+                    'recent_failures': self._outcomes.count(False),
+                    **self.stats}
+
+
+class RerunBudget:
+    """Wall-clock budget shared by every backend call in one script rerun"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.calls = 0
+        self.degraded_calls = 0
+        self.warned = False
+
+    def remaining(self) -> float:
+        return self.seconds - (time.monotonic() - self.started)
+
+    def call_timeout(self, per_call: float) -> float:
+        return min(per_call, self.remaining())
+
+
+class FaultInjectingBackend:
+    """Wrap a backend (normally MockFirestore) to add latency and random failures.
+
+    Every public method call sleeps for `latency` seconds and then raises
+    InjectedFault with probability `failure_rate`. Both can be changed at
+    runtime with `set_faults` to script outages in benchmarks and demos.
+    Methods in LOCAL_METHODS stand in for client-side work that never
+    reaches the server (like Firestore's `document()` id), so they pass
+    straight through.
+    """
+
+    LOCAL_METHODS = frozenset({'allocate_id', 'history', 'memory_stats', 'snapshot'})
+
+    def __init__(self, backend, failure_rate: float = 0.0, latency: float = 0.0,
+                 seed: Optional[int] = None):
+        self._backend = backend
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self._random = random.Random(seed)
+        self.injected = 0
+
+    def set_faults(self, failure_rate: Optional[float] = None, latency: Optional[float] = None):
+        if failure_rate is not None:
+            self.failure_rate = failure_rate
+        if latency is not None:
+            self.latency = latency
+
+    def __getattr__(self, name):
+        attr = getattr(self._backend, name)
+        if name.startswith('_') or name in self.LOCAL_METHODS or not callable(attr):
+            return attr
+
+        def faulty(*args, **kwargs):
+            if self.latency:
+                time.sleep(self.latency)
+            if self.failure_rate and self._random.random() < self.failure_rate:
+                self.injected += 1
+                raise InjectedFault(f"injected failure in {name}")
+            return attr(*args, **kwargs)
+
+        return faulty
@@ -0,0 +1,164 @@
+# rollups.py
+import os
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+ROLLUPS_COLLECTION = 'stats_rollups'
+ALL_TIME = 'all'
+# Every create and resolve increments four buckets (day, week, month, all),
+# so each is a sharded counter under stats_rollups/{bucket}/shards/{i}
+ROLLUP_SHARDS = int(os.environ.get('ROLLUP_SHARDS', '10'))
+
+# Rough weight of an item kept out of landfill, by the skill needed to fix it
+ESTIMATED_KG_BY_SKILL = {
+    'Electrical': 2.5,
+    'Carpentry/Woodwork': 8.0,
+    'Sewing/Textiles': 0.6,
+    'Plumbing': 1.5,
+    'Mechanical': 5.0,
+    'Electronics': 1.2,
+    'General Handyman': 3.0,
+}
+DEFAULT_KG = 2.0
+
+# Upper edges (hours) of the time-to-resolve histogram bins; the last is open-ended
+TTR_BIN_EDGES = [1, 2, 4, 8, 16, 24, 48, 72, 168, 336, 720]
+
+
+def estimated_kg(skill: Optional[str]) -> float:
+    return ESTIMATED_KG_BY_SKILL.get(skill or '', DEFAULT_KG)
+
+
+def skill_key(skill: Optional[str]) -> str:
+    """Field-path safe key for a skill name ('Carpentry/Woodwork' -> 'carpentry_woodwork')"""
+    return re.sub(r'[^a-z0-9]+', '_', (skill or 'unspecified').lower()).strip('_') or 'unspecified'
+
+
+def naive(ts: datetime) -> datetime:
+    """Firestore returns UTC-aware datetimes for the naive ones we write"""
+    if ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def bucket_ids(ts: datetime) -> List[str]:
+    ts = naive(ts)
+    iso_year, iso_week, _ = ts.isocalendar()
+    return [
+        f"day-{ts:%Y-%m-%d}",
+        f"week-{iso_year}-W{iso_week:02d}",
+        f"month-{ts:%Y-%m}",
+        ALL_TIME,
+    ]
+
+
+def ttr_bin(hours: float) -> str:
+    for idx, edge in enumerate(TTR_BIN_EDGES):
+        if hours <= edge:
+            return f"b{idx:02d}"
+    return f"b{len(TTR_BIN_EDGES):02d}"
+
+
+def rollup_deltas(transition: str, before: Dict, after: Dict) -> Dict[str, Dict[str, float]]:
+    """Rollup field increments for one request transition.
+
+    Returns {bucket_id: {dotted.field.path: delta}}. Created requests count in
+    the buckets of `created_at`; resolved ones in the buckets of
+    `resolved_at`, together with the estimated kg saved and a histogram of
+    time-to-resolve that the median is read from.
+    """
+    deltas = {}
+    if transition == 'created' and isinstance(after.get('created_at'), datetime):
+        fields = {'created': 1, f"created_by_skill.{skill_key(after.get('skill_needed'))}": 1}
+        for bucket in bucket_ids(after['created_at']):
+            deltas[bucket] = dict(fields)
+    elif transition == 'resolved' and isinstance(after.get('resolved_at'), datetime):
+        skill = after.get('skill_needed')
+        kg = estimated_kg(skill)
+        fields = {'resolved': 1, 'kg_saved': kg, f"kg_by_skill.{skill_key(skill)}": kg}
+        created_at = after.get('created_at')
+        if isinstance(created_at, datetime):
+            hours = max(0.0, (naive(after['resolved_at']) - naive(created_at)).total_seconds() / 3600)
+            fields.update({'ttr_count': 1, 'ttr_hours_sum': hours, f"ttr_hist.{ttr_bin(hours)}": 1})
+        for bucket in bucket_ids(after['resolved_at']):
+            deltas[bucket] = dict(fields)
+    return deltas
+
+
+def apply_deltas(doc: Dict, fields: Dict[str, float]):
+    """Add dotted-path deltas into a nested dict in place (mock backend)"""
+    for path, delta in fields.items():
+        parts = path.split('.')
+        target = doc
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = target.get(parts[-1], 0) + delta
+
+
+def nested_increments(fields: Dict[str, float], increment) -> Dict:
+    """Turn dotted-path deltas into a nested dict of `increment(delta)` for a merge set"""
+    nested = {}
+    for path, delta in fields.items():
+        parts = path.split('.')
+        target = nested
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = increment(delta)
+    return nested
+
+
+def rebuild_rollups(requests: Iterable[Dict]) -> Dict[str, Dict]:
+    """Replay request history into fresh rollup documents"""
+    docs = defaultdict(dict)
+    for req in requests:
+        for transition in ('created', 'resolved'):
+            if transition == 'resolved' and req.get('status') != 'resolved':
+                continue
+            for bucket, fields in rollup_deltas(transition, {}, req).items():
+                apply_deltas(docs[bucket], fields)
+    return dict(docs)
+
+
+def median_hours(doc: Dict) -> Optional[float]:
+    """Approximate median time-to-resolve, interpolated within the histogram bin"""
+    hist = doc.get('ttr_hist') or {}
+    total = sum(hist.values())
+    if not total:
+        return None
+    edges = [0] + TTR_BIN_EDGES + [TTR_BIN_EDGES[-1] * 2]
+    seen = 0
+    for idx in range(len(edges) - 1):
+        count = hist.get(f"b{idx:02d}", 0)
+        if count and seen + count >= total / 2:
+            fraction = (total / 2 - seen) / count
+            return round(edges[idx] + fraction * (edges[idx + 1] - edges[idx]), 1)
+        seen += count
+    return None
+
+
+def summarize(doc: Optional[Dict]) -> Dict:
+    doc = doc or {}
+    return {
+        'created': int(doc.get('created', 0)),
+        'resolved': int(doc.get('resolved', 0)),
+        'kg_saved': round(doc.get('kg_saved', 0.0), 1),
+        'kg_by_skill': {k: round(v, 1) for k, v in (doc.get('kg_by_skill') or {}).items()},
+        'median_hours_to_resolve': median_hours(doc),
+    }
+
+
+def recent_bucket_ids(period: str, count: int, now: Optional[datetime] = None) -> List[str]:
+    """Ids of the last `count` day/week/month buckets, oldest first"""
+    now = now or datetime.now()
+    ids = []
+    for back in range(count - 1, -1, -1):
+        if period == 'day':
+            ids.append(bucket_ids(now - timedelta(days=back))[0])
+        elif period == 'week':
+            ids.append(bucket_ids(now - timedelta(weeks=back))[1])
+        else:
+            year, month = divmod(now.year * 12 + now.month - 1 - back, 12)
+            ids.append(f"month-{year}-{month + 1:02d}")
+    return ids
@@ -0,0 +1,37 @@
+# scripts/archive_requests.py
+"""Move old resolved requests from repair_requests into repair_requests_archive.
+
+Safe to interrupt: progress is checkpointed after every batch and the next
+run on the same day picks up where the last one stopped.
+
+    python scripts/archive_requests.py --older-than-days 90 --batch-size 200
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from archive import ARCHIVE_AFTER_DAYS  # noqa: E402
+from firebase_service import FirebaseService  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--older-than-days', type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--max-batches', type=int, default=None)
+    parser.add_argument('--checkpoint', default='.archive_checkpoint.json')
+    args = parser.parse_args()
+
+    firebase = FirebaseService()
+    start = time.perf_counter()
+    state = firebase.archive_resolved_requests(args.older_than_days, args.batch_size,
+                                               args.checkpoint, args.max_batches)
+    print(f"Archived {state['archived']} request(s) in {state['batches']} batch(es) "
+          f"in {time.perf_counter() - start:.2f}s" + ("" if state['done'] else " (more remaining)"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+# scripts/backfill_description_previews.py
+"""Add the `description_preview` field used by summary list queries to
+requests created before it existed.
+
+    python scripts/backfill_description_previews.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from firebase_service import FirebaseService  # noqa: E402
+
+
+def main():
+    firebase = FirebaseService()
+    start = time.perf_counter()
+    written = firebase.backfill_description_previews()
+    print(f"Added previews to {written} request(s) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+# scripts/backfill_priority_scores.py
+"""Add the `priority_score` field used by the priority queue to open
+requests created before it existed.
+
+    python scripts/backfill_priority_scores.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from firebase_service import FirebaseService  # noqa: E402
+
+
+def main():
+    firebase = FirebaseService()
+    start = time.perf_counter()
+    written = firebase.backfill_priority_scores()
+    print(f"Scored {written} open request(s) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
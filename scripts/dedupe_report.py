@@ -0,0 +1,43 @@
+# scripts/dedupe_report.py
+"""Report likely duplicate requests and users created by resubmitted forms.
+
+Requests count as duplicates when the same requester posted the same item
+and description within the window. Nothing is deleted; after removing the
+extras, rebuild counters, stats and rollups with the other scripts.
+
+    python scripts/dedupe_report.py --window-minutes 30
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from firebase_service import FirebaseService  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--window-minutes', type=int, default=30)
+    args = parser.parse_args()
+
+    firebase = FirebaseService()
+    report = firebase.find_duplicates(args.window_minutes)
+
+    extra = sum(len(group) - 1 for group in report['requests'])
+    print(f"{len(report['requests'])} duplicated request(s), {extra} extra document(s)")
+    for group in report['requests']:
+        keep, *rest = group
+        print(f"  {keep.get('item')!r} by {keep.get('requester_id')}: keep {keep['id']}, "
+              f"extra {', '.join('%s (%s)' % (r['id'], r.get('status')) for r in rest)}")
+
+    extra = sum(len(group) - 1 for group in report['users'])
+    print(f"{len(report['users'])} duplicated user(s), {extra} extra document(s)")
+    for group in report['users']:
+        keep, *rest = group
+        print(f"  {keep.get('name')!r} in {keep.get('location')!r}: keep {keep['id']}, "
+              f"extra {', '.join(user['id'] for user in rest)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+# scripts/export_analytics.py
+"""Export every live and archived request as a columnar Parquet file for
+offline analysis, and print resolution-time percentiles.
+
+    python scripts/export_analytics.py --out repair_requests.parquet
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analytics import duration_percentiles  # noqa: E402
+from firebase_service import FirebaseService  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', default='repair_requests.parquet')
+    parser.add_argument('--by', default='skill', choices=['skill', 'urgency', 'location'])
+    args = parser.parse_args()
+
+    firebase = FirebaseService()
+    start = time.perf_counter()
+    frame = firebase.get_request_frame()
+    print(f"Loaded {len(frame)} request(s) in {time.perf_counter() - start:.2f}s")
+
+    frame.write_parquet(args.out)
+    print(f"Wrote {args.out}")
+
+    for row in duration_percentiles(frame, args.by, 'resolve'):
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
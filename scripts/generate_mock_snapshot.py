@@ -0,0 +1,110 @@
+# scripts/generate_mock_snapshot.py
+"""Generate a realistic mock database and save it as a snapshot file.
+
+Requests are spread over the past year with a mix of open, assigned and
+resolved ones. Start the app on the result with:
+
+    python scripts/generate_mock_snapshot.py --requests 100000 --out mock_db.snapshot
+    USE_MOCK_DB=true MOCK_DB_SNAPSHOT=mock_db.snapshot streamlit run app.py
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from firebase_service import MockFirestore  # noqa: E402
+from rollups import ESTIMATED_KG_BY_SKILL  # noqa: E402
+
+ITEMS = ['Toaster', 'Bicycle', 'Lamp', 'Chair', 'Jacket', 'Kettle', 'Radio', 'Faucet', 'Zip', 'Drawer']
+WORDS = "wobbly loose torn cracked stuck leaking buzzing snapped frayed dead hinge cord seam".split()
+PLACES = ['Riverside', 'Old Town', 'Hillcrest', 'Harbour', 'Northgate']
+# Each city is its own community
+CITIES = ['Springfield', 'Shelbyville', 'Ogdenville']
+SKILLS = list(ESTIMATED_KG_BY_SKILL)
+
+
+def build_demo_db(requests: int, users: int, days: int = 365, seed: int = 42) -> MockFirestore:
+    rng = random.Random(seed)
+    now = datetime.now()
+    db = MockFirestore()
+
+    # Users are created after the requests (with ids fixed up front) so the
+    # requests aren't fanned out to feeds one at a time; feeds are rebuilt once
+    people = [{'id': f'user_{idx + 1}', 'name': f'Neighbor {idx}',
+               'location': f'{rng.choice(PLACES)}, {rng.choice(CITIES)}',
+               'skills': rng.sample(SKILLS, rng.randint(0, 3))} for idx in range(users)]
+
+    offsets = sorted((rng.random() * days for _ in range(requests)), reverse=True)
+    for offset in offsets:
+        requester = rng.choice(people)
+        request_id = db.create_repair_request({
+            'item': rng.choice(ITEMS),
+            'description': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 40))),
+            'urgency': rng.choice(['Low', 'Medium', 'High']),
+            'location_notes': '',
+            'skill_needed': rng.choice(SKILLS),
+            'notes': '',
+            'requester_id': requester['id'],
+            'requester_name': requester['name'],
+            'requester_location': requester['location'],
+        })
+        req = db.get_repair_request(request_id)
+        req['created_at'] = req['updated_at'] = now - timedelta(days=offset)
+        roll = rng.random()
+        if roll < 0.2:
+            continue
+        repairer = rng.choice(people)
+        assigned_at = min(now, req['created_at'] + timedelta(hours=rng.expovariate(1 / 12)))
+        req.update({'status': 'assigned', 'assigned_to_id': repairer['id'],
+                    'assigned_at': assigned_at, 'updated_at': assigned_at})
+        if roll < 0.35:
+            continue
+        resolved_at = min(now, assigned_at + timedelta(hours=rng.expovariate(1 / 36)))
+        req.update({'status': 'resolved', 'resolved_at': resolved_at, 'updated_at': resolved_at,
+                    'gratitude_note': 'Thank you!' if rng.random() < 0.5 else ''})
+
+    for user in people:
+        db.create_user(dict(user), user['id'])
+    db.next_user_id = users + 1
+
+    # Timestamps and statuses were edited in place, so rebuild everything derived
+    db.reindex()
+    db.rebuild_user_counters()
+    db.rebuild_rollups()
+    db.rebuild_stats_counters()
+    db.rebuild_feeds()
+    db.rebuild_leaderboards()
+    db.rebuild_event_log()
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default='mock_db.snapshot')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = build_demo_db(args.requests, args.users, args.days, args.seed)
+    print(f"Generated {args.requests} requests and {args.users} users in "
+          f"{time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    db.snapshot(args.out)
+    size = Path(args.out).stat().st_size
+    print(f"Saved {args.out} ({size / 1024 / 1024:.1f} MiB) in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    MockFirestore.restore(args.out)
+    print(f"Restore takes {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# scripts/migrate_communities.py
+"""Re-home existing users and requests into their communities.
+
+Sets the `community` field (the city part of the location) on users and on
+live and archived requests written before communities existed, registers
+each community, then rebuilds the per-community stats counters and feeds.
+
+    python scripts/migrate_communities.py --dry-run
+    python scripts/migrate_communities.py
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from firebase_service import FirebaseService  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dry-run', action='store_true', help="count what would change, write nothing")
+    parser.add_argument('--recompute', action='store_true',
+                        help="also re-derive `community` on documents that already have one")
+    args = parser.parse_args()
+
+    firebase = FirebaseService()
+    start = time.perf_counter()
+    changed = firebase.migrate_communities(dry_run=args.dry_run, recompute=args.recompute)
+    verb = "Would re-home" if args.dry_run else "Re-homed"
+    print(f"{verb} {changed['users']} user(s) and {changed['requests']} request(s) "
+          f"in {time.perf_counter() - start:.2f}s")
+    if args.dry_run:
+        return
+
+    stats = firebase.rebuild_stats_counters()
+    feeds = firebase.rebuild_feeds()
+    communities = firebase.list_communities()
+    print(f"Rebuilt stats counters ({stats['total']} requests) and {feeds} feed(s) "
+          f"across {len(communities)} communities")
+
+
+if __name__ == '__main__':
+    main()
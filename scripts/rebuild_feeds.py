@@ -0,0 +1,26 @@
+# scripts/rebuild_feeds.py
+"""Rebuild every "requests you can fix" feed from the open requests.
+
+Also sets `skill_tags` on users, so run it once for users who signed up
+before feeds existed, or after editing someone's skills.
+
+    python scripts/rebuild_feeds.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from firebase_service import FirebaseService  # noqa: E402
+
+
+def main():
+    firebase = FirebaseService()
+    start = time.perf_counter()
+    feeds = firebase.rebuild_feeds()
+    print(f"Rebuilt {feeds} feed(s) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+# scripts/rebuild_leaderboards.py
+"""Rebuild the repairer leaderboards (overall, per skill, per month) from request history.
+
+    python scripts/rebuild_leaderboards.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from firebase_service import FirebaseService  # noqa: E402
+
+
+def main():
+    firebase = FirebaseService()
+    start = time.perf_counter()
+    boards = firebase.rebuild_leaderboards()
+    print(f"Rebuilt {boards} leaderboard(s) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+# scripts/rebuild_rollups.py
+"""Rebuild the daily/weekly/monthly impact rollups from request history.
+
+    python scripts/rebuild_rollups.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from firebase_service import FirebaseService  # noqa: E402
+
+
+def main():
+    firebase = FirebaseService()
+    start = time.perf_counter()
+    buckets = firebase.rebuild_rollups()
+    print(f"Rebuilt {buckets} rollup bucket(s) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
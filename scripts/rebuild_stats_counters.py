@@ -0,0 +1,26 @@
+# scripts/rebuild_stats_counters.py
+"""Recount requests by status and reset the sharded stats counter.
+
+Needed once after upgrading an existing project, and whenever
+STATS_COUNTER_SHARDS is changed and the old shards should be folded together.
+
+    python scripts/rebuild_stats_counters.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from firebase_service import FirebaseService  # noqa: E402
+
+
+def main():
+    firebase = FirebaseService()
+    start = time.perf_counter()
+    stats = firebase.rebuild_stats_counters()
+    print(f"Reset stats counter to {stats} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
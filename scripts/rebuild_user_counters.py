@@ -0,0 +1,26 @@
+# scripts/rebuild_user_counters.py
+"""Backfill per-user counters from the full request history.
+
+Reads Firebase credentials the same way the app does (.streamlit/secrets.toml)
+and falls back to the mock database otherwise.
+
+    python scripts/rebuild_user_counters.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from firebase_service import FirebaseService  # noqa: E402
+
+
+def main():
+    firebase = FirebaseService()
+    start = time.perf_counter()
+    written = firebase.rebuild_user_counters()
+    print(f"Rebuilt counters for {written} user(s) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# scripts/run_maintenance.py
+"""Release stale assignments and expire abandoned open requests.
+
+Runs one pass and prints its statistics, for cron. With --loop it keeps
+running every --interval seconds as a standalone worker.
+
+    python scripts/run_maintenance.py --assignment-timeout-days 14 --expiry-days 90
+    python scripts/run_maintenance.py --loop --interval 3600 --writes-per-second 20
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from firebase_service import FirebaseService  # noqa: E402
+from maintenance import (ASSIGNMENT_TIMEOUT_DAYS, MAINTENANCE_BATCH_SIZE,  # noqa: E402
+                         MAINTENANCE_INTERVAL_SECONDS, MAINTENANCE_WRITES_PER_SECOND,
+                         OPEN_REQUEST_EXPIRY_DAYS, MaintenanceScheduler)
+
+
+def print_run(stats):
+    print(f"Released {stats['released']} stale assignment(s), expired {stats['expired']} open "
+          f"request(s) in {stats['batches']} batch(es), {stats['writes']} write(s), "
+          f"{stats['duration_seconds']:.2f}s "
+          f"(throttled {stats['throttled_seconds']:.1f}s, yielded {stats['yielded_seconds']:.1f}s)"
+          + ("" if stats['done'] else " (more remaining)"))
+    if stats['skipped']:
+        print(f"  {stats['skipped']} request(s) changed before they could be updated")
+    for error in stats['errors']:
+        print(f"  Error: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--assignment-timeout-days', type=float, default=ASSIGNMENT_TIMEOUT_DAYS)
+    parser.add_argument('--expiry-days', type=float, default=OPEN_REQUEST_EXPIRY_DAYS)
+    parser.add_argument('--batch-size', type=int, default=MAINTENANCE_BATCH_SIZE)
+    parser.add_argument('--writes-per-second', type=float, default=MAINTENANCE_WRITES_PER_SECOND)
+    parser.add_argument('--max-batches', type=int, default=None)
+    parser.add_argument('--loop', action='store_true', help="keep running every --interval seconds")
+    parser.add_argument('--interval', type=float, default=MAINTENANCE_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    # A separate process can't see the app's traffic, so only the write rate
+    # limit applies
+    scheduler = MaintenanceScheduler(FirebaseService(), interval=args.interval,
+                                     batch_size=args.batch_size,
+                                     writes_per_second=args.writes_per_second,
+                                     assignment_timeout_days=args.assignment_timeout_days,
+                                     expiry_days=args.expiry_days, quiet_seconds=0)
+    while True:
+        stats = scheduler.run_once(max_batches=args.max_batches)
+        print_run(stats)
+        if not args.loop:
+            return 1 if stats['errors'] else 0
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
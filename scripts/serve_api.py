@@ -0,0 +1,30 @@
+# scripts/serve_api.py
+"""Serve the JSON API (api.py) on a local port.
+
+Uses the same backend choice as the Streamlit app (USE_MOCK_DB,
+USE_FAKE_FIRESTORE or Firebase secrets). Keep it to one process with the
+mock database, which lives in memory.
+
+    USE_MOCK_DB=true python scripts/serve_api.py --port 8000
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import uvicorn  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes (only with a shared backend, not the mock database)")
+    args = parser.parse_args()
+    uvicorn.run('api:app', host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# scripts/tail_events.py
+"""Print change events from the event log, resuming from a named checkpoint.
+
+Reads everything the subscriber hasn't committed yet and exits, or keeps
+tailing with --follow. Run it again with the same --name to continue where
+it stopped.
+
+    python scripts/tail_events.py --name audit --from-latest --follow
+    python scripts/tail_events.py --name audit --community springfield
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from event_log import EVENT_POLL_SECONDS, EventSubscription  # noqa: E402
+from firebase_service import FirebaseService  # noqa: E402
+
+
+def print_events(events):
+    for event in events:
+        print(f"{event['community']:>16} #{event['seq']:<8} {event['at']:%Y-%m-%d %H:%M:%S} "
+              f"{event['type']:<20} {event['entity_id']} {event['data']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--name', default='tail-events', help="subscriber (checkpoint) name")
+    parser.add_argument('--community', action='append', help="only these communities (repeatable)")
+    parser.add_argument('--from-latest', action='store_true',
+                        help="a new subscriber skips events already in the log")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--follow', action='store_true', help="keep waiting for new events")
+    parser.add_argument('--interval', type=float, default=EVENT_POLL_SECONDS)
+    args = parser.parse_args()
+
+    subscription = EventSubscription(FirebaseService(), args.name, communities=args.community,
+                                     batch_size=args.batch_size,
+                                     start='latest' if args.from_latest else 'earliest')
+    if args.follow:
+        try:
+            subscription.tail(print_events, args.interval)
+        except KeyboardInterrupt:
+            pass
+    else:
+        while subscription.run_once(print_events):
+            pass
+    print(f"{subscription.stats['events']} event(s) committed under '{args.name}'", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# sharded_counters.py
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from communities import community_of
+from rollups import nested_increments
+
+COUNTERS_COLLECTION = 'counters'
+STATUS_FIELDS = ('total', 'open', 'assigned', 'resolved', 'expired')
+
+
+def status_deltas(transition: str, before: Dict, after: Dict) -> Dict[str, int]:
+    """Changes to the global per-status counts for one request transition"""
+    if transition == 'created':
+        return {'total': 1, 'open': 1}
+    if transition == 'assigned':
+        return {'open': -1, 'assigned': 1}
+    if transition == 'resolved':
+        return {'assigned': -1, 'resolved': 1}
+    if transition == 'released':
+        return {'assigned': -1, 'open': 1}
+    if transition == 'expired':
+        return {'open': -1, 'expired': 1}
+    return {}
+
+
+def count_statuses(requests: Iterable[Dict]) -> Tuple[Dict[str, int], Dict[str, Dict[str, int]]]:
+    """Per-status counts over `requests`, overall and per community (for rebuilds)"""
+    stats = dict.fromkeys(STATUS_FIELDS, 0)
+    by_community = defaultdict(lambda: dict.fromkeys(STATUS_FIELDS, 0))
+    for req in requests:
+        status = req.get('status', 'open')
+        for counts in (stats, by_community[community_of(req)]):
+            counts['total'] += 1
+            if status in counts:
+                counts[status] += 1
+    return stats, dict(by_community)
+
+
+def _add_into(totals: Dict, values: Dict):
+    """Sum a shard's (possibly nested) fields into `totals` in place"""
+    for field, value in values.items():
+        if isinstance(value, dict):
+            _add_into(totals.setdefault(field, {}), value)
+        else:
+            totals[field] = totals.get(field, 0) + value
+
+
+class ShardedCounter:
+    """A multi-field counter spread over N shard documents in Firestore.
+
+    Firestore sustains roughly one write per second to a single document, so
+    each increment goes to a randomly chosen shard under
+    `{collection}/{name}/shards/{i}`, and reads add all shards up. Fields may
+    be dotted paths ('kg_by_skill.plumbing'), which are summed as nested
+    maps. `read` streams every shard document that exists, so changing
+    `num_shards` later never loses counts; `read_counters` gets shards by id
+    and only sees the first `num_shards`, so don't lower the shard count of
+    counters read that way without a rebuild.
+    """
+
+    def __init__(self, db, name: str, num_shards: int = 10, collection: str = COUNTERS_COLLECTION):
+        self.db = db
+        self.name = name
+        self.num_shards = max(1, num_shards)
+        self.collection = collection
+
+    @property
+    def shards(self):
+        return self.db.collection(self.collection).document(self.name).collection('shards')
+
+    def increment(self, writer, deltas: Dict[str, int], increment):
+        """Add an increment of a random shard to a transaction or batch"""
+        if not deltas:
+            return
+        shard = self.shards.document(str(random.randrange(self.num_shards)))
+        writer.set(shard, nested_increments(deltas, increment), merge=True)
+
+    def read(self, timeout=None) -> Dict[str, int]:
+        totals = {}
+        for shard in self.shards.stream(timeout=timeout):
+            _add_into(totals, shard.to_dict() or {})
+        return totals
+
+    def reset(self, values: Dict[str, int]):
+        """Replace the counter with exact values (used by rebuilds)"""
+        batch = self.db.batch()
+        for shard in self.shards.select([]).stream():
+            batch.delete(shard.reference)
+        batch.set(self.shards.document('0'), dict(values))
+        batch.commit()
+
+
+def read_counters(db, counters: List[ShardedCounter], timeout: Optional[float] = None) -> Dict[str, Dict]:
+    """Totals of several counters from one batched get of their shards,
+    keyed by counter name; counters with no shards yet are left out"""
+    refs = [counter.shards.document(str(idx)) for counter in counters for idx in range(counter.num_shards)]
+    if not refs:
+        return {}
+    totals = {}
+    # get_all returns snapshots in any order; a shard's grandparent is its counter
+    for snap in db.get_all(refs, timeout=timeout):
+        if snap.exists:
+            _add_into(totals.setdefault(snap.reference.parent.parent.id, {}), snap.to_dict() or {})
+    return totals
+
+
+class MockShardedCounter:
+    """In-memory sharded counter with one lock per shard.
+
+    `write_latency` holds the shard lock for that long on every increment to
+    stand in for Firestore's per-document write limit in benchmarks.
+    """
+
+    def __init__(self, num_shards: int = 10, write_latency: float = 0.0):
+        self.num_shards = max(1, num_shards)
+        self.write_latency = write_latency
+        self._shards = [defaultdict(int) for _ in range(self.num_shards)]
+        self._locks = [threading.Lock() for _ in range(self.num_shards)]
+
+    def increment(self, deltas: Dict[str, int]):
+        if not deltas:
+            return
+        idx = random.randrange(self.num_shards)
+        with self._locks[idx]:
+            if self.write_latency:
+                time.sleep(self.write_latency)
+            for field, delta in deltas.items():
+                self._shards[idx][field] += delta
+
+    def read(self) -> Dict[str, int]:
+        totals = defaultdict(int)
+        for idx, shard in enumerate(self._shards):
+            with self._locks[idx]:
+                for field, value in shard.items():
+                    totals[field] += value
+        return dict(totals)
+
+    def reset(self, values: Dict[str, int]):
+        for idx in range(self.num_shards):
+            with self._locks[idx]:
+                self._shards[idx] = defaultdict(int)
+        with self._locks[0]:
+            self._shards[0].update(values)
@@ -0,0 +1,229 @@
+# spill_store.py
+import os
+import pickle
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping, Sequence
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+# Memory the mock may spend on cold (archived) records before spilling them to
+# disk; 0 keeps everything in memory
+MOCK_MEMORY_BUDGET_MB = float(os.environ.get('MOCK_MEMORY_BUDGET_MB', '0'))
+# Where spill files go (the system temp directory by default)
+MOCK_SPILL_DIR = os.environ.get('MOCK_SPILL_DIR') or None
+
+# Rewrite the spill file once superseded copies take up more than this share of it
+COMPACT_GARBAGE_RATIO = 0.5
+
+
+def record_size(record: Dict) -> int:
+    """Rough bytes held by a record: the dict, its values and one level below them"""
+    size = sys.getsizeof(record)
+    for value in record.values():
+        size += sys.getsizeof(value)
+        if isinstance(value, (list, tuple, set)):
+            size += sum(map(sys.getsizeof, value))
+        elif isinstance(value, dict):
+            size += sum(map(sys.getsizeof, value.values()))
+    return size
+
+
+class RecordsView(Sequence):
+    """Read-only view of the first `len(items)` items of a list.
+
+    Lets a list the owner only appends to (or swaps for a new one) be handed
+    out without copying it. Later appends stay out of the view, so it reads
+    like a copy taken when the view was made.
+    """
+
+    __slots__ = ('_items', '_len')
+
+    def __init__(self, items: List):
+        self._items = items
+        self._len = len(items)
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._items[i] for i in range(self._len)[index]]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError('view index out of range')
+        return self._items[index]
+
+    def __iter__(self):
+        return islice(self._items, self._len)
+
+    def __repr__(self):
+        return f"RecordsView({self._len} records)"
+
+
+class SpillStore(MutableMapping):
+    """Records by id that keep at most `budget_bytes` of themselves in memory.
+
+    The least recently used records over budget are pickled to an append-only
+    temporary file and read back (and kept again) the next time they're
+    looked up. `values()` streams every record without pulling spilled ones
+    back into memory. A budget of 0 never spills.
+
+    Records are handed out, not copied: after changing one in place, store it
+    again (`store[id] = record`) so the change isn't lost when it's evicted.
+    """
+
+    def __init__(self, budget_bytes: float = MOCK_MEMORY_BUDGET_MB * 1024 * 1024,
+                 spill_dir: Optional[str] = MOCK_SPILL_DIR):
+        self.budget_bytes = budget_bytes
+        self.spill_dir = spill_dir
+        # Every id, in insertion order
+        self._ids = {}
+        # Resident records, least recently used first, with their sizes
+        self._resident = OrderedDict()
+        self._sizes = {}
+        self.resident_bytes = 0
+        # Ids whose resident copy differs from the one on disk (or has none)
+        self._dirty = set()
+        # (offset, length) of each record's latest copy in the spill file
+        self._spans = {}
+        self._file = None
+        self._file_bytes = 0
+        self._garbage_bytes = 0
+        self.stats = {'hits': 0, 'faults': 0, 'evictions': 0, 'spill_writes': 0, 'compactions': 0}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, record_id):
+        return record_id in self._ids
+
+    def __iter__(self):
+        return iter(list(self._ids))
+
+    def __getitem__(self, record_id):
+        with self._lock:
+            record = self._resident.get(record_id)
+            if record is not None:
+                self._resident.move_to_end(record_id)
+                self.stats['hits'] += 1
+                return record
+            if record_id not in self._spans:
+                raise KeyError(record_id)
+            record = self._read(record_id)
+            self.stats['faults'] += 1
+            self._keep(record_id, record)
+            self._evict()
+            return record
+
+    def __setitem__(self, record_id, record):
+        with self._lock:
+            if record_id in self._resident:
+                self.resident_bytes -= self._sizes[record_id]
+            self._ids[record_id] = None
+            self._keep(record_id, record)
+            self._dirty.add(record_id)
+            self._evict()
+
+    def __delitem__(self, record_id):
+        with self._lock:
+            del self._ids[record_id]
+            if record_id in self._resident:
+                del self._resident[record_id]
+                self.resident_bytes -= self._sizes.pop(record_id)
+            self._dirty.discard(record_id)
+            span = self._spans.pop(record_id, None)
+            if span:
+                self._garbage_bytes += span[1]
+
+    def values(self) -> Iterator[Dict]:
+        """Every record in insertion order; spilled ones are read but not kept"""
+        for record_id in list(self._ids):
+            with self._lock:
+                record = self._resident.get(record_id)
+                if record is None and record_id in self._spans:
+                    record = self._read(record_id)
+            if record is not None:
+                yield record
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+            self._resident.clear()
+            self._sizes.clear()
+            self._dirty.clear()
+            self._spans.clear()
+            self.resident_bytes = 0
+            if self._file is not None:
+                self._file.close()
+            self._file, self._file_bytes, self._garbage_bytes = None, 0, 0
+
+    def resize(self, budget_bytes: float):
+        """Change the budget, spilling straight away if it shrank"""
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self._evict()
+
+    def memory_stats(self) -> Dict:
+        with self._lock:
+            return {'records': len(self._ids), 'resident': len(self._resident),
+                    'spilled': len(self._ids) - len(self._resident),
+                    'resident_bytes': self.resident_bytes, 'budget_bytes': int(self.budget_bytes),
+                    'spill_file_bytes': self._file_bytes, 'garbage_bytes': self._garbage_bytes,
+                    **self.stats}
+
+    def _keep(self, record_id, record):
+        self._resident[record_id] = record
+        self._resident.move_to_end(record_id)
+        self._sizes[record_id] = record_size(record)
+        self.resident_bytes += self._sizes[record_id]
+
+    def _evict(self):
+        """Spill least recently used records until back under budget; the newest stays"""
+        if not self.budget_bytes:
+            return
+        while self.resident_bytes > self.budget_bytes and len(self._resident) > 1:
+            record_id, record = self._resident.popitem(last=False)
+            self.resident_bytes -= self._sizes.pop(record_id)
+            if record_id in self._dirty or record_id not in self._spans:
+                self._write(record_id, record)
+                self._dirty.discard(record_id)
+            self.stats['evictions'] += 1
+        if self._garbage_bytes > self._file_bytes * COMPACT_GARBAGE_RATIO:
+            self._compact()
+
+    def _write(self, record_id, record):
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix='mock-spill-', dir=self.spill_dir)
+        blob = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        old = self._spans.get(record_id)
+        if old:
+            self._garbage_bytes += old[1]
+        self._file.seek(self._file_bytes)
+        self._file.write(blob)
+        self._spans[record_id] = (self._file_bytes, len(blob))
+        self._file_bytes += len(blob)
+        self.stats['spill_writes'] += 1
+
+    def _read(self, record_id) -> Dict:
+        offset, length = self._spans[record_id]
+        self._file.seek(offset)
+        return pickle.loads(self._file.read(length))
+
+    def _compact(self):
+        """Copy the latest copy of each spilled record into a fresh file"""
+        compacted = tempfile.TemporaryFile(prefix='mock-spill-', dir=self.spill_dir)
+        spans, offset = {}, 0
+        for record_id, (start, length) in self._spans.items():
+            self._file.seek(start)
+            compacted.write(self._file.read(length))
+            spans[record_id] = (offset, length)
+            offset += length
+        self._file.close()
+        self._file, self._spans = compacted, spans
+        self._file_bytes, self._garbage_bytes = offset, 0
+        self.stats['compactions'] += 1
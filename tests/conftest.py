@@ -0,0 +1,49 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Settings that would change which backend FirebaseService picks, or wrap it
+BACKEND_SETTINGS = ('USE_MOCK_DB', 'USE_FAKE_FIRESTORE', 'MOCK_DB_SNAPSHOT', 'MOCK_FAULT_RATE',
+                    'MOCK_LATENCY_MS', 'WRITE_BEHIND', 'FAKE_FIRESTORE_LATENCY_MS')
+
+
+@pytest.fixture
+def clean_env(monkeypatch):
+    for name in BACKEND_SETTINGS:
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+@pytest.fixture
+def mock_service(clean_env):
+    """FirebaseService over an empty MockFirestore"""
+    clean_env.setenv('USE_MOCK_DB', 'true')
+    from firebase_service import FirebaseService
+    return FirebaseService()
+
+
+@pytest.fixture
+def fake_service(clean_env):
+    """FirebaseService running its Firestore code path against FakeFirestoreClient"""
+    clean_env.setenv('USE_FAKE_FIRESTORE', 'true')
+    from firebase_service import FirebaseService
+    return FirebaseService()
+
+
+def seed_people(firebase, location='Riverside, Springfield'):
+    """A requester and a repairer in one community"""
+    requester = firebase.create_user({'name': 'Rita', 'location': location, 'skills': []})
+    repairer = firebase.create_user({'name': 'Sam', 'location': location, 'skills': ['Electrical']})
+    return requester, repairer
+
+
+def new_request(firebase, requester, item='Lamp', **fields):
+    requester_location = firebase.get_user(requester)['location']
+    return firebase.create_repair_request({
+        'item': item, 'description': 'Flickers', 'urgency': 'Medium', 'skill_needed': 'Electrical',
+        'requester_id': requester, 'requester_name': 'Rita', 'requester_location': requester_location,
+        **fields})
@@ -0,0 +1,75 @@
+# tests/test_analytics.py
+import io
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+
+from analytics import RequestFrame, backlog_trend, duration_percentiles
+
+NOW = datetime(2026, 3, 31, 12, 0)
+
+
+def days_ago(days, hour=9):
+    return (NOW - timedelta(days=days)).replace(hour=hour, minute=0)
+
+
+def request(status, created, **times):
+    return {'status': status, 'urgency': 'Medium', 'skill_needed': 'Electrical',
+            'requester_location': 'Riverside', 'created_at': created, **times}
+
+
+def test_backlog_counts_each_stage_once():
+    frame = RequestFrame.from_requests([
+        request('open', days_ago(5)),
+        request('assigned', days_ago(5), assigned_at=days_ago(4)),
+        request('resolved', days_ago(5), assigned_at=days_ago(4), resolved_at=days_ago(3)),
+        # Resolved before claims were stamped: claimed when created
+        request('resolved', days_ago(5), resolved_at=days_ago(2)),
+    ])
+    trend = backlog_trend(frame, days=10, now=NOW)
+
+    assert trend['created'].sum() == 4
+    assert trend['claimed'].sum() == 3
+    assert trend['resolved'].sum() == 2
+    assert trend['open_backlog'][-1] == 1
+    assert trend['unresolved_backlog'][-1] == 2
+
+
+def test_expired_requests_leave_the_backlog_unclaimed():
+    frame = RequestFrame.from_requests([
+        request('expired', days_ago(8), expired_at=days_ago(3)),
+        # Claimed, then released and left to expire
+        request('expired', days_ago(8), expired_at=days_ago(3), released_at=days_ago(6)),
+        request('open', days_ago(8)),
+    ])
+    trend = backlog_trend(frame, days=10, now=NOW)
+
+    assert trend['claimed'].sum() == 0
+    assert trend['expired'].sum() == 2
+    # Both expired requests were in the backlog until the day they expired
+    assert trend['open_backlog'][-5] == 3
+    assert trend['open_backlog'][-1] == 1
+    assert trend['unresolved_backlog'][-1] == 1
+
+
+def test_percentiles_skip_unfinished_requests():
+    frame = RequestFrame.from_requests([
+        request('resolved', days_ago(3, 8), resolved_at=days_ago(3, 10)),
+        request('resolved', days_ago(3, 8), resolved_at=days_ago(3, 12)),
+        request('expired', days_ago(3, 8), expired_at=days_ago(1)),
+    ])
+    [row] = duration_percentiles(frame, 'skill', 'resolve', percentiles=(50,))
+    assert row == {'skill': 'Electrical', 'count': 2, 'p50_hours': 3.0}
+
+
+def test_parquet_round_trip_and_older_exports():
+    frame = RequestFrame.from_requests([request('expired', days_ago(8), expired_at=days_ago(3))])
+    buffer = io.BytesIO()
+    frame.write_parquet(buffer)
+    restored = RequestFrame.read_parquet(pa.BufferReader(buffer.getvalue()))
+    assert backlog_trend(restored, days=10, now=NOW)['expired'].sum() == 1
+
+    # Exports from before expiry was tracked have no expired_at column
+    older = RequestFrame.from_arrow(frame.to_arrow().drop(['expired_at']))
+    assert len(older) == 1
+    assert backlog_trend(older, days=10, now=NOW)['expired'].sum() == 0
@@ -0,0 +1,62 @@
+# tests/test_archive.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from archive import ARCHIVE_COLLECTION
+from conftest import new_request, seed_people
+
+
+@pytest.fixture(params=['mock_service', 'fake_service'])
+def firebase(request):
+    return request.getfixturevalue(request.param)
+
+
+def resolved_at(firebase, request_id, when):
+    """Backdate a resolved request"""
+    if firebase.mock_mode:
+        firebase.db._requests_by_id[request_id]['resolved_at'] = when
+    else:
+        firebase.db.collection('repair_requests').document(request_id).update({'resolved_at': when})
+
+
+def resolved_requests(firebase, count, when):
+    requester, repairer = seed_people(firebase)
+    request_ids = []
+    for i in range(count):
+        request_id = new_request(firebase, requester, f'Lamp {i}')
+        firebase.assign_repairer(request_id, repairer)
+        firebase.resolve_request(request_id, 'Thanks', repairer_id=repairer)
+        resolved_at(firebase, request_id, when)
+        request_ids.append(request_id)
+    return request_ids
+
+
+def is_archived(firebase, request_id):
+    if firebase.mock_mode:
+        return request_id in firebase.db.archive
+    return firebase.db.collection(ARCHIVE_COLLECTION).document(request_id).get().exists
+
+
+def test_ties_across_a_batch_boundary_are_all_archived(firebase, tmp_path):
+    # Five requests resolved at the same moment, archived two at a time
+    request_ids = resolved_requests(firebase, 5, datetime.now() - timedelta(days=200))
+    state = firebase.archive_resolved_requests(90, batch_size=2,
+                                               checkpoint_path=str(tmp_path / 'checkpoint.json'))
+
+    assert state['done'] and state['archived'] == 5
+    assert all(is_archived(firebase, request_id) for request_id in request_ids)
+    assert all(firebase.get_repair_request(request_id)['status'] == 'resolved' for request_id in request_ids)
+
+
+def test_interrupted_run_resumes_inside_a_tie(firebase, tmp_path):
+    request_ids = resolved_requests(firebase, 5, datetime.now() - timedelta(days=200))
+    checkpoint_path = str(tmp_path / 'checkpoint.json')
+
+    first = firebase.archive_resolved_requests(90, batch_size=3, checkpoint_path=checkpoint_path,
+                                               max_batches=1)
+    assert not first['done'] and first['archived'] == 3
+    second = firebase.archive_resolved_requests(90, batch_size=3, checkpoint_path=checkpoint_path)
+
+    assert second['done'] and second['archived'] == 5
+    assert all(is_archived(firebase, request_id) for request_id in request_ids)
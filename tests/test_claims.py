@@ -0,0 +1,63 @@
+# tests/test_claims.py
+import threading
+
+import pytest
+
+from conftest import new_request, seed_people
+
+
+@pytest.fixture(params=['mock_service', 'fake_service'])
+def firebase(request):
+    return request.getfixturevalue(request.param)
+
+
+def test_second_claim_loses(firebase):
+    requester, repairer = seed_people(firebase)
+    other = firebase.create_user({'name': 'Olu', 'location': 'Riverside, Springfield', 'skills': []})
+    request_id = new_request(firebase, requester)
+
+    assert firebase.assign_repairer(request_id, repairer) is True
+    assert firebase.assign_repairer(request_id, other) is False
+    stored = firebase.get_repair_request(request_id)
+    assert stored['status'] == 'assigned'
+    assert stored['assigned_to_id'] == repairer
+    assert firebase.get_stats()['assigned'] == 1
+
+
+def test_only_the_assignee_resolves_and_only_once(firebase):
+    requester, repairer = seed_people(firebase)
+    request_id = new_request(firebase, requester)
+    firebase.assign_repairer(request_id, repairer)
+
+    assert firebase.resolve_request(request_id, 'Thanks', repairer_id=requester) is False
+    assert firebase.resolve_request(request_id, 'Thanks', repairer_id=repairer) is True
+    assert firebase.resolve_request(request_id, 'Thanks again', repairer_id=repairer) is False
+    assert firebase.get_user_counters(repairer)['resolved_as_repairer'] == 1
+    assert firebase.get_stats()['resolved'] == 1
+
+
+def test_concurrent_claims_have_one_winner(firebase):
+    requester, _ = seed_people(firebase)
+    claimers = [firebase.create_user({'name': f'Fixer {i}', 'location': 'Riverside, Springfield',
+                                      'skills': ['Electrical']}) for i in range(8)]
+    request_id = new_request(firebase, requester)
+    if not firebase.mock_mode:
+        firebase.db.latency = 0.002  # widen the window between read and commit
+    barrier = threading.Barrier(len(claimers))
+    won = []
+
+    def claim(user_id):
+        barrier.wait()
+        if firebase._assign_repairer(request_id, user_id):
+            won.append(user_id)
+
+    threads = [threading.Thread(target=claim, args=(user_id,)) for user_id in claimers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(won) == 1
+    assert firebase.get_repair_request(request_id)['assigned_to_id'] == won[0]
+    assert firebase.get_stats() == {'total': 1, 'open': 0, 'assigned': 1, 'resolved': 0, 'expired': 0}
+    assert firebase.get_user_counters(won[0])['assigned_in_progress'] == 1
@@ -0,0 +1,113 @@
+# tests/test_delta_sync.py
+from datetime import datetime, timedelta
+
+import pytest
+from google.cloud.firestore_v1.transforms import SERVER_TIMESTAMP
+
+from conftest import new_request, seed_people
+from delta_sync import RequestSyncCache
+
+
+def write_batch(firebase, count, start=0):
+    """`count` requests in one commit, so they all share one updated_at"""
+    batch = firebase.db.batch()
+    for n in range(start, start + count):
+        batch.set(firebase.db.collection('repair_requests').document(f'req{n:03d}'), {
+            'item': f'Lamp {n}', 'status': 'open', 'created_at': datetime(2026, 10, 19),
+            'updated_at': SERVER_TIMESTAMP})
+    batch.commit()
+
+
+def test_pages_inside_one_timestamp_skip_nothing(fake_service):
+    write_batch(fake_service, 4)
+    cache = RequestSyncCache(page_size=3)
+    cache.sync(fake_service)
+    fetched = cache.stats['rows_fetched']
+
+    write_batch(fake_service, 7, start=4)
+    rows = cache.sync(fake_service)
+    assert len(rows) == 11
+    # The overlap re-reads the first batch once; nothing is fetched twice
+    assert cache.stats['rows_fetched'] - fetched == 11
+
+
+def test_cursor_orders_ties_by_id(fake_service):
+    write_batch(fake_service, 5)
+    rows = fake_service.get_requests_changed_since(None, limit=2)
+    assert [row['id'] for row in rows] == ['req000', 'req001']
+    rest = fake_service.get_requests_changed_since(rows[-1]['updated_at'], after_id=rows[-1]['id'])
+    assert [row['id'] for row in rest] == ['req002', 'req003', 'req004']
+    assert fake_service.get_requests_changed_since(rows[-1]['updated_at']) == []
+
+
+def test_mock_pages_by_the_same_cursor(mock_service):
+    requester, repairer = seed_people(mock_service)
+    ids = [new_request(mock_service, requester, item=f'Lamp {n}') for n in range(5)]
+    mock_service.assign_repairer(ids[0], repairer)
+
+    seen, since, after_id = [], None, None
+    while True:
+        rows = mock_service.get_requests_changed_since(since, limit=2, after_id=after_id)
+        seen += [row['id'] for row in rows]
+        if len(rows) < 2:
+            break
+        since, after_id = rows[-1]['updated_at'], rows[-1]['id']
+    assert seen == ids[1:] + ids[:1]
+
+
+def test_sync_merges_changes(mock_service):
+    requester, repairer = seed_people(mock_service)
+    request_id = new_request(mock_service, requester)
+    cache = RequestSyncCache(page_size=2)
+    cache.sync(mock_service)
+    mock_service.assign_repairer(request_id, repairer)
+    new_request(mock_service, requester, item='Toaster')
+
+    rows = cache.sync(mock_service)
+    assert [row['item'] for row in rows] == ['Toaster', 'Lamp']
+    assert rows[1]['status'] == 'assigned'
+    assert cache.stats['full_loads'] == 1
+
+
+def resolved_long_ago(firebase, requester, repairer, item):
+    request_id = new_request(firebase, requester, item=item)
+    firebase.assign_repairer(request_id, repairer)
+    firebase.resolve_request(request_id, 'Thanks', repairer_id=repairer)
+    when = datetime.now() - timedelta(days=200)
+    if firebase.mock_mode:
+        firebase.db._requests_by_id[request_id]['resolved_at'] = when
+    else:
+        firebase.db.collection('repair_requests').document(request_id).update({'resolved_at': when})
+    return request_id
+
+
+@pytest.mark.parametrize('backend', ['mock_service', 'fake_service'])
+def test_sync_drops_requests_archived_between_syncs(backend, request, tmp_path):
+    firebase = request.getfixturevalue(backend)
+    requester, repairer = seed_people(firebase)
+    archived = resolved_long_ago(firebase, requester, repairer, 'Lamp')
+    kept = new_request(firebase, requester, item='Toaster')
+    cache = RequestSyncCache()
+    assert {row['id'] for row in cache.sync(firebase)} == {archived, kept}
+
+    firebase.archive_resolved_requests(90, checkpoint_path=str(tmp_path / 'checkpoint.json'))
+    rows = cache.sync(firebase)
+
+    assert [row['id'] for row in rows] == [kept]
+    assert cache.stats['rows_dropped'] == 1
+    assert cache.stats['full_loads'] == 1
+
+
+def test_sync_reloads_when_archived_ids_are_unknown(mock_service):
+    requester, _ = seed_people(mock_service)
+    new_request(mock_service, requester)
+    cache = RequestSyncCache()
+    cache.sync(mock_service)
+
+    # What a failed guarded read returns
+    mock_service.get_archived_request_ids_since = lambda since: None
+    cache.sync(mock_service)
+    assert not cache.loaded
+    del mock_service.get_archived_request_ids_since
+    assert len(cache.sync(mock_service)) == 1
+    assert cache.stats['full_loads'] == 2
@@ -0,0 +1,117 @@
+# tests/test_event_log.py
+import threading
+
+import pytest
+
+from conftest import new_request, seed_people
+from event_log import EventSubscription
+
+LOCATION = 'Riverside, Springfield'
+
+
+@pytest.fixture(params=['mock_service', 'fake_service'])
+def firebase(request):
+    return request.getfixturevalue(request.param)
+
+
+def drain(subscription, batches=None):
+    """Run the subscription until caught up (or for `batches` batches); returns the events seen"""
+    seen = []
+    while batches is None or batches > 0:
+        if not subscription.run_once(seen.extend):
+            break
+        if batches is not None:
+            batches -= 1
+    return seen
+
+
+def test_changes_are_logged_in_order(firebase):
+    requester, repairer = seed_people(firebase)
+    request_id = new_request(firebase, requester)
+    firebase.assign_repairer(request_id, repairer)
+    firebase.resolve_request(request_id, 'Thanks', repairer_id=repairer)
+
+    events = drain(EventSubscription(firebase, 'audit'))
+    assert [event['type'] for event in events] == [
+        'UserCreated', 'UserCreated', 'RequestCreated', 'RepairerAssigned', 'RequestResolved']
+    assert [event['seq'] for event in events] == [1, 2, 3, 4, 5]
+    assert events[2]['entity_id'] == request_id
+    assert 'recorded_at' not in events[2]
+
+
+def test_checkpoint_resumes_without_gaps(firebase):
+    requester, _ = seed_people(firebase)
+    for i in range(7):
+        new_request(firebase, requester, f'Lamp {i}')
+
+    first = EventSubscription(firebase, 'audit', batch_size=3)
+    seen = drain(first, batches=1)
+    assert len(seen) == 3
+
+    # More events arrive while the consumer is down; a new instance under
+    # the same name picks up right after the last committed event
+    new_request(firebase, requester, 'Kettle')
+    resumed = EventSubscription(firebase, 'audit', batch_size=3)
+    seen += drain(resumed)
+
+    assert [event['seq'] for event in seen] == list(range(1, 11))
+    assert resumed.stats['missed'] == 0
+    assert resumed.lag() == {seen[0]['community']: 0}
+
+
+def test_latest_skips_the_existing_log(firebase):
+    requester, _ = seed_people(firebase)
+    new_request(firebase, requester)
+    subscription = EventSubscription(firebase, 'alerts', start='latest')
+    assert drain(subscription) == []
+
+    request_id = new_request(firebase, requester, 'Kettle')
+    assert [event['entity_id'] for event in drain(subscription)] == [request_id]
+
+
+def test_concurrent_writers_get_contiguous_sequence_numbers(fake_service):
+    requester, _ = seed_people(fake_service)
+    fake_service.db.latency = 0.002
+    writers, per_writer = 8, 5
+    barrier = threading.Barrier(writers)
+
+    def write(idx):
+        barrier.wait()
+        for i in range(per_writer):
+            fake_service._write_repair_request({
+                'item': f'Lamp {idx}.{i}', 'description': 'Flickers', 'urgency': 'Low',
+                'skill_needed': 'Electrical', 'requester_id': requester,
+                'requester_name': 'Rita', 'requester_location': LOCATION})
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Appending reads nothing for the log, so the creates never abort
+    assert fake_service.db.aborts == 0
+    events = drain(EventSubscription(fake_service, 'audit'))
+    assert [event['seq'] for event in events] == list(range(1, writers * per_writer + 3))
+
+
+def test_racing_sequencers_number_each_event_once(fake_service):
+    requester, _ = seed_people(fake_service)
+    for i in range(20):
+        new_request(fake_service, requester, f'Lamp {i}')
+    fake_service.db.latency = 0.002
+    barrier = threading.Barrier(4)
+
+    def read_heads():
+        barrier.wait()
+        fake_service.get_event_heads()
+
+    threads = [threading.Thread(target=read_heads) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stored = [doc.to_dict()['seq'] for doc in fake_service.db.collection('events').stream()]
+    assert sorted(stored) == list(range(1, 23))
+    assert list(fake_service.get_event_heads().values()) == [22]
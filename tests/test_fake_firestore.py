@@ -0,0 +1,78 @@
+# tests/test_fake_firestore.py
+import pytest
+from firebase_admin import firestore
+from google.api_core.exceptions import Aborted, AlreadyExists
+
+from fake_firestore import MAX_ATTEMPTS, FakeFirestoreClient
+
+
+@pytest.fixture
+def client():
+    return FakeFirestoreClient()
+
+
+def test_transaction_retries_after_a_conflicting_write(client):
+    ref = client.collection('docs').document('a')
+    ref.set({'n': 0})
+    attempts = []
+
+    @firestore.transactional
+    def bump(transaction):
+        n = ref.get(transaction=transaction).get('n')
+        attempts.append(n)
+        if len(attempts) == 1:
+            ref.set({'n': 10})  # someone else writes between our read and commit
+        transaction.update(ref, {'n': n + 1})
+
+    bump(client.transaction())
+    assert attempts == [0, 10]
+    assert ref.get().get('n') == 11
+
+
+def test_exhausted_retries_surface_the_commit_failure(client):
+    ref = client.collection('docs').document('a')
+    ref.set({'n': 0})
+    attempts = []
+
+    @firestore.transactional
+    def bump(transaction):
+        n = ref.get(transaction=transaction).get('n')
+        attempts.append(n)
+        ref.set({'n': n + 100})  # every attempt loses the race
+        transaction.update(ref, {'n': n + 1})
+
+    with pytest.raises(ValueError, match=f"Failed to commit transaction in {MAX_ATTEMPTS} attempts") as raised:
+        bump(client.transaction())
+    assert isinstance(raised.value.__cause__, Aborted)
+    assert len(attempts) == MAX_ATTEMPTS
+    assert ref.get().get('n') == 100 * MAX_ATTEMPTS
+
+
+def test_failed_commit_rolls_back_without_writing(client):
+    ref = client.collection('docs').document('a')
+    ref.set({'n': 0})
+    other = client.collection('docs').document('b')
+
+    @firestore.transactional
+    def create_twice(transaction):
+        ref.get(transaction=transaction)
+        transaction.update(ref, {'n': 1})
+        transaction.create(other, {'n': 1})
+        transaction.create(other, {'n': 2})
+
+    with pytest.raises(AlreadyExists):
+        create_twice(client.transaction())
+    assert ref.get().get('n') == 0
+    assert not other.get().exists
+
+
+def test_read_after_write_is_rejected(client):
+    ref = client.collection('docs').document('a')
+
+    @firestore.transactional
+    def write_then_read(transaction):
+        transaction.set(ref, {'n': 1})
+        ref.get(transaction=transaction)
+
+    with pytest.raises(ValueError, match="read after write"):
+        write_then_read(client.transaction())
@@ -0,0 +1,33 @@
+# tests/test_idempotency.py
+import pytest
+
+from conftest import seed_people
+from idempotency import idempotency_key, new_form_key
+
+
+@pytest.fixture(params=['mock_service', 'fake_service'])
+def firebase(request):
+    return request.getfixturevalue(request.param)
+
+
+def submit(firebase, requester, form_key):
+    data = {'item': 'Lamp', 'description': 'Flickers', 'urgency': 'Low', 'skill_needed': 'Electrical',
+            'requester_id': requester, 'requester_name': 'Rita',
+            'requester_location': 'Riverside, Springfield', 'status': 'open'}
+    return firebase.create_repair_request(dict(data), idempotency_key=idempotency_key(form_key, data))
+
+
+def test_retried_submit_creates_once(firebase):
+    requester, _ = seed_people(firebase)
+    form_key = new_form_key()
+    first = submit(firebase, requester, form_key)
+    assert submit(firebase, requester, form_key) == first
+    assert firebase.get_stats()['total'] == 1
+
+
+def test_same_values_after_a_new_form_key_create_again(firebase):
+    requester, _ = seed_people(firebase)
+    first = submit(firebase, requester, new_form_key())
+    second = submit(firebase, requester, new_form_key())
+    assert first != second
+    assert firebase.get_stats()['total'] == 2
@@ -0,0 +1,67 @@
+# tests/test_leaderboards.py
+from datetime import datetime
+
+import pytest
+
+import firebase_service
+from conftest import new_request, seed_people
+from leaderboard import OVERALL, TopK, month_board, skill_board
+
+
+@pytest.fixture(params=['mock_service', 'fake_service'])
+def firebase(request):
+    return request.getfixturevalue(request.param)
+
+
+def fix(firebase, requester, repairer, item='Lamp'):
+    request_id = new_request(firebase, requester, item=item)
+    firebase.assign_repairer(request_id, repairer)
+    assert firebase.resolve_request(request_id, 'Thanks', repairer_id=repairer)
+
+
+def test_top_k_keeps_the_highest_counts():
+    top = TopK(2)
+    for user_id, count in (('a', 1), ('b', 1), ('c', 2)):
+        top.offer(user_id, count, user_id.upper())
+    # The board was full, so c pushed out the lowest entry
+    assert [e['user_id'] for e in top.entries()] == ['c', 'b']
+    assert top.offer('b', 3, 'B')
+    assert [(e['user_id'], e['count']) for e in top.entries()] == [('b', 3), ('c', 2)]
+
+
+def test_resolves_rank_repairers(firebase):
+    requester, sam = seed_people(firebase)
+    ola = firebase.create_user({'name': 'Ola', 'location': 'Riverside, Springfield', 'skills': ['Electrical']})
+    fix(firebase, requester, sam)
+    fix(firebase, requester, sam, item='Radio')
+    fix(firebase, requester, ola)
+
+    month = month_board(datetime.now())
+    boards = firebase.get_leaderboards([OVERALL, skill_board('Electrical'), month])
+    for board in boards.values():
+        assert [(e['name'], e['count']) for e in board['top']] == [('Sam', 2), ('Ola', 1)]
+    assert boards[OVERALL]['skills'] == {'electrical': 3}
+    assert boards[OVERALL]['resolved'] == 3
+
+    firebase.rebuild_leaderboards()
+    firebase._forget_rerun_reads()
+    assert firebase.get_leaderboards([OVERALL, month]) == {
+        board: boards[board] for board in (OVERALL, month)}
+
+
+def test_resolves_leave_board_documents_to_readers(fake_service, monkeypatch):
+    requester, sam = seed_people(fake_service)
+    fix(fake_service, requester, sam)
+    monkeypatch.setattr(firebase_service, 'LEADERBOARD_REFRESH_SECONDS', 3600)
+    assert fake_service.get_leaderboards([OVERALL])[OVERALL]['top'][0]['count'] == 1
+
+    writes = fake_service.db.collection('leaderboards').document(OVERALL).get().update_time
+    fix(fake_service, requester, sam, item='Radio')
+    overall = fake_service.db.collection('leaderboards').document(OVERALL).get()
+    assert overall.update_time == writes
+    # Totals are read live; the ranking waits for the next refresh
+    board = fake_service.get_leaderboards([OVERALL])[OVERALL]
+    assert (board['resolved'], board['top'][0]['count']) == (2, 1)
+
+    monkeypatch.setattr(firebase_service, 'LEADERBOARD_REFRESH_SECONDS', 0)
+    assert fake_service.get_leaderboards([OVERALL])[OVERALL]['top'][0]['count'] == 2
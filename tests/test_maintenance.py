@@ -0,0 +1,80 @@
+# tests/test_maintenance.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import new_request, seed_people
+from maintenance import MaintenanceScheduler, RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture(params=['mock_service', 'fake_service'])
+def firebase(request):
+    return request.getfixturevalue(request.param)
+
+
+def test_rate_limiter_allows_a_burst_then_paces():
+    clock = Clock()
+    limiter = RateLimiter(10, clock=clock, sleep=clock.sleep)
+    assert limiter.acquire(10) == 0
+    assert limiter.acquire(5) == pytest.approx(0.5)
+    clock.now += 2
+    assert limiter.acquire(10) == 0
+    assert RateLimiter(0).acquire(1000) == 0
+
+
+def scheduler(firebase, **options):
+    return MaintenanceScheduler(firebase, batch_size=2, writes_per_second=0, quiet_seconds=0,
+                                assignment_timeout_days=14, expiry_days=90, **options)
+
+
+def test_stale_assignments_are_released_then_old_requests_expire(firebase):
+    requester, repairer = seed_people(firebase)
+    ids = [new_request(firebase, requester, item=f'Lamp {n}') for n in range(3)]
+    firebase.assign_repairer(ids[0], repairer)
+    now = datetime.now()
+
+    stats = scheduler(firebase).run_once(now + timedelta(days=20))
+    assert (stats['released'], stats['expired'], stats['errors']) == (1, 0, [])
+    assert firebase.get_repair_request(ids[0])['status'] == 'open'
+    assert firebase.get_user_counters(repairer)['assigned_in_progress'] == 0
+
+    stats = scheduler(firebase).run_once(now + timedelta(days=100))
+    assert stats['expired'] == 3
+    assert stats['batches'] == 3  # two full batches, then an empty one
+    counts = firebase.get_stats()
+    assert (counts['open'], counts['assigned'], counts['expired']) == (0, 0, 3)
+
+
+def test_a_run_stops_after_max_batches(firebase):
+    requester, _ = seed_people(firebase)
+    for n in range(5):
+        new_request(firebase, requester, item=f'Lamp {n}')
+    jobs = scheduler(firebase)
+    # One batch for releases (none due), then one of expiries
+    stats = jobs.run_once(datetime.now() + timedelta(days=100), max_batches=2)
+    assert (stats['expired'], stats['done']) == (2, False)
+    stats = jobs.run_once(datetime.now() + timedelta(days=100))
+    assert (stats['expired'], stats['done']) == (3, True)
+    assert jobs.totals['expired'] == 5
+    assert [run['expired'] for run in jobs.report()] == [3, 2]
+
+
+def test_recent_requests_are_left_alone(firebase):
+    requester, repairer = seed_people(firebase)
+    request_id = new_request(firebase, requester)
+    firebase.assign_repairer(request_id, repairer)
+    stats = scheduler(firebase).run_once()
+    assert (stats['released'], stats['expired'], stats['writes']) == (0, 0, 0)
@@ -0,0 +1,38 @@
+# tests/test_mock_snapshot.py
+from conftest import new_request, seed_people
+
+
+def test_restore_round_trips_records(mock_service, tmp_path):
+    from firebase_service import MockFirestore
+    requester, repairer = seed_people(mock_service)
+    request_id = new_request(mock_service, requester)
+    mock_service.assign_repairer(request_id, repairer)
+    path = str(tmp_path / 'mock.snap')
+    mock_service.db.snapshot(path)
+
+    restored = MockFirestore.restore(path)
+    assert restored.get_repair_request(request_id) == mock_service.db.get_repair_request(request_id)
+    assert restored.get_user(repairer) == mock_service.db.get_user(repairer)
+
+
+def test_restored_users_do_not_share_counters(mock_service, tmp_path):
+    from firebase_service import MockFirestore
+    # Fresh users have identical counters, skills and skill tags
+    first = mock_service.create_user({'name': 'Ada', 'location': 'Riverside, Springfield',
+                                      'skills': ['Electrical']})
+    second = mock_service.create_user({'name': 'Bo', 'location': 'Riverside, Springfield',
+                                       'skills': ['Electrical']})
+    path = str(tmp_path / 'mock.snap')
+    mock_service.db.snapshot(path)
+    restored = MockFirestore.restore(path)
+
+    before = dict(restored.get_user(second)['counters'])
+    restored.create_repair_request({'item': 'Lamp', 'description': 'Flickers', 'urgency': 'Low',
+                                    'skill_needed': 'Electrical', 'requester_id': first,
+                                    'requester_name': 'Ada',
+                                    'requester_location': 'Riverside, Springfield'})
+    restored.get_user(first)['skills'].append('Plumbing')
+
+    assert restored.get_user(first)['counters'] != before
+    assert restored.get_user(second)['counters'] == before
+    assert restored.get_user(second)['skills'] == ['Electrical']
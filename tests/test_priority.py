@@ -0,0 +1,37 @@
+# tests/test_priority.py
+from datetime import datetime, timedelta
+
+from feeds import MATCH_HOURS, feed_score, rebuild_feeds
+from priority import PriorityIndex, priority_score
+
+NOW = datetime(2026, 10, 19, 12)
+
+
+def request(urgency, waited_hours, **fields):
+    return {'urgency': urgency, 'created_at': NOW - timedelta(hours=waited_hours), **fields}
+
+
+def test_an_urgency_step_is_worth_three_days_of_waiting():
+    high = priority_score(request('High', 0))
+    assert priority_score(request('Medium', 71)) < high
+    assert priority_score(request('Medium', 73)) > high
+
+
+def test_feeds_rank_by_the_priority_score():
+    req = request('Low', 5)
+    assert feed_score(req, 1.0) == round(priority_score(req) + MATCH_HOURS, 4)
+
+    waiting = request('Medium', 100, id='old', skill_needed='Electrical', requester_location='A, B')
+    fresh = request('High', 0, id='new', skill_needed='Electrical', requester_location='A, B')
+    user = {'id': 'u1', 'skills': ['Electrical'], 'location': 'A, B'}
+    feeds = rebuild_feeds([fresh, waiting], [user], size=1)
+    assert list(feeds['u1']) == ['old']
+
+
+def test_index_returns_the_most_pressing_first():
+    index = PriorityIndex()
+    for request_id, req in {'a': request('Low', 0), 'b': request('High', 0),
+                            'c': request('Medium', 80)}.items():
+        index.push(request_id, priority_score(req))
+    index.remove('b')
+    assert index.top(2) == ['c', 'a']
@@ -0,0 +1,28 @@
+# tests/test_request_cards.py
+from streamlit.testing.v1 import AppTest
+
+
+def test_empty_list_shows_a_notice():
+    def app():
+        import streamlit as st
+        from request_cards import render_request_cards
+        st.session_state.result = render_request_cards([], 'user_1', key='browse')
+
+    at = AppTest.from_function(app).run()
+    assert not at.exception
+    assert [info.value for info in at.info] == ["No requests to show."]
+    assert not at.caption
+    assert at.session_state.result == ([], None)
+
+
+def test_caption_counts_the_shown_page():
+    def app():
+        import streamlit as st
+        from request_cards import render_request_cards
+        requests = [{'id': f'r{i}', 'item': f'Lamp {i}', 'status': 'open'} for i in range(5)]
+        st.session_state.result = render_request_cards(requests, 'user_1', key='browse', page_size=2)
+
+    at = AppTest.from_function(app).run()
+    assert not at.exception
+    assert at.caption[0].value == "Showing 1–2 of 5"
+    assert [req['id'] for req in at.session_state.result[0]] == ['r0', 'r1']
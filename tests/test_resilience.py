@@ -0,0 +1,100 @@
+# tests/test_resilience.py
+import pytest
+
+from conftest import seed_people
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, FaultInjectingBackend, InjectedFault
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_breaker_opens_once_the_window_has_enough_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, window=5, clock=clock)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.allow() is False
+
+
+def test_failures_outside_the_window_are_forgotten(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, window=5, clock=clock)
+    for _ in range(2):
+        breaker.record_failure()
+    for _ in range(5):
+        breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_breaker_allows_one_half_open_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now = 29
+    assert breaker.allow() is False
+
+    clock.now = 30
+    assert breaker.allow() is True
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is False
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() is True
+    assert breaker.snapshot()['probes'] == 1
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now = 30
+    assert breaker.allow() is True
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now = 59
+    assert breaker.allow() is False
+    clock.now = 60
+    assert breaker.allow() is True
+
+
+def test_write_past_its_deadline_reports_failure(fake_service):
+    fake_service.write_deadline = 0.05
+    fake_service.db.latency = 0.2
+    assert fake_service.create_user({'name': 'Slow', 'location': 'Riverside, Springfield'}) is None
+    assert fake_service.get_resilience_metrics()['deadline_exceeded'] == 1
+    assert fake_service.breaker.snapshot()['failures'] == 1
+
+
+def test_local_methods_are_never_faulted(mock_service):
+    backend = FaultInjectingBackend(mock_service.db, failure_rate=1.0)
+    assert backend.allocate_id('repair_requests')
+    with pytest.raises(InjectedFault):
+        backend.get_stats()
+
+
+def test_write_behind_create_survives_injected_faults(clean_env, tmp_path):
+    clean_env.setenv('USE_MOCK_DB', 'true')
+    clean_env.setenv('WRITE_BEHIND', 'true')
+    clean_env.setenv('WRITE_BEHIND_SPOOL', str(tmp_path / 'spool.jsonl'))
+    clean_env.setenv('MOCK_FAULT_RATE', '1')
+    from firebase_service import FirebaseService
+    firebase = FirebaseService()
+    # Allocating the id is local, so the submit is acknowledged even while
+    # every backend call fails
+    requester, _ = seed_people(firebase)
+    assert requester
+    firebase.write_queue.stop(0)
@@ -0,0 +1,76 @@
+# tests/test_rollups.py
+from datetime import datetime
+
+import pytest
+
+from conftest import new_request, seed_people
+from rollups import ALL_TIME, ROLLUPS_COLLECTION, bucket_ids, median_hours, rollup_deltas
+
+
+@pytest.fixture(params=['mock_service', 'fake_service'])
+def firebase(request):
+    return request.getfixturevalue(request.param)
+
+
+def test_transitions_land_in_every_bucket():
+    created_at = datetime(2026, 10, 19, 9)
+    after = {'created_at': created_at, 'resolved_at': datetime(2026, 10, 19, 12),
+             'skill_needed': 'Plumbing'}
+    created = rollup_deltas('created', {}, after)
+    assert set(created) == {'day-2026-10-19', 'week-2026-W43', 'month-2026-10', ALL_TIME}
+    assert created[ALL_TIME] == {'created': 1, 'created_by_skill.plumbing': 1}
+
+    resolved = rollup_deltas('resolved', {}, after)[ALL_TIME]
+    assert resolved['resolved'] == 1
+    assert resolved['ttr_hours_sum'] == 3
+    assert resolved['kg_by_skill.plumbing'] == resolved['kg_saved']
+
+
+def test_median_is_read_from_the_histogram():
+    assert median_hours({}) is None
+    assert median_hours({'ttr_hist': {'b00': 1, 'b01': 1}}) == 1.0
+
+
+def test_impact_summary_sums_creates_and_resolves(firebase):
+    requester, repairer = seed_people(firebase)
+    for item in ('Lamp', 'Toaster'):
+        new_request(firebase, requester, item=item)
+    request_id = new_request(firebase, requester, item='Radio')
+    firebase.assign_repairer(request_id, repairer)
+    firebase.resolve_request(request_id, 'Thanks', repairer_id=repairer)
+
+    summary = firebase.get_impact_summary()
+    assert summary['created_this_month'] == 3
+    assert summary['items_saved'] == summary['items_saved_this_month'] == 1
+    assert summary['kg_by_skill'] == {'electrical': summary['kg_saved']}
+    assert summary['median_hours_to_resolve'] is not None
+    assert firebase.get_rollup_series('day', 2)[-1]['created'] == 3
+
+    assert firebase.rebuild_rollups() == 4
+    assert firebase.get_impact_summary() == summary
+
+
+def test_rollup_increments_are_spread_over_shards(fake_service):
+    requester, _ = seed_people(fake_service)
+    for n in range(30):
+        new_request(fake_service, requester, item=f'Lamp {n}')
+    all_time = fake_service.db.collection(ROLLUPS_COLLECTION).document(ALL_TIME)
+    shards = list(all_time.collection('shards').stream())
+    assert len(shards) > 1
+    assert not all_time.get().exists
+    assert fake_service.get_impact_summary()['created_this_month'] == 30
+
+
+def test_rebuild_replaces_unsharded_and_stale_buckets(fake_service):
+    requester, _ = seed_people(fake_service)
+    new_request(fake_service, requester)
+    rollups = fake_service.db.collection(ROLLUPS_COLLECTION)
+    # A bucket written as one document before sharding, and a stale one
+    this_month = bucket_ids(datetime.now())[2]
+    rollups.document(this_month).set({'created': 99})
+    rollups.document('day-2001-01-01').collection('shards').document('3').set({'created': 5})
+
+    assert fake_service.rebuild_rollups() == 4
+    assert not rollups.document(this_month).get().exists
+    assert sorted(ref.id for ref in rollups.list_documents()) == sorted(bucket_ids(datetime.now()))
+    assert fake_service.get_impact_summary()['created_this_month'] == 1
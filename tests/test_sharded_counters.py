@@ -0,0 +1,78 @@
+# tests/test_sharded_counters.py
+import threading
+
+from google.cloud.firestore_v1.transforms import Increment
+
+from conftest import new_request, seed_people
+from fake_firestore import FakeFirestoreClient
+from sharded_counters import MockShardedCounter, ShardedCounter, read_counters, status_deltas
+
+
+def test_concurrent_mock_increments_are_not_lost():
+    counter = MockShardedCounter(num_shards=4)
+
+    def work():
+        for _ in range(500):
+            counter.increment({'total': 1, 'open': 1})
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert counter.read() == {'total': 4000, 'open': 4000}
+    counter.reset({'total': 1})
+    assert counter.read() == {'total': 1}
+
+
+def test_shards_sum_on_read():
+    db = FakeFirestoreClient()
+    counter = ShardedCounter(db, 'request_status', num_shards=5)
+    for transition in ('created', 'created', 'assigned', 'resolved'):
+        batch = db.batch()
+        counter.increment(batch, status_deltas(transition, {}, {}), Increment)
+        batch.commit()
+    assert counter.read() == {'total': 2, 'open': 1, 'assigned': 0, 'resolved': 1}
+
+
+def test_nested_fields_and_batched_reads():
+    db = FakeFirestoreClient()
+    first, second = ShardedCounter(db, 'a', 3), ShardedCounter(db, 'b', 3)
+    for _ in range(6):
+        batch = db.batch()
+        first.increment(batch, {'kg': 1.5, 'kg_by_skill.plumbing': 1.5}, Increment)
+        second.increment(batch, {'kg': 1}, Increment)
+        batch.commit()
+    assert read_counters(db, [first, second, ShardedCounter(db, 'c', 3)]) == {
+        'a': {'kg': 9.0, 'kg_by_skill': {'plumbing': 9.0}}, 'b': {'kg': 6}}
+
+
+def test_fewer_shards_later_keeps_counts():
+    db = FakeFirestoreClient()
+    for _ in range(20):
+        batch = db.batch()
+        ShardedCounter(db, 'request_status', num_shards=10).increment(batch, {'total': 1}, Increment)
+        batch.commit()
+    assert ShardedCounter(db, 'request_status', num_shards=2).read() == {'total': 20}
+
+
+def test_reset_replaces_every_shard():
+    db = FakeFirestoreClient()
+    counter = ShardedCounter(db, 'request_status', num_shards=4)
+    for _ in range(10):
+        batch = db.batch()
+        counter.increment(batch, {'total': 1}, Increment)
+        batch.commit()
+    counter.reset({'total': 3, 'open': 3})
+    assert counter.read() == {'total': 3, 'open': 3}
+    assert [shard.id for shard in counter.shards.stream()] == ['0']
+
+
+def test_stats_match_a_recount(fake_service):
+    requester, repairer = seed_people(fake_service)
+    ids = [new_request(fake_service, requester, item=f'Lamp {n}') for n in range(3)]
+    fake_service.assign_repairer(ids[0], repairer)
+    stats = fake_service.get_stats()
+    assert (stats['total'], stats['open'], stats['assigned']) == (3, 2, 1)
+    assert fake_service.rebuild_stats_counters() == stats
+    assert fake_service.get_stats() == stats
@@ -0,0 +1,80 @@
+# tests/test_spill_store.py
+import pytest
+
+from spill_store import RecordsView, SpillStore, record_size
+
+
+def record(n):
+    return {'id': f'req{n}', 'item': f'Lamp {n}', 'description': 'x' * 200}
+
+
+@pytest.fixture
+def store(tmp_path):
+    # Room for about three records
+    return SpillStore(budget_bytes=3.5 * record_size(record(0)), spill_dir=str(tmp_path))
+
+
+def test_least_recently_used_records_spill_and_fault_back(store):
+    for n in range(6):
+        store[f'req{n}'] = record(n)
+    stats = store.memory_stats()
+    assert (stats['records'], stats['resident'], stats['spilled']) == (6, 3, 3)
+    assert stats['resident_bytes'] <= stats['budget_bytes']
+
+    assert store['req0'] == record(0)
+    assert store.stats['faults'] == 1
+    assert store['req0'] is store['req0']
+    assert store.stats['hits'] == 2
+    # Faulting req0 back in pushed out the least recently used, req3
+    assert 'req3' not in store._resident
+
+
+def test_changes_stored_again_survive_eviction(store):
+    for n in range(4):
+        store[f'req{n}'] = record(n)
+    changed = store['req0']
+    changed['status'] = 'resolved'
+    store['req0'] = changed
+    for n in range(4, 8):
+        store[f'req{n}'] = record(n)
+    assert 'req0' not in store._resident
+    assert store['req0']['status'] == 'resolved'
+
+
+def test_values_stream_without_promoting(store):
+    for n in range(6):
+        store[f'req{n}'] = record(n)
+    resident = list(store._resident)
+    assert [r['id'] for r in store.values()] == [f'req{n}' for n in range(6)]
+    assert list(store._resident) == resident
+    assert store.stats['faults'] == 0
+
+
+def test_deletes_and_rewrites_are_compacted(store):
+    for n in range(10):
+        store[f'req{n}'] = record(n)
+    for n in range(7):
+        del store[f'req{n}']
+    store['req10'] = record(10)
+    assert store.stats['compactions'] >= 1
+    assert sorted(store) == ['req10', 'req7', 'req8', 'req9']
+    assert [store[f'req{n}']['item'] for n in (7, 8, 9)] == ['Lamp 7', 'Lamp 8', 'Lamp 9']
+
+
+def test_zero_budget_never_spills(tmp_path):
+    store = SpillStore(budget_bytes=0, spill_dir=str(tmp_path))
+    for n in range(50):
+        store[f'req{n}'] = record(n)
+    assert store.memory_stats()['spilled'] == 0
+    store.resize(record_size(record(0)))
+    assert store.memory_stats()['resident'] == 1
+
+
+def test_records_view_ignores_later_appends():
+    items = [1, 2, 3]
+    view = RecordsView(items)
+    items.append(4)
+    assert list(view) == [1, 2, 3]
+    assert view[-1] == 3 and view[1:] == [2, 3]
+    with pytest.raises(IndexError):
+        view[3]
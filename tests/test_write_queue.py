@@ -0,0 +1,131 @@
+# tests/test_write_queue.py
+import json
+import threading
+
+from conftest import new_request, seed_people
+from write_queue import COMMITTED, FAILED, PENDING, REJECTED, WriteBehindQueue
+
+
+class Recorder:
+    """apply_batch that commits everything and remembers what it saw"""
+
+    def __init__(self, state=COMMITTED):
+        self.state = state
+        self.applied = []
+
+    def __call__(self, batch):
+        self.applied.extend(entry['op_id'] for entry in batch)
+        return {entry['op_id']: self.state for entry in batch}
+
+
+def write_spool(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def op_record(op_id, doc_id, op='assign_repairer', payload=None):
+    return {'type': 'op', 'op_id': op_id, 'op': op, 'doc_id': doc_id,
+            'payload': payload or {}, 'attempts': 0}
+
+
+def test_spool_replays_only_unfinished_ops(tmp_path):
+    spool = tmp_path / 'spool.jsonl'
+    write_spool(spool, [op_record('a', 'req1'), op_record('b', 'req2'),
+                        {'type': 'done', 'op_id': 'a', 'state': COMMITTED}])
+    apply_batch = Recorder()
+    queue = WriteBehindQueue(apply_batch, str(spool))
+    assert queue.stats['recovered'] == 1
+    assert queue.flush(5)
+    queue.stop()
+    assert apply_batch.applied == ['b']
+
+    # The spool was compacted once drained, so a restart replays nothing
+    again = Recorder()
+    queue = WriteBehindQueue(again, str(spool))
+    assert queue.flush(5)
+    queue.stop()
+    assert again.applied == []
+
+
+def test_torn_final_spool_line_is_skipped(tmp_path):
+    spool = tmp_path / 'spool.jsonl'
+    write_spool(spool, [op_record('a', 'req1')])
+    with open(spool, 'a', encoding='utf-8') as f:
+        f.write('{"type": "op", "op_id": "b"')
+    apply_batch = Recorder()
+    queue = WriteBehindQueue(apply_batch, str(spool))
+    assert queue.flush(5)
+    queue.stop()
+    assert apply_batch.applied == ['a']
+
+
+def test_replayed_create_that_already_landed_is_not_repeated(fake_service, tmp_path):
+    requester, _ = seed_people(fake_service)
+    request_id = new_request(fake_service, requester)
+    stored = fake_service.get_repair_request(request_id)
+
+    # A crash after the create committed but before its 'done' record was spooled
+    spool = tmp_path / 'spool.jsonl'
+    payload = {field: stored[field] for field in
+               ('item', 'description', 'urgency', 'skill_needed', 'requester_id',
+                'requester_name', 'requester_location')}
+    write_spool(spool, [op_record('create', request_id, 'create_repair_request',
+                                  {**payload, 'id': request_id})])
+    queue = WriteBehindQueue(fake_service._apply_write_batch, str(spool))
+    assert queue.flush(5)
+    queue.stop()
+
+    assert queue.stats['committed'] == 1
+    assert fake_service.get_stats()['total'] == 1
+    assert [r['id'] for r in fake_service.get_user_requests(requester)] == [request_id]
+
+
+def test_settled_states_are_forgotten_with_the_spool(tmp_path):
+    outcomes = {}
+    release = threading.Event()
+
+    def apply_batch(batch):
+        release.wait(5)
+        return {entry['op_id']: outcomes[entry['doc_id']] for entry in batch}
+
+    outcomes.update({'ok': COMMITTED, 'taken': REJECTED, 'unseen': REJECTED})
+    queue = WriteBehindQueue(apply_batch, str(tmp_path / 'spool.jsonl'))
+    for doc_id in outcomes:
+        queue.enqueue('assign_repairer', doc_id, {})
+    assert queue.status('ok') == PENDING
+    release.set()
+    assert queue.flush(5)
+
+    # Committed is forgotten (unknown ids read as committed); an unread
+    # rejection is kept until someone sees it
+    assert queue.status('ok') is None
+    assert queue.status('unseen') == REJECTED
+    assert queue.status('taken') == REJECTED
+
+    # Both rejections have now been read, so the next compaction drops them
+    outcomes['next'] = COMMITTED
+    queue.enqueue('assign_repairer', 'next', {})
+    assert queue.flush(5)
+    queue.stop()
+    assert queue.tracked_count() == 0
+
+
+def test_settled_states_are_capped(tmp_path):
+    apply_batch = Recorder(state=FAILED)
+
+    def failing(batch):
+        apply_batch(batch)
+        raise RuntimeError('backend down')
+
+    queue = WriteBehindQueue(failing, str(tmp_path / 'spool.jsonl'), max_attempts=1, max_settled=5)
+    for n in range(20):
+        queue.enqueue('assign_repairer', f'req{n}', {})
+    assert queue.flush(5)
+    queue.stop()
+
+    # Failures nobody has looked at survive compaction, newest first
+    assert queue.tracked_count() == 5
+    assert queue.status('req19') == FAILED
+    assert queue.last_error('req19') == 'backend down'
+    assert queue.status('req0') is None
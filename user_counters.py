@@ -0,0 +1,59 @@
+# user_counters.py
+from collections import defaultdict
+from typing import Dict, Iterable
+
+# Counters kept on each user document under the `counters` map
+COUNTER_FIELDS = ('requested', 'assigned_in_progress', 'resolved_as_repairer', 'gratitude_received')
+
+
+def empty_counters() -> Dict[str, int]:
+    return {field: 0 for field in COUNTER_FIELDS}
+
+
+def counter_deltas(transition: str, before: Dict, after: Dict) -> Dict[str, Dict[str, int]]:
+    """Per-user counter changes caused by one request transition.
+
+    `transition` is one of 'created', 'assigned', 'resolved', 'gratitude',
+    'released' or 'expired';
+    `before` is the request as it was (empty for 'created') and `after` as
+    written. Returns {user_id: {counter: delta}}.
+    """
+    deltas = defaultdict(dict)
+    if transition == 'created':
+        if after.get('requester_id'):
+            deltas[after['requester_id']]['requested'] = 1
+    elif transition == 'assigned':
+        deltas[after['assigned_to_id']]['assigned_in_progress'] = 1
+    elif transition == 'resolved':
+        repairer = after.get('assigned_to_id')
+        if repairer:
+            deltas[repairer]['assigned_in_progress'] = -1
+            deltas[repairer]['resolved_as_repairer'] = 1
+            if after.get('gratitude_note'):
+                deltas[repairer]['gratitude_received'] = 1
+    elif transition == 'released':
+        if before.get('assigned_to_id'):
+            deltas[before['assigned_to_id']]['assigned_in_progress'] = -1
+    elif transition == 'gratitude':
+        repairer = after.get('assigned_to_id')
+        if repairer and after.get('gratitude_note') and not before.get('gratitude_note'):
+            deltas[repairer]['gratitude_received'] = 1
+    return dict(deltas)
+
+
+def rebuild_counters(requests: Iterable[Dict]) -> Dict[str, Dict[str, int]]:
+    """Recompute every user's counters from the full request history"""
+    counters = defaultdict(empty_counters)
+    for req in requests:
+        if req.get('requester_id'):
+            counters[req['requester_id']]['requested'] += 1
+        repairer = req.get('assigned_to_id')
+        if not repairer:
+            continue
+        if req.get('status') == 'assigned':
+            counters[repairer]['assigned_in_progress'] += 1
+        elif req.get('status') == 'resolved':
+            counters[repairer]['resolved_as_repairer'] += 1
+            if req.get('gratitude_note'):
+                counters[repairer]['gratitude_received'] += 1
+    return dict(counters)
@@ -0,0 +1,258 @@
+# write_queue.py
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+PENDING = 'pending'
+COMMITTED = 'committed'
+REJECTED = 'rejected'
+FAILED = 'failed'
+
+# Settled (non-pending) write states remembered for status() and last_error()
+MAX_SETTLED_STATES = int(os.environ.get('WRITE_BEHIND_MAX_SETTLED', '10000'))
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"Cannot spool value of type {type(value).__name__}")
+
+
+def _decode(obj):
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    return obj
+
+
+class WriteBehindQueue:
+    """Acknowledge writes immediately and commit them from a background thread.
+
+    Each write is appended to a local spool file before `enqueue` returns, so
+    queued writes survive a restart. The worker hands batches to `apply_batch`,
+    which returns a state per op id: COMMITTED, REJECTED (permanent, e.g. the
+    request was already claimed) or PENDING to retry. If `apply_batch` raises,
+    the whole batch is retried with exponential backoff and jitter until
+    `max_attempts` is reached, after which the ops are marked FAILED.
+
+    The state of each document's latest write is kept for `status()`. Once
+    settled it is forgotten when the spool is compacted, if it was COMMITTED
+    (which is what an unknown document reports anyway) or has been read
+    through `status()` or `last_error()`. At most `max_settled` settled
+    states are kept, the oldest going first.
+    """
+
+    def __init__(self, apply_batch: Callable[[List[Dict]], Dict[str, str]],
+                 spool_path: str, batch_size: int = 20, max_attempts: int = 8,
+                 base_delay: float = 0.5, max_delay: float = 30.0,
+                 max_settled: int = MAX_SETTLED_STATES):
+        self.apply_batch = apply_batch
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_settled = max_settled
+
+        self._queue = deque()
+        # Oldest change first, so the cap drops the states settled longest ago
+        self._doc_state = OrderedDict()
+        self._errors = {}
+        # Settled states someone has read, forgotten at the next compaction
+        self._observed = set()
+        self._cond = threading.Condition()
+        self._spool_lock = threading.Lock()
+        self._in_flight = 0
+        self._stopped = False
+        self.stats = {'enqueued': 0, 'committed': 0, 'rejected': 0, 'failed': 0,
+                      'retries': 0, 'batches': 0, 'recovered': 0}
+
+        self._recover_spool()
+        self._worker = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._worker.start()
+
+    # Public API
+    def enqueue(self, op: str, doc_id: str, payload: Dict) -> str:
+        entry = {'op_id': uuid.uuid4().hex, 'op': op, 'doc_id': doc_id,
+                 'payload': payload, 'attempts': 0}
+        with self._cond:
+            # Spool under the queue lock so compaction can't drop this record
+            self._spool_append({'type': 'op', **entry})
+            self._queue.append(entry)
+            self._set_state(doc_id, PENDING)
+            self.stats['enqueued'] += 1
+            self._cond.notify()
+        return doc_id
+
+    def status(self, doc_id: str) -> Optional[str]:
+        """Latest known state of the most recent write to `doc_id`"""
+        with self._cond:
+            state = self._doc_state.get(doc_id)
+            if state is not None and state != PENDING:
+                self._observed.add(doc_id)
+            return state
+
+    def last_error(self, doc_id: str) -> Optional[str]:
+        with self._cond:
+            if doc_id in self._errors:
+                self._observed.add(doc_id)
+            return self._errors.get(doc_id)
+
+    def tracked_count(self) -> int:
+        """Documents whose write state is remembered"""
+        with self._cond:
+            return len(self._doc_state)
+
+    def pending(self) -> List[Dict]:
+        with self._cond:
+            return [{'op': e['op'], 'doc_id': e['doc_id'], 'attempts': e['attempts']}
+                    for e in self._queue]
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._queue) + self._in_flight
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far has been committed or given up on"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._queue or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 0.1)
+            return True
+
+    def stop(self, timeout: float = 5.0):
+        self.flush(timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+
+    # Worker
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopped:
+                    self._cond.wait()
+                if self._stopped and not self._queue:
+                    return
+                batch = [self._queue.popleft()
+                         for _ in range(min(self.batch_size, len(self._queue)))]
+                self._in_flight = len(batch)
+
+            retry = self._apply(batch)
+
+            with self._cond:
+                self._in_flight = 0
+                # Retries go back to the front so per-document ordering is kept
+                self._queue.extendleft(reversed(retry))
+                if not self._queue:
+                    self._compact_spool()
+                    self._compact_states()
+                self._cond.notify_all()
+
+            if retry:
+                attempt = max(e['attempts'] for e in retry)
+                delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+                time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def _apply(self, batch: List[Dict]) -> List[Dict]:
+        self.stats['batches'] += 1
+        try:
+            results = self.apply_batch(batch)
+            error = None
+        except Exception as e:
+            results = {}
+            error = str(e)[:200]
+
+        retry = []
+        for entry in batch:
+            state = results.get(entry['op_id'], PENDING)
+            if state == PENDING:
+                entry['attempts'] += 1
+                if entry['attempts'] < self.max_attempts:
+                    self.stats['retries'] += 1
+                    retry.append(entry)
+                    continue
+                state = FAILED
+            self._settle(entry, state, error)
+        return retry
+
+    def _settle(self, entry: Dict, state: str, error: Optional[str]):
+        self._spool_append({'type': 'done', 'op_id': entry['op_id'], 'state': state})
+        with self._cond:
+            self._set_state(entry['doc_id'], state)
+            if error and state == FAILED:
+                self._errors[entry['doc_id']] = error
+            self.stats[state] += 1
+            if len(self._doc_state) > 2 * self.max_settled:
+                self._forget_settled(self.max_settled)
+
+    # Write states; called with the queue lock held
+    def _set_state(self, doc_id: str, state: str):
+        self._doc_state[doc_id] = state
+        self._doc_state.move_to_end(doc_id)
+        self._errors.pop(doc_id, None)
+        self._observed.discard(doc_id)
+
+    def _forget(self, doc_id: str):
+        del self._doc_state[doc_id]
+        self._errors.pop(doc_id, None)
+        self._observed.discard(doc_id)
+
+    def _forget_settled(self, keep: int):
+        """Drop all but the `keep` most recently settled states"""
+        settled = [doc_id for doc_id, state in self._doc_state.items() if state != PENDING]
+        for doc_id in settled[:max(0, len(settled) - keep)]:
+            self._forget(doc_id)
+
+    # Spool file
+    def _spool_append(self, record: Dict):
+        with self._spool_lock:
+            with open(self.spool_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, default=_encode) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _compact_spool(self):
+        """Truncate the spool once nothing is outstanding"""
+        with self._spool_lock:
+            open(self.spool_path, 'w').close()
+
+    def _compact_states(self):
+        """Forget committed and already-read states along with the spool;
+        called with the queue lock held"""
+        for doc_id in [doc_id for doc_id, state in self._doc_state.items()
+                       if state == COMMITTED or (state != PENDING and doc_id in self._observed)]:
+            self._forget(doc_id)
+        self._forget_settled(self.max_settled)
+
+    def _recover_spool(self):
+        if not os.path.exists(self.spool_path):
+            return
+        ops, done = {}, set()
+        with open(self.spool_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line, object_hook=_decode)
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash mid-write
+                if record.get('type') == 'op':
+                    ops[record['op_id']] = record
+                elif record.get('type') == 'done':
+                    done.add(record['op_id'])
+        for op_id, record in ops.items():
+            if op_id in done:
+                continue
+            record.pop('type', None)
+            self._queue.append(record)
+            self._set_state(record['doc_id'], PENDING)
+            self.stats['recovered'] += 1